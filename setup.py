@@ -10,14 +10,14 @@ setup(
     name="traffic_signaling",
     version="1.0.0",
     author="feup-iart",
-    python_requires='>=3.6',
+    python_requires='>=3.10',
     long_description_content_type='text/markdown',
     long_description=long_description,
     install_requires=required,
     packages=find_packages(),
     classifiers=[
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.10',
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent"
     ],
@@ -1,27 +1,44 @@
-from copy import deepcopy
 from math import log, exp
-from random import random
 from model.city import City
+from model.incremental_evaluator import IncrementalEvaluator
+from .stopping import StoppingCriteria
+from model.checkpoint import Checkpoint, Checkpointer, rng_state, restore_rng
 from .common import (
     generate_random_solution,
     distributed_random_sum_permutation,
+    mutate_schedule,
+    mutate_intersection,
+    mutate_single_street,
 )
 import numpy as np
-from matplotlib import pyplot as plt
 
 PATH = "traffic_signaling/asset/out/sa_result.csv"
 
 
 def simulated_annealing(
-    city: City, iteration_mutation_pairs: list, file_output: bool = True
+    city: City, iteration_mutation_pairs: list, file_output: bool = True, initial_schedule=None, rng=None,
+    stopping_criteria: StoppingCriteria = None, checkpointer: Checkpointer = None, checkpoint: Checkpoint = None
 ):
     """
-    Simulated annealing algorithm that generates a green light cycle schedule for a given city
+    Simulated annealing algorithm that generates a green light cycle schedule for a given city.
+    The mutation operators are applied in turn, each for its number of iterations. When stopping criteria are given,
+    the operators are cycled through until the criteria are met. On a keyboard interrupt, the algorithm stops.
 
     Parameters:
         city: city for which the schedule will be generated
-        iteration_mutation_pairs: list of (number of iterations, mutation operator) pairs
+        iteration_mutation_pairs: list of (number of iterations, mutation operator) pairs, each operator being
+                                  called with a schedule and the random generator
         file_output: whether the best final schedule will be saved to a file or not
+        initial_schedule: the algorithm initial schedule (random if None)
+        rng: NumPy random generator, or seed to create one (unseeded if None)
+        stopping_criteria: stopping criteria of the algorithm, which keep the best schedule found so far (stops after
+                           the iterations of every pair if None)
+        checkpointer: writer of periodic checkpoints of the algorithm, between iterations
+        checkpoint: checkpoint of a previous run to resume, instead of starting from initial_schedule. The run must
+                    be resumed with the same iteration_mutation_pairs
+
+    Return:
+        best schedule found
     """
     file = None
     if file_output:
@@ -29,22 +46,41 @@ def simulated_annealing(
         file.write("INSTANT,SCORE,PROBABILITY,DIFF\n")
         file.flush()
 
-    t = 0
-    current_schedule = generate_random_solution(
-        city, distributed_random_sum_permutation
-    )
-    current_schedule.evaluate(city)
-
-    for number_of_iterations, mutation_operator in iteration_mutation_pairs:
-        for _ in range(number_of_iterations):
-            print(
-                f"For t = {t}, simulated annealing reached a score of {current_schedule.last_score}"
-            )
+    rng = np.random.default_rng(rng)
+    if stopping_criteria is None:
+        stopping_criteria = StoppingCriteria(sum(number_of_iterations for number_of_iterations, _ in iteration_mutation_pairs))
+    stopping_criteria.start()
+    if checkpoint is None:
+        current_schedule = generate_random_solution(
+            city, distributed_random_sum_permutation, rng
+        ) if initial_schedule is None else initial_schedule
+        evaluator = IncrementalEvaluator(city, current_schedule)
+        stopping_criteria.improve(current_schedule, current_schedule.last_score)
+        pair_index, pair_iteration = 0, 0
+    else:
+        rng = restore_rng(checkpoint.state["rng"])
+        stopping_criteria.restore(checkpoint.state["stopping_criteria"], checkpoint.schedules["best"][0])
+        current_schedule = checkpoint.schedules["current"][0]
+        evaluator = IncrementalEvaluator(city, current_schedule)
+        pair_index, pair_iteration = checkpoint.state["pair_index"], checkpoint.state["pair_iteration"]
+
+    try:
+        while any(number_of_iterations > 0 for number_of_iterations, _ in iteration_mutation_pairs):
+            number_of_iterations, mutation_operator = iteration_mutation_pairs[pair_index]
+            if pair_iteration >= number_of_iterations:
+                pair_index, pair_iteration = (pair_index + 1) % len(iteration_mutation_pairs), 0
+                continue
+            t = stopping_criteria.iterations
             T = scheduling_function(t)
             if T <= 0:
+                stopping_criteria.stop()
+            if stopping_criteria.should_stop():
                 break
-            next_schedule = mutation_operator(deepcopy(current_schedule))
-            next_schedule.evaluate(city)
+            print(
+                f"For t = {t}, simulated annealing reached a score of {current_schedule.last_score}"
+            )
+            next_schedule = mutation_operator(current_schedule.copy(), rng)
+            evaluator.evaluate(next_schedule)
 
             score_diff = next_schedule.last_score - current_schedule.last_score
             probability = min(exp(score_diff / T), 1)
@@ -58,11 +94,44 @@ def simulated_annealing(
                 )
                 file.flush()
 
-            if score_diff > 0 or random() < probability:
+            if score_diff > 0 or rng.random() < probability:
                 current_schedule = next_schedule
-            t += 1
+                evaluator.rebase(current_schedule)
+            stopping_criteria.update(current_schedule, current_schedule.last_score)
+            pair_iteration += 1
+
+            if checkpointer is not None and checkpointer.due():
+                checkpointer.write(Checkpoint("simulated_annealing", {
+                    "parameters": {},
+                    "pair_iterations": [number_of_iterations for number_of_iterations, _ in iteration_mutation_pairs],
+                    "pair_index": pair_index,
+                    "pair_iteration": pair_iteration,
+                    "rng": rng_state(rng),
+                    "stopping_criteria": stopping_criteria.state(),
+                }, {"current": [current_schedule], "best": [stopping_criteria.best_schedule]}))
+    except KeyboardInterrupt:
+        print(f"Simulated annealing interrupted after {stopping_criteria}")
+
+    return stopping_criteria.best_schedule
+
+
+def default_iteration_mutation_pairs(city: City, number_of_iterations: int) -> list:
+    """
+    Iteration mutation pairs of the simulated annealing: schedule mutations first, then intersection mutations
+    and, finally, single street mutations.
+
+    Parameters:
+        city: city for which the schedule will be generated
+        number_of_iterations: number of iterations of each mutation operator
 
-    return current_schedule
+    Return:
+        list of (number of iterations, mutation operator) pairs
+    """
+    return [
+        (number_of_iterations, lambda x, rng: mutate_schedule(city, x, 0.5, rng)),
+        (number_of_iterations, lambda x, rng: mutate_intersection(city, x, rng)[0]),
+        (number_of_iterations, lambda x, rng: mutate_single_street(city, x, rng)),
+    ]
 
 
 def scheduling_function(t: float, T0=3000):
@@ -80,6 +149,8 @@ def scheduling_function(t: float, T0=3000):
 
 
 def print_sa_results_graph_from_file():
+    from matplotlib import pyplot as plt
+
     with open(PATH) as f:
         metrics = [
             list(map(lambda i: i.strip("\n"), x.split(","))) for x in f.readlines()[1:]
@@ -1,62 +1,129 @@
 from model.city import City
 from model.schedule import Schedule
-from random import randint, random
+from model.green_cycle import GreenCycle
+import numpy as np
 
 
-def generate_random_solution(city: City, schedule_generator):
+def generate_random_solution(city: City, schedule_generator, rng: np.random.Generator):
     """
     Generates a random green light cycle schedule for a given city.
+    Only the intersections and incoming streets some car waits on are scheduled.
 
     Parameters:
         city: City for which the schedule will be created.
         schedule_generator: function responsible for creating a schedule for each intersection. See permutation functions below
+        rng: NumPy random generator
 
     Return:
         A newly created schedule for the given city
     """
     schedule = Schedule()
 
-    for intersection_id, intersection in city.intersections.items():
-        intersection_schedule = schedule_generator(
-            len(intersection.incoming_streets), city.duration
-        )
-        schedule.schedule[intersection_id] = []
-
-        for index, street in enumerate(intersection.incoming_streets):
-            schedule.schedule[intersection_id] += [
-                street.name for _ in range(intersection_schedule[index])
-            ]
+    for intersection_id in city.compiled.used_intersections.tolist():
+        streets = city.compiled.used_incoming(intersection_id).tolist()
+        intersection_schedule = schedule_generator(len(streets), city.duration, rng)
+        schedule.schedule[intersection_id] = GreenCycle(
+            streets, intersection_schedule)
 
     return schedule
 
 
-def distributed_random_sum_permutation(length: int, perm_sum: int):
+def generate_traffic_weighted_solution(city: City, weight_exponents: tuple = (0, 0.5, 1)):
     """
-    Creates a list of lenght length of integers with a sum inferior than perm_sum.
-    If length is larger that perm_sum, generates a random permutation of integer values, with the same sum condition.
-    Else, the permutation is guaranteed to have each element with a value equal or higher to 1.
+    Builds a green light cycle schedule for a given city from its traffic, in linear time over the car routes.
+    Streets turn green by the order in which their first car would arrive, if no car ever waited.
+    Each used street gets green time growing with the number of cars crossing it: (cars / least crossed street
+    cars of the intersection) ** exponent seconds, rounded. Congested cities are best served by short cycles, and
+    others by long ones, so a schedule is built for each given exponent and the best one is kept.
+
+    Parameters:
+        city: City for which the schedule will be created.
+        weight_exponents: exponents applied to the street traffic ratios to get green times
+
+    Return:
+        A newly created schedule for the given city
+    """
+    compiled = city.compiled
+    route_starts = compiled.route_offsets[:-1]
+    crossed = np.ones(len(compiled.route_streets), dtype=bool)
+    crossed[compiled.route_offsets[1:] - 1] = False
+
+    # Seconds a car takes to reach the end of each street of its route, if it never waits
+    driving_times = compiled.street_length[compiled.route_streets].astype(np.int64)
+    driving_times[route_starts] = 0
+    driving_times = np.cumsum(driving_times)
+    driving_times -= np.repeat(driving_times[route_starts], np.diff(compiled.route_offsets))
+    first_arrival = np.full(compiled.no_streets, np.iinfo(np.int64).max)
+    np.minimum.at(first_arrival, compiled.route_streets[crossed], driving_times[crossed])
+
+    intersections = []
+    for intersection_id in compiled.used_intersections.tolist():
+        streets = compiled.used_incoming(intersection_id)
+        streets = streets[np.argsort(first_arrival[streets], kind="stable")]
+        demand = compiled.street_demand[streets]
+        intersections.append((intersection_id, streets.tolist(), demand / demand.min()))
+
+    schedules = []
+    for exponent in weight_exponents:
+        schedule = Schedule()
+        for intersection_id, streets, ratios in intersections:
+            durations = np.maximum(1, np.rint(ratios ** exponent)).astype(np.int64)
+            if durations.sum() > city.duration:
+                durations = np.maximum(1, durations * city.duration // durations.sum())
+            schedule.schedule[intersection_id] = GreenCycle(
+                streets, durations.tolist())
+        schedule.evaluate(city)
+        schedules.append(schedule)
+
+    return max(schedules, key=lambda x: x.last_score)
+
+
+def distributed_random_sum_permutation(length: int, perm_sum: int, rng: np.random.Generator):
+    """
+    Creates a list of lenght length of integers with a sum not larger than perm_sum.
+    The sum is drawn uniformly, and split among the elements following a flat Dirichlet distribution, through
+    normalized exponential spacings. Runs in O(length).
+    If length is larger that perm_sum, some elements are 0. Else, each element has a value equal or higher to 1.
 
     Parameters:
         length: size of the list
         perm_sum: max possible value of the sum of the elements of the list
+        rng: NumPy random generator
 
     Return:
-        list of lenght length of integers with a sum inferior than perm_sum
+        list of lenght length of integers with a sum not larger than perm_sum
     """
-    if length > perm_sum:
-        return distributed_random_sum_permutation(length, perm_sum)
+    if length == 0:
+        return []
+    minimum = 1 if length <= perm_sum else 0
+    free_sum = int(rng.integers(minimum * length, perm_sum, endpoint=True)) - minimum * length
+    spacings = rng.standard_exponential(length).tolist()
+    scale = free_sum / sum(spacings)
+    return [minimum + int(spacing * scale) for spacing in spacings]
+
+
+def distributed_random_sum_permutations(lengths, perm_sum: int, rng: np.random.Generator):
+    """
+    Batch version of distributed_random_sum_permutation, creating a list for each given length at once.
 
-    permutation = [1 for _ in range(length)]
-    while perm_sum > 0 and 1 in permutation:
-        temp, index = randint(0, perm_sum), randint(0, length - 1)
-        if permutation[index] != 1 or perm_sum - temp < 0:
-            continue
-        perm_sum -= temp
-        permutation[index] += temp
-    return permutation
+    Parameters:
+        lengths: array with the size of each list
+        perm_sum: max possible value of the sum of the elements of each list
+        rng: NumPy random generator
+
+    Return:
+        array with the elements of all the lists, back to back
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    minimums = (lengths <= perm_sum).astype(np.int64)
+    free_sums = rng.integers(minimums * lengths, perm_sum, endpoint=True) - minimums * lengths
+    spacings = rng.standard_exponential(int(lengths.sum()))
+    totals = np.bincount(np.repeat(np.arange(len(lengths)), lengths), spacings, len(lengths))
+    scales = np.where(lengths > 0, free_sums / np.where(totals > 0, totals, 1), 0)
+    return np.repeat(minimums, lengths) + (spacings * np.repeat(scales, lengths)).astype(np.int64)
 
 
-def distributed_sum_permutation(length: int, perm_sum: int):
+def distributed_sum_permutation(length: int, perm_sum: int, rng: np.random.Generator):
     """
     Creates a list of lenght length of integers with a sum inferior than perm_sum.
     If length is larger that perm_sum, generates a random permutation of integer values, , with the same sum condition.
@@ -65,80 +132,85 @@ def distributed_sum_permutation(length: int, perm_sum: int):
     Parameters:
         length: size of the list
         perm_sum: max possible value of the sum of the elements of the list
+        rng: NumPy random generator
 
     Return:
         list of lenght length of integers with a sum inferior than perm_sum
     """
     if length > perm_sum:
-        return distributed_random_sum_permutation(length, perm_sum)
+        return distributed_random_sum_permutation(length, perm_sum, rng)
 
     return [1 for _ in range(length)]
 
 
-def mutate_intersection(city: City, schedule: Schedule) -> tuple[Schedule, int]:
-    intersections = list(enumerate(city.intersections.items()))
-    _, (intersection_id, intersection) = intersections[
-        randint(0, len(intersections) - 1)
-    ]
+def mutate_intersection(city: City, schedule: Schedule, rng: np.random.Generator) -> tuple[Schedule, int]:
+    """
+    Replaces the green light cycle of a random intersection some car waits on, on a given schedule for a given city.
+
+    Parameters:
+        city: a city object
+        schedule: green light schedule for the city
+        rng: NumPy random generator
+
+    Return:
+        schedule with updated green light cycle and the id of the mutated intersection
+    """
+    intersection_id = int(rng.choice(city.compiled.used_intersections))
+    streets = city.compiled.used_incoming(intersection_id).tolist()
 
     intersection_schedule = distributed_random_sum_permutation(
-        len(intersection.incoming_streets), city.duration
+        len(streets), city.duration, rng
     )
-    schedule.schedule[intersection_id] = []
+    schedule.schedule[intersection_id] = GreenCycle(
+        streets, intersection_schedule)
 
-    for index, street in enumerate(intersection.incoming_streets):
-        schedule.schedule[intersection_id] += [
-            street.name for _ in range(intersection_schedule[index])
-        ]
+    return (schedule, intersection_id)
 
-    return (schedule, intersection)
 
-
-def mutate_single_street(city: City, schedule: Schedule):
+def mutate_single_street(city: City, schedule: Schedule, rng: np.random.Generator):
     """
-    Changes the green light time for a single random street on a random intersection on a given schedule for a given city.
+    Changes the green light time for a single random street on a random intersection some car waits on,
+    on a given schedule for a given city.
 
     Parameters:
         city: a city object
         schedule: green light schedule for the city
+        rng: NumPy random generator
 
     Return:
         schedule with updated green light cycle
     """
-    intersections = list(city.intersections.keys())
-    intersection_id = intersections[randint(0, len(intersections) - 1)]
-    current_intersection_schedule = schedule.schedule[intersection_id]
+    intersection_id = int(rng.choice(city.compiled.used_intersections))
+    current_intersection_schedule = schedule.schedule.get(
+        intersection_id, GreenCycle())
 
-    current_intersection_schedule_dict = {
-        street_name: current_intersection_schedule.count(street_name)
-        for street_name in set(current_intersection_schedule)
-    }
+    current_intersection_schedule_dict = dict(
+        current_intersection_schedule.pairs())
 
     streets = list(current_intersection_schedule_dict.items())
     if len(streets) > 1:
-        street, street_time = streets[randint(0, len(streets) - 1)]
+        street, street_time = streets[rng.integers(len(streets))]
     elif len(streets) == 1:
         street, street_time = streets[0]
     else:
-        streets = list(city.intersections[intersection_id].incoming_streets)
-        street, street_time = streets[randint(0, len(streets) - 1)].name, 0
+        streets = city.compiled.used_incoming(intersection_id)
+        street, street_time = int(rng.choice(streets)), 0
 
-    remaining_time = city.duration - (
-        sum(list(current_intersection_schedule_dict.values())) - street_time
-    )
+    remaining_time = max(0, city.duration - (
+        len(current_intersection_schedule) - street_time
+    ))
 
-    current_intersection_schedule_dict[street] = randint(0, remaining_time)
+    current_intersection_schedule_dict[street] = int(rng.integers(remaining_time, endpoint=True))
 
-    schedule.schedule[intersection_id] = [
-        street_name
-        for street_name, street_time in current_intersection_schedule_dict.items()
-        for _ in range(street_time)
-    ]
+    schedule.schedule[intersection_id] = GreenCycle(
+        current_intersection_schedule_dict.keys(),
+        current_intersection_schedule_dict.values(),
+    )
 
     return schedule
 
 
-def mutate_schedule(city, schedule, strength):
+def mutate_schedule(city, schedule, strength, rng: np.random.Generator):
     """
     For a given schedule, replace intersection schedules by random ones
     with given probability.
@@ -147,17 +219,18 @@ def mutate_schedule(city, schedule, strength):
         city: city for which the schedules were made
         schedule: schedule to mutate
         strength: probability of a schedule intersection be replaced by a random one
+        rng: NumPy random generator
 
     Return:
         mutated schedule
     """
     another_solution = generate_random_solution(
-        city, distributed_random_sum_permutation
+        city, distributed_random_sum_permutation, rng
     )
-    return mix_solutions(city, schedule, another_solution, strength)
+    return mix_solutions(city, schedule, another_solution, strength, rng)
 
 
-def mix_solutions(city, base_schedule, foreigner_schedule, probability):
+def mix_solutions(city, base_schedule, foreigner_schedule, probability, rng: np.random.Generator):
     """
     Inject foreigner schedule intersections in the base one
     with given probability per intersection.
@@ -167,15 +240,15 @@ def mix_solutions(city, base_schedule, foreigner_schedule, probability):
         base_schedule: the default intersection source
         foreigner_schedule: the schedules to inject in base
         probability: probability of a foreign intersection being injected
+        rng: NumPy random generator
 
     Return:
         mixed schedule
     """
     perturbation = Schedule()
-    for j in range(city.no_intersections):
-        r = random()
-        if r < probability:
-            perturbation.schedule[j] = foreigner_schedule.schedule[j]
-        else:
-            perturbation.schedule[j] = base_schedule.schedule[j]
+    used_intersections = city.compiled.used_intersections
+    for j, r in zip(used_intersections.tolist(), rng.random(len(used_intersections)).tolist()):
+        source = foreigner_schedule if r < probability else base_schedule
+        if j in source.schedule:
+            perturbation.schedule[j] = source.schedule[j]
     return perturbation
@@ -5,14 +5,18 @@ from .common import (
     distributed_random_sum_permutation,
 )
 from model.schedule import Schedule
+from model.green_cycle import GreenCycle
 from model.city import City
-from random import randint, random
-from multiprocessing import Process, Queue, Manager
+from model.shared_city import share_city, attach_city
+from model.batch_evaluator import BatchEvaluator
+from .stopping import StoppingCriteria
+from model.checkpoint import Checkpoint, Checkpointer, rng_state, restore_rng
+from multiprocessing import Process, Pipe
+from signal import signal, SIGINT, SIG_IGN
 from math import ceil
 from toolz import unique
 
 import numpy as np
-from matplotlib import pyplot as plt
 
 import os
 
@@ -20,70 +24,122 @@ PATH = "traffic_signaling/asset/out/genetic_result.csv"
 
 
 def genetic_algorithm_process(
-    city: City,
-    number_of_generations: int,
+    city_name: str,
     population_size: int,
     mutation_chance: float,
-    result: Queue,
-    file,
+    rng: np.random.Generator,
+    connection,
+    initial_population: list = None,
 ):
     """
-    Genetic algorithm that generates a population of green light schedules for a given city.
-    This function is intended to be called as an entry point for a child process.
+    Genetic algorithm island, that evolves a population of green light schedules for a given city.
+    This function is intended to be called as an entry point for a child process, which lives for the whole
+    concurrent phase and evolves its population when the parent process asks it to.
     Instead of just searching for a better score, it also promotes rarer chromossomes.
 
+    Commands received through the connection:
+        ("evolve", (first_generation, last_generation, immigrants, no_emigrants)): takes in the immigrants,
+        evolves the population for the given generations and answers with the generations averages, the number
+        of schedules evaluated and its no_emigrants best schedules (at least one)
+        ("checkpoint", None): answers with the whole population and the state of the island random generator
+        ("evaluate", schedules): answers with the scores of the given encoded schedules
+        ("close", None): ends the process
+
+    Schedules are sent as (Schedule.to_bytes(), score) tuples. Keyboard interrupts are left to the parent process.
+
     Parameters:
-        city: city for which the schedules will be created
-        number_of_generations: number of generations upon which the population will evolve
+        city_name: name of the shared memory block holding the city, as given by share_city
         population_size: max size of the population
         mutation_chance: probability of a schedule mutating from one generation to another
-        result: multiprocess queue, through which the results will be passed to the parent process
-        file: file where the evolution of the population will be registered. None if no register is needed
+        rng: NumPy random generator of the island, an independent stream spawned by the parent process
+        connection: pipe to the parent process
+        initial_population: encoded population to start from, instead of a random one
     """
-
-    population = [
-        generate_random_solution(city, distributed_random_sum_permutation)
-        for _ in range(population_size)
-    ]
+    signal(SIGINT, SIG_IGN)
+    city, shared_memory = attach_city(city_name)
+    batch_evaluator = BatchEvaluator(city)
+    evaluations = 0
+
+    def evaluate_population(schedules):
+        nonlocal evaluations
+        evaluations += len(schedules)
+        batch_evaluator.evaluate(schedules)
+
+    if initial_population is None:
+        population = [
+            generate_random_solution(city, distributed_random_sum_permutation, rng)
+            for _ in range(population_size)
+        ]
+        evaluate_population(population)
+    else:
+        population = decode_population(initial_population)
 
     print(f"Starting process {os.getpid()} with a population of size {population_size}")
 
-    genetic_map = {}
-    for schedule in population:
-        schedule.evaluate(city)
-        genetic_map = chromossome_mapping(schedule, genetic_map)
+    while True:
+        command, arguments = connection.recv()
+        if command == "close":
+            break
+        if command == "checkpoint":
+            connection.send((encode_population(population), rng_state(rng)))
+            continue
+        if command == "evaluate":
+            connection.send(batch_evaluator.evaluate(
+                [Schedule.from_bytes(data) for data in arguments]))
+            continue
 
-    for generation in range(1, number_of_generations + 1):
-        population = next_generation(
-            city,
-            population,
-            population_size,
-            lambda x: mutate_schedule(city, x, 0.1),
-            cross_over,
-            (
-                lambda x: x.last_score
-                + genetic_evaluation(x, genetic_map, city.car_value)
-            ),
-            mutation_chance,
-        )
+        first_generation, last_generation, immigrants, no_emigrants = arguments
+        population.sort(key=lambda x: x.last_score, reverse=True)
+        if immigrants:
+            population[-len(immigrants):] = decode_population(immigrants)
 
         genetic_map = {}
         for schedule in population:
             genetic_map = chromossome_mapping(schedule, genetic_map)
 
-        average = sum([x.last_score for x in population]) / len(population)
-        process = os.getpid()
-        print(
-            f"Process {process} at generation {generation} scored an average of {int(average)}"
-        )
-        if file is not None:
-            file.write(f"1,{process},{generation},{average}\n")
-            file.flush()
+        averages = []
+        for generation in range(first_generation, last_generation + 1):
+            population = next_generation(
+                city,
+                population,
+                population_size,
+                lambda x: mutate_schedule(city, x, 0.1, rng),
+                cross_over,
+                (
+                    lambda x: x.last_score
+                    + genetic_evaluation(x, genetic_map, city.car_value)
+                ),
+                mutation_chance,
+                rng,
+                evaluate_population,
+            )
 
-    print([x.last_score for x in population])
+            genetic_map = {}
+            for schedule in population:
+                genetic_map = chromossome_mapping(schedule, genetic_map)
+
+            average = sum([x.last_score for x in population]) / len(population)
+            averages.append(average)
+            print(
+                f"Process {os.getpid()} at generation {generation} scored an average of {int(average)}"
+            )
 
-    result.put(population)
-    return None
+        emigrants = sorted(population, key=lambda x: x.last_score, reverse=True)[:max(1, no_emigrants)]
+        connection.send((averages, evaluations, encode_population(emigrants)))
+        evaluations = 0
+
+    connection.close()
+    shared_memory.close()
+
+
+def encode_population(population: list) -> list:
+    '''Compact encoding of a population, to send it to another process'''
+    return [(schedule.to_bytes(), schedule.last_score) for schedule in population]
+
+
+def decode_population(encoded_population: list) -> list:
+    '''Decode a population encoded by encode_population'''
+    return [Schedule.from_bytes(data, score) for data, score in encoded_population]
 
 
 def genetic_algorithm(
@@ -93,100 +149,217 @@ def genetic_algorithm(
     subpopulation_size: int,
     mutation_chance: float,
     file_output: bool = True,
+    migration_interval: int = 5,
+    migration_size: int = 2,
+    rng=None,
+    stopping_criteria: StoppingCriteria = None,
+    checkpointer: Checkpointer = None,
+    checkpoint: Checkpoint = None,
 ):
     """
     Genetic algorithm that generates a green light schedule for a given city.
-    For a part of the algorithm, the population is divided into subpopulations which evolve in parallel. These
-    subpopulations favor not only a better score, but also rarer chromossomes.
+    For a part of the algorithm, the population is divided into subpopulations which evolve in parallel, each one
+    in a worker process reading the city from shared memory. These subpopulations favor not only a better score,
+    but also rarer chromossomes. Every migration_interval generations, the best schedules of each subpopulation
+    migrate to the next one, replacing its worst.
     After number_of_generations generations have passed, the subpopulations are merged and evolve as one, for another
-    number_of_generations generations.
+    number_of_generations generations, the worker processes evaluating the offspring of each generation.
+    With other stopping criteria, the subpopulations are merged once half their budget is spent. While they evolve
+    apart, the criteria are only checked on migrations. On a keyboard interrupt, the worker processes are terminated
+    and the best schedule found so far is returned.
 
     Parameters:
         city: city for which the schedule will be made
-        number_of_generations: number of generations upon which the population will evolve
+        number_of_generations: number of generations upon which the population will evolve, in each phase, None for
+                               no generation limit
         population_size: max size of the population
         subpopulation_size: size of separated groups of the population
         mutation_chance: probability of a schedule mutating from one generation to another
         file_output: whether the best final schedule will be saved to a file or not
+        migration_interval: number of generations between migrations
+        migration_size: number of schedules migrating from each subpopulation, 0 for no migration
+        rng: NumPy random generator, or seed to create one (unseeded if None). Each subpopulation process gets an
+             independent stream spawned from it
+        stopping_criteria: other stopping criteria of the algorithm, which keep the best schedule found so far,
+                           counting generations of both phases as iterations
+        checkpointer: writer of periodic checkpoints of the algorithm, on migrations and then between generations
+        checkpoint: checkpoint of a previous run to resume, with the same population and subpopulation sizes
 
     Return:
         a optimized schedule for the given city
     """
-    population = []
-    processes = []
-    result = Manager().Queue()
-    remaining = population_size
-    subpopulation = subpopulation_size
-
     file = None
     if file_output:
         file = open("traffic_signaling/asset/out/genetic_result.csv", "w")
         file.write("PHASE,PROCESS,GENERATION,AVERAGE\n")
         file.flush()
 
-    for _ in range(ceil(population_size / subpopulation_size)):
-        if remaining < subpopulation_size:
-            subpopulation = remaining
-        processes.append(
-            Process(
+    rng = np.random.default_rng(rng)
+    stopping_criteria = StoppingCriteria() if stopping_criteria is None else stopping_criteria
+    stopping_criteria.start(None if number_of_generations is None else 2 * number_of_generations)
+    no_islands = ceil(population_size / subpopulation_size)
+    parameters = {
+        "number_of_generations": number_of_generations,
+        "population_size": population_size,
+        "subpopulation_size": subpopulation_size,
+        "mutation_chance": mutation_chance,
+        "migration_interval": migration_interval,
+        "migration_size": migration_size,
+    }
+    if checkpoint is None:
+        phase, generation = 1, 1
+        island_rngs = rng.spawn(no_islands)
+        island_populations = [None for _ in range(no_islands)]
+        immigrants = [[] for _ in range(no_islands)]
+    else:
+        phase, generation = checkpoint.state["phase"], checkpoint.state["generation"]
+        rng = restore_rng(checkpoint.state["rng"])
+        island_rngs = [restore_rng(state) for state in checkpoint.state["island_rngs"]]
+        island_populations = [encode_population(checkpoint.schedules[f"island_{index}"]) if phase == 1 else []
+                              for index in range(no_islands)]
+        immigrants = [encode_population(checkpoint.schedules.get(f"immigrants_{index}", []))
+                      for index in range(no_islands)]
+        stopping_criteria.restore(checkpoint.state["stopping_criteria"], checkpoint.schedules["best"][0])
+
+    def write_checkpoint(schedules: dict, island_states: list) -> None:
+        checkpointer.write(Checkpoint("genetic_algorithm", {
+            "parameters": parameters,
+            "phase": phase,
+            "generation": generation,
+            "rng": rng_state(rng),
+            "island_rngs": island_states,
+            "stopping_criteria": stopping_criteria.state(),
+        }, {"best": [stopping_criteria.best_schedule], **schedules}))
+
+    shared_memory = share_city(city)
+    islands = []
+    finished = False
+    try:
+        for index, island_rng in enumerate(island_rngs):
+            subpopulation = min(subpopulation_size, population_size - index * subpopulation_size)
+            connection, process_connection = Pipe()
+            process = Process(
                 target=genetic_algorithm_process,
                 args=(
-                    city,
-                    number_of_generations,
+                    shared_memory.name,
                     subpopulation,
                     mutation_chance,
-                    result,
-                    file,
+                    island_rng,
+                    process_connection,
+                    island_populations[index],
                 ),
             )
-        )
-        remaining -= subpopulation_size
-
-    for process in processes:
-        process.start()
-
-    for process in processes:
-        process.join()
-
-    for _ in processes:
-        population.extend(result.get())
-
-    chromossome_map = {}
-    for schedule in population:
-        chromossome_map = chromossome_mapping(schedule, chromossome_map)
-
-    population = list(unique(population, key=lambda x: x.last_score))
-    population.sort(
-        key=lambda x: x.last_score
-        + genetic_evaluation(x, chromossome_map, city.car_value),
-        reverse=True,
-    )
-
-    print()
-    print("### Merged Population Scores ###")
-    print([x.last_score for x in population])
-    print()
-
-    for generation in range(1, number_of_generations + 1):
-        population = next_generation(
-            city,
-            population,
-            population_size,
-            lambda x: mutate_schedule(city, x, 0.1),
-            cross_over,
-            (lambda x: x.last_score),
-            mutation_chance,
-        )
-
-        average = sum([x.last_score for x in population]) / len(population)
-        process = os.getpid()
-        print(f"Generation {generation} scored an average of {average}")
-        if file is not None:
-            file.write(f"2,{process},{generation},{int(average)}\n")
-            file.flush()
+            process.start()
+            islands.append((process, connection))
+
+        no_emigrants = migration_size if len(islands) > 1 else 0
+        migration_interval = max(1, migration_interval)
+        while phase == 1 and not stopping_criteria.should_stop() and stopping_criteria.progress() < 0.5:
+            last_generation = generation + migration_interval - 1
+            if number_of_generations is not None:
+                last_generation = min(number_of_generations, last_generation)
+            for (_, connection), island_immigrants in zip(islands, immigrants):
+                connection.send(("evolve", (generation, last_generation, island_immigrants, no_emigrants)))
+            best_emigrant, evaluations = None, 0
+            for index, (process, connection) in enumerate(islands):
+                averages, island_evaluations, emigrants = connection.recv()
+                immigrants[(index + 1) % len(islands)] = emigrants[:no_emigrants]
+                evaluations += island_evaluations
+                if best_emigrant is None or emigrants[0][1] > best_emigrant[1]:
+                    best_emigrant = emigrants[0]
+                if file is not None:
+                    for island_generation, average in enumerate(averages, generation):
+                        file.write(f"1,{process.pid},{island_generation},{average}\n")
+                    file.flush()
+            stopping_criteria.update(Schedule.from_bytes(*best_emigrant), best_emigrant[1],
+                                     evaluations, last_generation - generation + 1)
+            generation = last_generation + 1
+
+            if checkpointer is not None and checkpointer.due():
+                for _, connection in islands:
+                    connection.send(("checkpoint", None))
+                island_states = [connection.recv() for _, connection in islands]
+                write_checkpoint({
+                    **{f"island_{index}": population for index, (population, _) in enumerate(island_states)},
+                    **{f"immigrants_{index}": island_immigrants for index, island_immigrants in enumerate(immigrants)},
+                }, [state for _, state in island_states])
+
+        if phase == 1:
+            population, island_rng_states = [], []
+            for _, connection in islands:
+                connection.send(("checkpoint", None))
+                island_population, island_rng_state = connection.recv()
+                population.extend(decode_population(island_population))
+                island_rng_states.append(island_rng_state)
+
+            chromossome_map = {}
+            for schedule in population:
+                chromossome_map = chromossome_mapping(schedule, chromossome_map)
+
+            population = list(unique(population, key=lambda x: x.last_score))
+            population.sort(
+                key=lambda x: x.last_score
+                + genetic_evaluation(x, chromossome_map, city.car_value),
+                reverse=True,
+            )
+            phase, generation = 2, 1
+        else:
+            population = checkpoint.schedules["population"]
+            island_rng_states = checkpoint.state["island_rngs"]
+
+        connections = [connection for _, connection in islands]
+
+        print()
+        print("### Merged Population Scores ###")
+        print([x.last_score for x in population])
+        print()
+
+        offspring_sizes = []
+
+        def evaluate_offspring(offspring):
+            offspring_sizes.append(len(offspring))
+            evaluate_in_workers(connections, offspring)
+
+        while not stopping_criteria.should_stop():
+            population = next_generation(
+                city,
+                population,
+                population_size,
+                lambda x: mutate_schedule(city, x, 0.1, rng),
+                cross_over,
+                (lambda x: x.last_score),
+                mutation_chance,
+                rng,
+                evaluate_offspring,
+            )
+            stopping_criteria.update(population[0], population[0].last_score, offspring_sizes.pop())
+
+            average = sum([x.last_score for x in population]) / len(population)
+            process = os.getpid()
+            print(f"Generation {generation} scored an average of {average}")
+            if file is not None:
+                file.write(f"2,{process},{generation},{int(average)}\n")
+                file.flush()
+            generation += 1
+
+            if checkpointer is not None and checkpointer.due():
+                write_checkpoint({"population": population}, island_rng_states)
+
+        print(f"Final population: {[x.last_score for x in population]}")
+        finished = True
+    except KeyboardInterrupt:
+        print(f"Genetic algorithm interrupted after {stopping_criteria}")
+    finally:
+        for process, connection in islands:
+            if finished:
+                connection.send(("close", None))
+            else:
+                process.terminate()
+            process.join()
+        shared_memory.close()
+        shared_memory.unlink()
 
-    print(f"Final population: {[x.last_score for x in population]}")
-    return population[0]
+    return stopping_criteria.best_schedule
 
 
 def next_generation(
@@ -197,9 +370,13 @@ def next_generation(
     cross_over_function,
     sorting_function,
     mutation_chance: float,
+    rng: np.random.Generator,
+    evaluate_population=None,
 ):
     """
     For a given population, creates the next generation of schedules.
+    The offspring, mutated schedules and children of cross overs, are evaluated together once the generation is built,
+    and compete with the current population, which is kept as it is, for a place in the next generation.
 
     Parameters:
         city: city for which the schedules were made
@@ -209,34 +386,41 @@ def next_generation(
         cross_over_function: cross over operator of the genetic algorithm
         sorting_function: function that orders the population in a ranking
         mutation_chance: probability of a schedule mutating
+        rng: NumPy random generator, drawing the mutated schedules, the second parents and the cross over points
+        evaluate_population: function that evaluates a list of schedules, in place (evaluates them one by one if None)
 
     Return:
         population of the next generation
     """
-    for schedule in population:
-        if random() <= mutation_chance:
-            schedule = mutation_operator(schedule)
-            schedule.evaluate(city)
+    mutated, children = [], []
+    for schedule, r in zip(population, rng.random(len(population)).tolist()):
+        if r <= mutation_chance:
+            mutated.append(mutation_operator(schedule))
 
     for index in range(int(len(population) / 4)):
         best_parent = population[index]
         second_parent_index = index
         while second_parent_index == index:
-            second_parent_index = randint(0, len(population) - 1)
+            second_parent_index = int(rng.integers(len(population)))
 
         random_parent = population[second_parent_index]
 
         child_1, child_2 = cross_over_function(
             city,
-            randint(0, len(city.intersections) - 1),
+            int(rng.integers(city.compiled.no_intersections)),
             best_parent,
             random_parent,
         )
 
-        child_1.evaluate(city)
-        child_2.evaluate(city)
-        population.append(child_1)
-        population.append(child_2)
+        children.append(child_1)
+        children.append(child_2)
+
+    if evaluate_population is None:
+        for schedule in mutated + children:
+            schedule.evaluate(city)
+    else:
+        evaluate_population(mutated + children)
+    population.extend(mutated + children)
 
     population.sort(
         key=sorting_function,
@@ -247,6 +431,25 @@ def next_generation(
     return population
 
 
+def evaluate_in_workers(connections: list, population: list) -> None:
+    """
+    Evaluate a population in island worker processes, in place.
+    The population is split into contiguous batches, one per worker, so the scores come back in population order.
+
+    Parameters:
+        connections: pipes to the island worker processes
+        population: schedules to evaluate
+    """
+    batch_size = max(1, -(-len(population) // len(connections)))
+    batches = [population[i:i + batch_size]
+               for i in range(0, len(population), batch_size)]
+    for connection, batch in zip(connections, batches):
+        connection.send(("evaluate", [schedule.to_bytes() for schedule in batch]))
+    for connection, batch in zip(connections, batches):
+        for schedule, score in zip(batch, connection.recv()):
+            schedule.last_score = score
+
+
 def genetic_evaluation(schedule: Schedule, genetic_mapping: dict, bonus: int):
     """
     Evaluates a schedule based on how rare its genes are.
@@ -267,12 +470,10 @@ def genetic_evaluation(schedule: Schedule, genetic_mapping: dict, bonus: int):
         if not (intersection_id in genetic_mapping.keys()):
             score += bonus * 2
             continue
-        streets = set(intersection_schedule)
-        for street in streets:
+        for street, street_time in intersection_schedule.pairs():
             if not (street in genetic_mapping[intersection_id].keys()):
                 score += bonus * 2
                 continue
-            street_time = intersection_schedule.count(street)
 
             if not (street_time in genetic_mapping[intersection_id][street].keys()):
                 score += bonus * 2
@@ -299,11 +500,9 @@ def chromossome_mapping(schedule: Schedule, mapping: dict):
     for intersection_id, intersection_schedule in schedule.schedule.items():
         if not (intersection_id in mapping.keys()):
             mapping[intersection_id] = {}
-        streets = set(intersection_schedule)
-        for street in streets:
+        for street, street_time in intersection_schedule.pairs():
             if not (street in mapping[intersection_id].keys()):
                 mapping[intersection_id][street] = {}
-            street_time = intersection_schedule.count(street)
             if not (street_time in mapping[intersection_id][street].keys()):
                 mapping[intersection_id][street][street_time] = 1
             else:
@@ -329,15 +528,15 @@ def cross_over(
         list with 2 children schedules
     """
     child_1, child_2 = Schedule(), Schedule()
-    for index, intersection_id in enumerate(city.intersections.keys()):
+    for intersection_id in range(city.compiled.no_intersections):
         if intersection_id in parent_1.schedule.keys():
-            if index >= cross_over_point:
+            if intersection_id >= cross_over_point:
                 child_2.schedule[intersection_id] = parent_1.schedule[intersection_id]
             else:
                 child_1.schedule[intersection_id] = parent_1.schedule[intersection_id]
 
         if intersection_id in parent_2.schedule.keys():
-            if index >= cross_over_point:
+            if intersection_id >= cross_over_point:
                 child_1.schedule[intersection_id] = parent_2.schedule[intersection_id]
             else:
                 child_2.schedule[intersection_id] = parent_2.schedule[intersection_id]
@@ -345,76 +544,75 @@ def cross_over(
     return [child_1, child_2]
 
 
-def mutate_random_intersection(city: City, schedule: Schedule):
+def mutate_random_intersection(city: City, schedule: Schedule, rng: np.random.Generator):
     """
-    Changes the green light cycle for a random intersection on a given schedule for a given city.
+    Changes the green light cycle for a random intersection some car waits on, on a given schedule for a given city.
 
     Parameters:
         city: a city object
         schedule: green light schedule for the city
+        rng: NumPy random generator
 
     Return:
         schedule with updated green light cycle
     """
-    intersections = list(enumerate(city.intersections.items()))
-    _, (intersection_id, intersection) = intersections[
-        randint(0, len(intersections) - 1)
-    ]
+    intersection_id = int(rng.choice(city.compiled.used_intersections))
+    streets = city.compiled.used_incoming(intersection_id).tolist()
 
     intersection_schedule = distributed_random_sum_permutation(
-        len(intersection.incoming_streets), city.duration
+        len(streets), city.duration, rng
     )
-    schedule.schedule[intersection_id] = []
-
-    for index, street in enumerate(intersection.incoming_streets):
-        schedule.schedule[intersection_id] += [
-            street.name for _ in range(intersection_schedule[index])
-        ]
+    schedule.schedule[intersection_id] = GreenCycle(
+        streets, intersection_schedule)
     return schedule
 
 
-def mutate_single_street(city: City, schedule: Schedule):
+def mutate_single_street(city: City, schedule: Schedule, rng: np.random.Generator):
     """
-    Changes the green light time for a single random street on a random intersection on a given schedule for a given city.
+    Changes the green light time for a single random street on a random intersection some car waits on,
+    on a given schedule for a given city.
 
     Parameters:
         city: a city object
         schedule: green light schedule for the city
+        rng: NumPy random generator
 
     Return:
         schedule with updated green light cycle
     """
-    intersections = list(city.intersections.keys())
-    intersection_id = intersections[randint(0, len(intersections) - 1)]
-    current_intersection_schedule = schedule.schedule[intersection_id]
+    intersection_id = int(rng.choice(city.compiled.used_intersections))
+    current_intersection_schedule = schedule.schedule.get(
+        intersection_id, GreenCycle())
 
-    current_intersection_schedule_dict = {
-        street_name: current_intersection_schedule.count(street_name)
-        for street_name in set(current_intersection_schedule)
-    }
+    current_intersection_schedule_dict = dict(
+        current_intersection_schedule.pairs())
 
     streets = list(current_intersection_schedule_dict.items())
     if len(streets) > 1:
-        street, street_time = streets[randint(0, len(streets) - 1)]
-    else:
+        street, street_time = streets[rng.integers(len(streets))]
+    elif len(streets) == 1:
         street, street_time = streets[0]
+    else:
+        streets = city.compiled.used_incoming(intersection_id)
+        street, street_time = int(rng.choice(streets)), 0
 
-    remaining_time = city.duration - (
-        sum(list(current_intersection_schedule_dict.values())) - street_time
-    )
+    remaining_time = max(0, city.duration - (
+        len(current_intersection_schedule) - street_time
+    ))
 
-    current_intersection_schedule_dict[street] = randint(0, remaining_time)
+    current_intersection_schedule_dict[street] = int(rng.integers(remaining_time, endpoint=True))
 
-    schedule.schedule[intersection_id] = [
-        street_name
-        for street_name, street_time in current_intersection_schedule_dict.items()
-        for _ in range(street_time)
-    ]
+    schedule.schedule[intersection_id] = GreenCycle(
+        current_intersection_schedule_dict.keys(),
+        current_intersection_schedule_dict.values(),
+    )
 
     return schedule
 
 
 def print_genetic_results_graph_from_file():
+    from matplotlib import pyplot as plt
+
     with open(PATH) as f:
         metrics = [
             list(map(lambda i: i.strip("\n"), x.split(","))) for x in f.readlines()[1:]
@@ -1,6 +1,4 @@
-from copy import deepcopy
 import numpy as np
-from matplotlib import pyplot as plt
 from algorithm.common import (
     generate_random_solution,
     mutate_intersection,
@@ -8,7 +6,9 @@ from algorithm.common import (
     distributed_random_sum_permutation,
 )
 from model.city import City
-from model.schedule import Schedule
+from algorithm.parallel import NeighbourhoodEvaluator
+from algorithm.stopping import StoppingCriteria
+from model.checkpoint import Checkpoint, Checkpointer, rng_state, restore_rng
 
 PATH = "traffic_signaling/asset/out/ils_result.csv"
 
@@ -19,20 +19,31 @@ def iterated_local_search(
     number_of_mutations_per_iteration: int,
     perturbation_factor: int = 0.5,
     file_output: bool = True,
-    initial_schedule=None
+    initial_schedule=None,
+    workers: int = 1,
+    rng=None,
+    stopping_criteria: StoppingCriteria = None,
+    checkpointer: Checkpointer = None,
+    checkpoint: Checkpoint = None
 ):
     """
     For a given initial schedule, performs a iterated local search.
-    Perturbations are implemented using the mutate_schedule operator with given factor and decreasing by time.
-    The neighbourhood is given by the mutate_intersection operator.
+    Perturbations are implemented using the mutate_schedule operator with given factor and decreasing as the budget
+    is spent. The neighbourhood is given by the mutate_intersection operator, and scored incrementally from the
+    perturbation. On a keyboard interrupt, the search stops and returns the best solution found so far.
 
     Parameters:
         city: problem city
-        number_of_iterations: number of iterations until stopping
+        number_of_iterations: number of iterations until stopping, None for no iteration limit
         number_of_mutations_per_iteration: neighbourhood size to look for
         perturbation_factor: multiplier to the probability of a intersection mutating in a perturbation
         file_output: whether to write the results to a file
         initial_schedule: the algorithm initial schedule (random if None)
+        workers: number of processes scoring the neighbourhood, the result does not depend on it
+        rng: NumPy random generator, or seed to create one (unseeded if None)
+        stopping_criteria: other stopping criteria of the search, which keep the best solution found so far
+        checkpointer: writer of periodic checkpoints of the search, between iterations
+        checkpoint: checkpoint of a previous search to resume, instead of starting from initial_schedule
 
     Return:
         Final best solution found
@@ -43,32 +54,56 @@ def iterated_local_search(
         file.write("ITERATION,PERTURBATION_STRENGTH,TENTATIVE_SCORE,BEST_SCORE\n")
         file.flush()
 
-    first_solution = generate_random_solution(
-        city, distributed_random_sum_permutation) if initial_schedule is None else initial_schedule
-    current_max = first_solution, first_solution.evaluate(city)
-    for i in range(number_of_iterations):
-        perturbation_strength = perturbation_factor * \
-            (number_of_iterations - i) / number_of_iterations
-        perturbation = mutate_schedule(
-            city,
-            deepcopy(current_max[0]),
-            perturbation_strength
-        )
-        current = perturbation, perturbation.evaluate(city)
-        mutations = []
-        for _ in range(number_of_mutations_per_iteration):
-            candidate, _ = mutate_intersection(city, deepcopy(current[0]))
-            mutations.append((candidate, candidate.evaluate(city)))
-        best_candidate = max(mutations, key=lambda x: x[1])
-        if best_candidate[1] > current_max[1]:
-            current_max = best_candidate
-        print(
-            f"On iteration {i}, iterated local search found a score of {best_candidate[1]}. Best score yet is {current_max[1]}")
-        if file_output:
-            file.write(
-                f"{i},{perturbation_strength},{best_candidate[1]},{current_max[1]}\n")
-            file.flush()
-    return current_max[0]
+    rng = np.random.default_rng(rng)
+    stopping_criteria = StoppingCriteria() if stopping_criteria is None else stopping_criteria
+    stopping_criteria.start(number_of_iterations)
+    if checkpoint is None:
+        first_solution = generate_random_solution(
+            city, distributed_random_sum_permutation, rng) if initial_schedule is None else initial_schedule
+        stopping_criteria.improve(first_solution, first_solution.evaluate(city))
+    else:
+        rng = restore_rng(checkpoint.state["rng"])
+        stopping_criteria.restore(checkpoint.state["stopping_criteria"], checkpoint.schedules["best"][0])
+    evaluator = NeighbourhoodEvaluator(city, workers)
+    try:
+        while not stopping_criteria.should_stop():
+            i = stopping_criteria.iterations
+            perturbation_strength = perturbation_factor * \
+                (1 - stopping_criteria.progress())
+            perturbation = mutate_schedule(
+                city,
+                stopping_criteria.best_schedule.copy(),
+                perturbation_strength,
+                rng
+            )
+            evaluator.set_base(perturbation)
+            candidates = [mutate_intersection(city, perturbation.copy(), rng)[0]
+                          for _ in range(number_of_mutations_per_iteration)]
+            mutations = list(zip(candidates, evaluator.evaluate(candidates)))
+            best_candidate = max(mutations, key=lambda x: x[1])
+            stopping_criteria.update(*best_candidate, len(candidates) + 1)
+            print(
+                f"On iteration {i}, iterated local search found a score of {best_candidate[1]}. "
+                f"Best score yet is {stopping_criteria.best_score}")
+            if file_output:
+                file.write(
+                    f"{i},{perturbation_strength},{best_candidate[1]},{stopping_criteria.best_score}\n")
+                file.flush()
+            if checkpointer is not None and checkpointer.due():
+                checkpointer.write(Checkpoint("iterated_local_search", {
+                    "parameters": {
+                        "number_of_iterations": number_of_iterations,
+                        "number_of_mutations_per_iteration": number_of_mutations_per_iteration,
+                        "perturbation_factor": perturbation_factor,
+                    },
+                    "rng": rng_state(rng),
+                    "stopping_criteria": stopping_criteria.state(),
+                }, {"best": [stopping_criteria.best_schedule]}))
+    except KeyboardInterrupt:
+        print(f"Iterated local search interrupted after {stopping_criteria}")
+    finally:
+        evaluator.close()
+    return stopping_criteria.best_schedule
 
 
 def print_ils_results_graph_from_file():
@@ -76,6 +111,8 @@ def print_ils_results_graph_from_file():
     Show matplot graph in the screen containing the iterated local search information
     lastly written in a file in the default location.
     """
+    from matplotlib import pyplot as plt
+
     with open(PATH) as f:
         metrics = [list(map(lambda i: i.strip('\n'), x.split(',')))
                    for x in f.readlines()[1:]]
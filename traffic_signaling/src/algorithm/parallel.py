@@ -0,0 +1,182 @@
+from multiprocessing import Process, Pipe
+from signal import signal, SIGINT, SIG_IGN
+from model.city import City
+from model.schedule import Schedule
+from model.incremental_evaluator import IncrementalEvaluator
+
+
+class NeighbourhoodEvaluator:
+    def __init__(self, city: City, workers: int = 1) -> None:
+        """
+        Constructor of NeighbourhoodEvaluator class.
+        Scores schedules derived from a base schedule, through an incremental evaluator.
+        With more than one worker, the candidates are split among persistent worker processes, each one
+        holding the city and an incremental evaluator of the base schedule. Only the green cycles that
+        differ from what a worker already holds are sent to it.
+
+        Properties:
+            city (City): city for which the schedules are made
+            workers (int): number of worker processes, 1 to evaluate in the calling process
+            base (Schedule): current base schedule
+            score (int): score of the base schedule
+            evaluator (IncrementalEvaluator): in-process evaluator, when there is a single worker
+            connections (list): pipe to each worker process
+            processes (list): worker processes
+        """
+        self.city = city
+        self.workers = max(1, workers)
+        self.base = None
+        self.score = -1
+        self.evaluator = None
+        self.connections, self.processes = [], []
+        if self.workers == 1:
+            return
+        for _ in range(self.workers):
+            connection, worker_connection = Pipe()
+            process = Process(target=neighbourhood_worker,
+                              args=(city, worker_connection), daemon=True)
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def set_base(self, schedule: Schedule) -> int:
+        """
+        Set the schedule candidates are derived from.
+
+        Parameters:
+            schedule: the new base schedule
+
+        Return:
+            base schedule score
+        """
+        if self.workers == 1:
+            if self.evaluator is None:
+                self.evaluator = IncrementalEvaluator(self.city, schedule)
+            else:
+                self.evaluator.rebase(schedule)
+            self.score = self.evaluator.score
+        else:
+            changes = changed_green_cycles(
+                Schedule() if self.base is None else self.base, schedule)
+            for connection in self.connections:
+                connection.send(("base", changes))
+            self.score = [connection.recv()
+                          for connection in self.connections][0]
+        self.base = schedule
+        schedule.last_score = self.score
+        return self.score
+
+    def evaluate(self, candidates: list) -> list:
+        """
+        Score schedules derived from the base one. Results are in the order of the candidates,
+        whatever the number of workers.
+
+        Parameters:
+            candidates: schedules to evaluate
+
+        Return:
+            list of scores
+        """
+        if self.workers == 1:
+            return [self.evaluator.evaluate(candidate) for candidate in candidates]
+
+        changes = [changed_green_cycles(self.base, candidate)
+                   for candidate in candidates]
+        chunk_size = -(-len(changes) // self.workers)
+        chunks = [changes[i:i + chunk_size]
+                  for i in range(0, len(changes), chunk_size)]
+        for connection, chunk in zip(self.connections, chunks):
+            connection.send(("evaluate", chunk))
+        scores = [score for connection, _ in zip(self.connections, chunks)
+                  for score in connection.recv()]
+        for candidate, score in zip(candidates, scores):
+            candidate.last_score = score
+        return scores
+
+    def close(self) -> None:
+        '''Stop the worker processes'''
+        for connection in self.connections:
+            connection.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.connections, self.processes = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def changed_green_cycles(base: Schedule, schedule: Schedule) -> dict:
+    """
+    Green cycles of a schedule that differ from the ones of a base schedule.
+
+    Parameters:
+        base: the base schedule
+        schedule: schedule to compare with the base one
+
+    Return:
+        dict of intersection id to green cycle, None for intersections missing from the schedule
+    """
+    changes = {
+        intersection_id: green_cycle
+        for intersection_id, green_cycle in schedule.schedule.items()
+        if base.schedule.get(intersection_id) is not green_cycle
+        and base.schedule.get(intersection_id) != green_cycle
+    }
+    changes.update((intersection_id, None) for intersection_id in base.schedule
+                   if intersection_id not in schedule.schedule)
+    return changes
+
+
+def apply_green_cycles(schedule: Schedule, changes: dict) -> Schedule:
+    """
+    Schedule sharing the green cycles of a given one, except for the given changes.
+
+    Parameters:
+        schedule: the schedule to change
+        changes: dict of intersection id to green cycle, as given by changed_green_cycles
+
+    Return:
+        changed schedule
+    """
+    schedule = schedule.copy()
+    for intersection_id, green_cycle in changes.items():
+        if green_cycle is None:
+            schedule.schedule.pop(intersection_id, None)
+        else:
+            schedule.schedule[intersection_id] = green_cycle
+    return schedule
+
+
+def neighbourhood_worker(city: City, connection) -> None:
+    """
+    Entry point of a NeighbourhoodEvaluator worker process.
+    Keeps an incremental evaluator of the base schedule, updated with the received green cycle changes.
+    Keyboard interrupts are left to the parent process, which closes the workers.
+
+    Parameters:
+        city: city for which the schedules are made
+        connection: pipe to the parent process
+    """
+    signal(SIGINT, SIG_IGN)
+    evaluator = None
+    while True:
+        command, changes = connection.recv()
+        if command == "close":
+            break
+        if command == "base":
+            base = apply_green_cycles(
+                Schedule() if evaluator is None else evaluator.schedule, changes)
+            if evaluator is None:
+                evaluator = IncrementalEvaluator(city, base)
+            else:
+                evaluator.rebase(base)
+            connection.send(evaluator.score)
+        else:
+            connection.send([
+                evaluator.evaluate(apply_green_cycles(evaluator.schedule, candidate_changes))
+                for candidate_changes in changes
+            ])
+    connection.close()
@@ -0,0 +1,55 @@
+from model.city import City
+from model.checkpoint import Checkpoint, Checkpointer
+from algorithm.stopping import StoppingCriteria
+from algorithm.local_search import iterated_local_search
+from algorithm.taboo import taboo_search
+from algorithm.annealing import simulated_annealing
+from algorithm.genetics import genetic_algorithm
+
+ALGORITHMS = {
+    "iterated_local_search": iterated_local_search,
+    "taboo_search": taboo_search,
+    "simulated_annealing": simulated_annealing,
+    "genetic_algorithm": genetic_algorithm,
+}
+CRITERIA = ["max_iterations", "max_time", "max_evaluations", "target_score", "stagnation"]
+
+
+def resume(city: City, checkpoint_file: str, stopping_criteria: StoppingCriteria = None,
+           checkpointer: Checkpointer = None, file_output: bool = True, **arguments):
+    """
+    Resume an optimizer run from its checkpoint, with the parameters it was started with.
+    The resumed run goes on counting its iterations, evaluations and elapsed time from the checkpointed ones.
+
+    Parameters:
+        city: city of the checkpointed run
+        checkpoint_file: path of the checkpoint
+        stopping_criteria: stopping criteria of the resumed run (the ones of the checkpointed run if None)
+        checkpointer: writer of periodic checkpoints of the resumed run
+        file_output: whether to write the results to a file
+        arguments: other arguments of the optimizer, like the number of workers, or parameters replacing the
+                   checkpointed ones, like a new number of iterations. Simulated annealing runs need the
+                   iteration_mutation_pairs they were started with, as operators are not checkpointed
+
+    Return:
+        best schedule found
+    """
+    checkpoint = Checkpoint.read(checkpoint_file)
+    if checkpoint.algorithm not in ALGORITHMS:
+        raise ValueError(f"{checkpoint_file} holds a checkpoint of an unknown algorithm: {checkpoint.algorithm}")
+    if checkpoint.algorithm == "simulated_annealing":
+        pairs = arguments.get("iteration_mutation_pairs")
+        if pairs is None or [iterations for iterations, _ in pairs] != checkpoint.state["pair_iterations"]:
+            raise ValueError("Simulated annealing runs must be resumed with the same iteration_mutation_pairs")
+    if stopping_criteria is None:
+        stopping_criteria = StoppingCriteria(**{
+            criterion: checkpoint.state["stopping_criteria"][criterion] for criterion in CRITERIA})
+
+    return ALGORITHMS[checkpoint.algorithm](
+        city,
+        **{**checkpoint.state["parameters"], **arguments},
+        file_output=file_output,
+        stopping_criteria=stopping_criteria,
+        checkpointer=checkpointer,
+        checkpoint=checkpoint,
+    )
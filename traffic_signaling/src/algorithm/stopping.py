@@ -0,0 +1,157 @@
+from time import perf_counter
+from model.schedule import Schedule
+
+
+class StoppingCriteria:
+    def __init__(self, max_iterations: int = None, max_time: float = None, max_evaluations: int = None,
+                 target_score: int = None, stagnation: int = None, clock=perf_counter) -> None:
+        """
+        Constructor of StoppingCriteria class.
+        Decides when an optimizer stops, and keeps the best schedule it found so far, so the caller can read it at
+        any moment, even while the optimizer runs or after it was interrupted. Every criterion is optional: the
+        optimizer stops as soon as one of the given ones is met, or when stop is called.
+        Optimizers call start once, then update once per iteration (or generation).
+
+        Properties:
+            max_iterations (int): number of iterations after which the optimizer stops
+            max_time (float): wall clock budget, in seconds
+            max_evaluations (int): number of evaluated schedules after which the optimizer stops
+            target_score (int): score from which the optimizer stops
+            stagnation (int): number of iterations without improving the best score after which the optimizer stops
+            clock (function): clock the time is read from, in seconds, time.perf_counter by default
+            start_time (float): instant in which the optimizer started
+            iterations (int): number of iterations done
+            evaluations (int): number of schedules evaluated
+            best_schedule (Schedule): best schedule found so far
+            best_score (int): score of the best schedule, -1 before the first update
+            last_improvement (int): iteration in which the best score was last improved
+            stopped (bool): whether stop was called
+        """
+        self.max_iterations = max_iterations
+        self.max_time = max_time
+        self.max_evaluations = max_evaluations
+        self.target_score = target_score
+        self.stagnation = stagnation
+        self.clock = clock
+        self.start()
+
+    def start(self, max_iterations: int = None) -> None:
+        '''Reset the counters and the best schedule, and start the clock. A given max_iterations replaces the current one'''
+        if max_iterations is not None:
+            self.max_iterations = max_iterations
+        self.start_time = self.clock()
+        self.iterations = 0
+        self.evaluations = 0
+        self.best_schedule = None
+        self.best_score = -1
+        self.last_improvement = 0
+        self.stopped = False
+
+    def elapsed_time(self) -> float:
+        '''Seconds since the optimizer started'''
+        return self.clock() - self.start_time
+
+    def update(self, schedule: Schedule, score: int, evaluations: int = 1, iterations: int = 1) -> None:
+        """
+        Record the iterations done by the optimizer, with the number of schedules they evaluated, and the best
+        schedule they found.
+
+        Parameters:
+            schedule: best schedule of the iterations, kept if it beats the best one so far
+            score: score of the schedule
+            evaluations: number of schedules evaluated in the iterations
+            iterations: number of iterations done
+        """
+        self.iterations += iterations
+        self.evaluations += evaluations
+        self.improve(schedule, score)
+
+    def improve(self, schedule: Schedule, score: int) -> bool:
+        '''Keep a schedule if it beats the best one so far, without counting an iteration. Return whether it was kept'''
+        if schedule is None or score <= self.best_score:
+            return False
+        self.best_schedule, self.best_score = schedule, score
+        self.last_improvement = self.iterations
+        return True
+
+    def stop(self) -> None:
+        '''Make the optimizer stop on its next check. Can be called from another thread'''
+        self.stopped = True
+
+    def should_stop(self) -> bool:
+        '''Whether any of the stopping criteria is met'''
+        return (
+            self.stopped
+            or (self.max_iterations is not None and self.iterations >= self.max_iterations)
+            or (self.max_time is not None and self.elapsed_time() >= self.max_time)
+            or (self.max_evaluations is not None and self.evaluations >= self.max_evaluations)
+            or (self.target_score is not None and self.best_score >= self.target_score)
+            or (self.stagnation is not None and self.iterations - self.last_improvement >= self.stagnation)
+        )
+
+    def progress(self) -> float:
+        """
+        Fraction of the budget already spent, between 0 and 1, used by optimizers whose behaviour changes over
+        the run, like the perturbation strength of the iterated local search. It is the largest fraction over the
+        iteration, time and evaluation budgets, and 0 if none was given.
+        """
+        fractions = [0]
+        if self.max_iterations:
+            fractions.append(self.iterations / self.max_iterations)
+        if self.max_time:
+            fractions.append(self.elapsed_time() / self.max_time)
+        if self.max_evaluations:
+            fractions.append(self.evaluations / self.max_evaluations)
+        return min(1, max(fractions))
+
+    def remaining_iterations(self) -> int:
+        """
+        Estimate of the number of iterations left, from the iteration budget and from the rate at which time and
+        evaluations were spent so far.
+
+        Return:
+            smallest estimate over the given budgets, None if there is no budget to estimate it from
+        """
+        estimates = []
+        if self.max_iterations is not None:
+            estimates.append(self.max_iterations - self.iterations)
+        if self.iterations > 0:
+            if self.max_time is not None:
+                elapsed_time = self.elapsed_time()
+                estimates.append(int((self.max_time - elapsed_time) * self.iterations / max(elapsed_time, 1e-9)))
+            if self.max_evaluations is not None and self.evaluations > 0:
+                estimates.append((self.max_evaluations - self.evaluations) * self.iterations // self.evaluations)
+        return max(0, min(estimates)) if estimates else None
+
+    def state(self) -> dict:
+        '''JSON serializable state of the criteria, without the best schedule, to checkpoint a run'''
+        return {
+            "max_iterations": self.max_iterations,
+            "max_time": self.max_time,
+            "max_evaluations": self.max_evaluations,
+            "target_score": self.target_score,
+            "stagnation": self.stagnation,
+            "elapsed_time": self.elapsed_time(),
+            "iterations": self.iterations,
+            "evaluations": self.evaluations,
+            "last_improvement": self.last_improvement,
+        }
+
+    def restore(self, state: dict, best_schedule: Schedule) -> None:
+        """
+        Restore the counters of a checkpointed run, and its best schedule. The criteria themselves are kept, so a
+        run can be resumed with a new budget. Elapsed time keeps counting from the checkpointed one.
+
+        Parameters:
+            state: state given by the state method
+            best_schedule: best schedule of the run, with its score
+        """
+        self.start_time = self.clock() - state["elapsed_time"]
+        self.iterations = state["iterations"]
+        self.evaluations = state["evaluations"]
+        self.best_schedule, self.best_score = best_schedule, best_schedule.last_score
+        self.last_improvement = state["last_improvement"]
+
+    def __str__(self) -> str:
+        return f"{self.iterations} iterations, {self.evaluations} evaluations in {self.elapsed_time():.1f}s, " \
+               f"best score {self.best_score}"
@@ -1,27 +1,37 @@
-from random import randint
 from algorithm.common import distributed_random_sum_permutation, generate_random_solution, mutate_intersection
 from model.city import City
+from algorithm.parallel import NeighbourhoodEvaluator
+from algorithm.stopping import StoppingCriteria
+from model.checkpoint import Checkpoint, Checkpointer, rng_state, restore_rng
 import numpy as np
-from matplotlib import pyplot as plt
-from copy import deepcopy
 
 PATH = "traffic_signaling/asset/out/taboo_result.csv"
+UNBOUNDED_TENURE = 20
 
 
 def taboo_search(city: City, number_of_iterations: int, number_of_mutations_per_iteration: int,
-                 max_worse_jump_percentage: int = 0.1, file_output: bool = True, initial_schedule=None):
+                 max_worse_jump_percentage: int = 0.1, file_output: bool = True, initial_schedule=None,
+                 workers: int = 1, rng=None, stopping_criteria: StoppingCriteria = None,
+                 checkpointer: Checkpointer = None, checkpoint: Checkpoint = None):
     """
     For a given initial schedule, performs a taboo search.
     The neighbourhood is given by the mutate_intersection operator, with the mutated intersection being the taboo criterion.
     Resets to the best found global solution if current solution is given percentage worse than the aforementioned.
+    Taboo tenures are drawn up to half the remaining iterations, or half UNBOUNDED_TENURE if they cannot be estimated.
+    On a keyboard interrupt, the search stops and returns the best solution found so far.
 
     Parameters:
         city: problem city
-        number_of_iterations: number of iterations until stopping
+        number_of_iterations: number of iterations until stopping, None for no iteration limit
         number_of_mutations_per_iteration: neighbourhood size to look for
         max_worse_jump_percentage: max distance to global maxima before resetting to it
         file_output: whether to write the results to a file
         initial_schedule: the algorithm initial schedule (random if None)
+        workers: number of processes scoring the neighbourhood, the result does not depend on it
+        rng: NumPy random generator, or seed to create one (unseeded if None)
+        stopping_criteria: other stopping criteria of the search, which keep the best solution found so far
+        checkpointer: writer of periodic checkpoints of the search, between iterations
+        checkpoint: checkpoint of a previous search to resume, instead of starting from initial_schedule
 
     Return:
         Final best solution found
@@ -32,46 +42,81 @@ def taboo_search(city: City, number_of_iterations: int, number_of_mutations_per_
         file.write("ITERATION,TENTATIVE_SCORE,BEST_SCORE\n")
         file.flush()
 
-    first_solution = generate_random_solution(
-        city, distributed_random_sum_permutation) if initial_schedule is None else initial_schedule
-    current = first_solution, first_solution.evaluate(city)
-    avg_score = current[1]
-    current_max = current
-    taboo_memory = {intersection_no: 0 for intersection_no in range(
-        city.no_intersections)}
+    rng = np.random.default_rng(rng)
+    stopping_criteria = StoppingCriteria() if stopping_criteria is None else stopping_criteria
+    stopping_criteria.start(number_of_iterations)
+    evaluator = NeighbourhoodEvaluator(city, workers)
+    if checkpoint is None:
+        first_solution = generate_random_solution(
+            city, distributed_random_sum_permutation, rng) if initial_schedule is None else initial_schedule
+        current = first_solution, evaluator.set_base(first_solution)
+        avg_score = current[1]
+        stopping_criteria.improve(*current)
+        taboo_memory = {intersection_no: 0 for intersection_no in range(
+            city.no_intersections)}
+    else:
+        rng = restore_rng(checkpoint.state["rng"])
+        stopping_criteria.restore(checkpoint.state["stopping_criteria"], checkpoint.schedules["best"][0])
+        current = checkpoint.schedules["current"][0], evaluator.set_base(checkpoint.schedules["current"][0])
+        avg_score = checkpoint.state["avg_score"]
+        taboo_memory = dict(enumerate(checkpoint.arrays["taboo_memory"].tolist()))
     improvement_to_max = 0
-    for i in range(number_of_iterations):
-        mutations = []
-        mutated, tries = 0, 0
-        while mutated < number_of_mutations_per_iteration:
-            candidate, mutated_intersection = mutate_intersection(
-                city, deepcopy(current[0]))
-            if tries > 100 or taboo_memory[mutated_intersection.id] <= 0:
-                mutations.append(
-                    (candidate, mutated_intersection, candidate.evaluate(city)))
-                mutated += 1
-                tries = 0
-            tries += 1
-        taboo_memory = {intersection_id: max(
-            0, taboo_memory[intersection_id]-1) for intersection_id in taboo_memory}
-        best_candidate = max(mutations, key=lambda x: x[2])
-        current = (best_candidate[0], best_candidate[2])
-        taboo_memory[best_candidate[1].id] = randint(
-            0, (number_of_iterations - i) // 2)
-        improvement_to_max = current[1] - current_max[1]
-        if improvement_to_max > 0:
-            current_max = tuple(current)
+    try:
+        while not stopping_criteria.should_stop():
+            i = stopping_criteria.iterations
+            neighbours = []
+            mutated, tries = 0, 0
+            while mutated < number_of_mutations_per_iteration:
+                candidate, mutated_intersection = mutate_intersection(
+                    city, current[0].copy(), rng)
+                if tries > 100 or taboo_memory[mutated_intersection] <= 0:
+                    neighbours.append((candidate, mutated_intersection))
+                    mutated += 1
+                    tries = 0
+                tries += 1
+            scores = evaluator.evaluate(
+                [candidate for candidate, _ in neighbours])
+            mutations = [(candidate, mutated_intersection, score)
+                         for (candidate, mutated_intersection), score in zip(neighbours, scores)]
+            taboo_memory = {intersection_id: max(
+                0, taboo_memory[intersection_id]-1) for intersection_id in taboo_memory}
+            best_candidate = max(mutations, key=lambda x: x[2])
+            current = (best_candidate[0], best_candidate[2])
+            evaluator.set_base(current[0])
+            remaining_iterations = stopping_criteria.remaining_iterations()
+            taboo_memory[best_candidate[1]] = int(rng.integers(
+                (UNBOUNDED_TENURE if remaining_iterations is None else remaining_iterations) // 2, endpoint=True))
+            improvement_to_max = current[1] - stopping_criteria.best_score
+            stopping_criteria.update(*current, len(neighbours) + 1)
 
-        print(
-            f"On iteration {i}, taboo search found a score of {current[1]}. Best score yet is {current_max[1]}")
-        if file_output:
-            file.write(f"{i},{current[1]},{current_max[1]}\n")
-            file.flush()
+            print(
+                f"On iteration {i}, taboo search found a score of {current[1]}. "
+                f"Best score yet is {stopping_criteria.best_score}")
+            if file_output:
+                file.write(f"{i},{current[1]},{stopping_criteria.best_score}\n")
+                file.flush()
 
-        if -improvement_to_max > avg_score//(1/max_worse_jump_percentage):
-            current = current_max
+            if -improvement_to_max > avg_score//(1/max_worse_jump_percentage):
+                current = stopping_criteria.best_schedule, stopping_criteria.best_score
+                evaluator.set_base(current[0])
 
-    return current_max[0]
+            if checkpointer is not None and checkpointer.due():
+                checkpointer.write(Checkpoint("taboo_search", {
+                    "parameters": {
+                        "number_of_iterations": number_of_iterations,
+                        "number_of_mutations_per_iteration": number_of_mutations_per_iteration,
+                        "max_worse_jump_percentage": max_worse_jump_percentage,
+                    },
+                    "avg_score": avg_score,
+                    "rng": rng_state(rng),
+                    "stopping_criteria": stopping_criteria.state(),
+                }, {"current": [current[0]], "best": [stopping_criteria.best_schedule]},
+                    {"taboo_memory": np.fromiter(taboo_memory.values(), dtype=np.int32, count=len(taboo_memory))}))
+    except KeyboardInterrupt:
+        print(f"Taboo search interrupted after {stopping_criteria}")
+    finally:
+        evaluator.close()
+    return stopping_criteria.best_schedule
 
 
 def print_taboo_results_graph_from_file():
@@ -79,6 +124,8 @@ def print_taboo_results_graph_from_file():
     Show matplot graph in the screen containing the taboo search information
     lastly written in a file in the default location.
     """
+    from matplotlib import pyplot as plt
+
     with open(PATH) as f:
         metrics = [list(map(lambda i: i.strip('\n'), x.split(',')))
                    for x in f.readlines()[1:]]
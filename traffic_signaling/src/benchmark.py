@@ -0,0 +1,224 @@
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from copy import deepcopy
+from datetime import datetime
+from io import StringIO
+from time import perf_counter
+import json
+import platform
+import numpy as np
+from model.city import City
+from model.city_cache import load_city
+from model.schedule import Schedule
+from algorithm.common import (
+    distributed_random_sum_permutation,
+    distributed_random_sum_permutations,
+    mutate_intersection,
+    mutate_single_street,
+    mutate_schedule,
+)
+from algorithm import genetics
+from algorithm.genetics import genetic_algorithm
+from algorithm.local_search import iterated_local_search
+from algorithm.taboo import taboo_search
+from algorithm.annealing import simulated_annealing, default_iteration_mutation_pairs
+
+DATA_PATH = "traffic_signaling/asset/data"
+SOLUTION_PATH = "traffic_signaling/asset/out"
+RESULTS_PATH = "traffic_signaling/asset/out/benchmark.json"
+DATASETS = ["a", "b", "c", "d", "e", "f"]
+REPETITIONS = 5
+MUTATIONS = 100
+SEED = 0
+
+
+def best_time(function, repetitions: int = REPETITIONS) -> float:
+    """
+    Run a function several times and measure the fastest run.
+
+    Parameters:
+        function: function without arguments to measure
+        repetitions: number of runs
+
+    Return:
+        fastest run time, in seconds
+    """
+    best = float("inf")
+    for _ in range(repetitions):
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def result(benchmark: str, case: str, dataset: str, seconds: float, **extra) -> dict:
+    '''Benchmark result record, as written to the JSON output'''
+    return {"benchmark": benchmark, "case": case, "dataset": dataset, "seconds": seconds, **extra}
+
+
+def print_results(results: list) -> None:
+    '''Print benchmark results as a table, times in milliseconds'''
+    for record in results:
+        extra = "".join(f" - {key} {value}" for key, value in record.items()
+                        if key not in ("benchmark", "case", "dataset", "seconds"))
+        print(f"{record['dataset']} - {record['benchmark']} - {record['case']} - {record['seconds'] * 1000:.2f} ms{extra}")
+
+
+def benchmark_parser(datasets: list = DATASETS, repetitions: int = REPETITIONS) -> list:
+    '''Measure the time needed to load each dataset: through a buffered read, a memory map and the compiled city cache'''
+    results = []
+    for dataset in datasets:
+        path = f"{DATA_PATH}/{dataset}.txt"
+        load_city(path)
+        results += [
+            result("parser", "buffered", dataset, best_time(lambda: City.from_input(path), repetitions)),
+            result("parser", "memory mapped", dataset,
+                   best_time(lambda: City.from_input(path, memory_map=True), repetitions)),
+            result("parser", "cached", dataset, best_time(lambda: load_city(path), repetitions)),
+        ]
+    return results
+
+
+def benchmark_permutation(datasets: list = DATASETS, repetitions: int = REPETITIONS) -> list:
+    '''Measure the time needed to draw random green times for the used intersections of each dataset, one by one and batched'''
+    results = []
+    rng = np.random.default_rng(SEED)
+    for dataset in datasets:
+        city = load_city(f"{DATA_PATH}/{dataset}.txt")
+        lengths = np.diff(city.compiled.used_offsets)[city.compiled.used_intersections]
+        results += [
+            result("permutation", "per intersection", dataset,
+                   best_time(lambda: [distributed_random_sum_permutation(length, city.duration, rng)
+                                      for length in lengths.tolist()], repetitions)),
+            result("permutation", "batch", dataset,
+                   best_time(lambda: distributed_random_sum_permutations(lengths, city.duration, rng), repetitions)),
+        ]
+    return results
+
+
+def benchmark_evaluation(datasets: list = DATASETS, repetitions: int = REPETITIONS) -> list:
+    '''Measure the time needed to score the first solution of each dataset, with an empty fitness cache'''
+    results = []
+    for dataset in datasets:
+        city = load_city(f"{DATA_PATH}/{dataset}.txt")
+        schedule = Schedule.from_input(f"{SOLUTION_PATH}/{dataset}1.txt", city)
+
+        def evaluate():
+            city.fitness_cache.clear()
+            return schedule.evaluate(city)
+        results.append(result("evaluation", "simulate", dataset, best_time(evaluate, repetitions), score=evaluate()))
+    return results
+
+
+def benchmark_mutation(datasets: list = DATASETS, repetitions: int = REPETITIONS) -> list:
+    '''Measure the mean time of a call to each mutation operator, and of a copy, on the first solution of each dataset'''
+    operators = [
+        ("mutate_intersection", lambda city, schedule, rng: mutate_intersection(city, schedule, rng)),
+        ("mutate_single_street", lambda city, schedule, rng: mutate_single_street(city, schedule, rng)),
+        ("mutate_schedule", lambda city, schedule, rng: mutate_schedule(city, schedule, 0.1, rng)),
+        ("genetics.mutate_random_intersection", genetics.mutate_random_intersection),
+        ("genetics.mutate_single_street", genetics.mutate_single_street),
+    ]
+    results = []
+    for dataset in datasets:
+        city = load_city(f"{DATA_PATH}/{dataset}.txt")
+        solution = Schedule.from_input(f"{SOLUTION_PATH}/{dataset}1.txt", city)
+        for name, operator in operators:
+            rng, schedule = np.random.default_rng(SEED), solution.copy()
+
+            def mutate():
+                for _ in range(MUTATIONS):
+                    operator(city, schedule, rng)
+            results.append(result("mutation", name, dataset, best_time(mutate, repetitions) / MUTATIONS))
+        results += [
+            result("copy", "copy", dataset, best_time(lambda: solution.copy(), repetitions)),
+            result("copy", "deepcopy", dataset, best_time(lambda: deepcopy(solution), repetitions)),
+        ]
+    return results
+
+
+def benchmark_algorithms(datasets: list = DATASETS, iterations: int = 10) -> list:
+    """
+    Measure fixed seed runs of each algorithm, from a random schedule, with a fixed number of iterations.
+    Each run is made once, and its final score is recorded along with its time: for a given seed, a change of
+    score between versions is a change of behaviour.
+
+    Parameters:
+        datasets: datasets on which to run the algorithms
+        iterations: number of iterations, or generations, of each run
+
+    Return:
+        list of benchmark results
+    """
+    results = []
+    for dataset in datasets:
+        city = load_city(f"{DATA_PATH}/{dataset}.txt")
+        iteration_mutation_pairs = default_iteration_mutation_pairs(city, iterations)
+        algorithms = [
+            ("iterated local search", lambda: iterated_local_search(city, iterations, 10, file_output=False, rng=SEED)),
+            ("taboo search", lambda: taboo_search(city, iterations, 10, file_output=False, rng=SEED)),
+            ("simulated annealing", lambda: simulated_annealing(city, iteration_mutation_pairs, False, rng=SEED)),
+            ("genetic algorithm", lambda: genetic_algorithm(city, iterations, 20, 10, 0.3, False, rng=SEED)),
+        ]
+        for name, algorithm in algorithms:
+            city.fitness_cache.clear()
+            with redirect_stdout(StringIO()):
+                start = perf_counter()
+                schedule = algorithm()
+                seconds = perf_counter() - start
+            results.append(result("algorithm", name, dataset, seconds, score=schedule.evaluate(city)))
+    return results
+
+
+def compare_results(previous: dict, current: dict) -> None:
+    '''Print the time ratio of each benchmark result to the one of a previous run, and the changed scores'''
+    previous_results = {(record["benchmark"], record["case"], record["dataset"]): record
+                        for record in previous["results"]}
+    print("Dataset - Benchmark - Case - Time ratio to previous run")
+    for record in current["results"]:
+        old_record = previous_results.get((record["benchmark"], record["case"], record["dataset"]))
+        if old_record is None:
+            continue
+        change = ""
+        if old_record.get("score") != record.get("score"):
+            change = f" - score changed from {old_record.get('score')} to {record.get('score')}"
+        print(f"{record['dataset']} - {record['benchmark']} - {record['case']} - "
+              f"{record['seconds'] / max(old_record['seconds'], 1e-9):.2f}{change}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Measure the performance of the parser, evaluator, operators and algorithms")
+    parser.add_argument("--datasets", nargs="+", default=DATASETS, choices=DATASETS)
+    parser.add_argument("--repetitions", type=int, default=REPETITIONS, help="runs of each measure, the fastest is kept")
+    parser.add_argument("--iterations", type=int, default=10, help="iterations of each algorithm run")
+    parser.add_argument("--skip-algorithms", action="store_true", help="do not run the algorithms")
+    parser.add_argument("--output", default=RESULTS_PATH, help="JSON file to write the results to")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare the results with")
+    arguments = parser.parse_args()
+
+    results = []
+    for benchmark in [benchmark_parser, benchmark_permutation, benchmark_evaluation, benchmark_mutation]:
+        benchmark_results = benchmark(arguments.datasets, arguments.repetitions)
+        print_results(benchmark_results)
+        results += benchmark_results
+    if not arguments.skip_algorithms:
+        benchmark_results = benchmark_algorithms(arguments.datasets, arguments.iterations)
+        print_results(benchmark_results)
+        results += benchmark_results
+
+    report = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "repetitions": arguments.repetitions,
+        "iterations": arguments.iterations,
+        "results": results,
+    }
+    with open(arguments.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {arguments.output}")
+
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            compare_results(json.load(file), report)
@@ -0,0 +1,235 @@
+import os
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from time import perf_counter
+import numpy as np
+from model.city_cache import load_city
+from model.checkpoint import Checkpointer
+from algorithm.stopping import StoppingCriteria
+from algorithm.common import generate_traffic_weighted_solution
+from algorithm.genetics import genetic_algorithm
+from algorithm.taboo import taboo_search
+from algorithm.annealing import simulated_annealing, default_iteration_mutation_pairs
+from algorithm.local_search import iterated_local_search
+from algorithm.resume import resume
+
+DATA_PATH = "traffic_signaling/asset/data"
+EXPORT_PATH = "traffic_signaling/asset/out"
+ALGORITHMS = ["genetic", "taboo", "annealing", "ils"]
+ANNEALING_ITERATIONS = 100
+
+
+class BatchController:
+    def __init__(self, arguments: list) -> None:
+        """
+        Constructor of BatchController class.
+        Non interactive runner of the algorithms, configured from the command line. Each city is optimized in its
+        own process, several at a time, and a summary table of the scores and timings is printed and written to
+        the output directory, along with the solution and the log of each city.
+        Neither pygame nor matplotlib are imported, unless the run is visualized or rendered.
+
+        Properties:
+            options (Namespace): parsed command line options
+        """
+        self.options = self.parse_arguments(arguments)
+
+    def parse_arguments(self, arguments: list):
+        '''Parse and validate the command line options'''
+        parser = ArgumentParser(
+            prog="python traffic_signaling/src/main.py",
+            description="Optimize the traffic signaling schedules of one or more cities. "
+                        "Run without arguments for the interactive menu.")
+        parser.add_argument("algorithm", choices=ALGORITHMS)
+        parser.add_argument("cities", nargs="+",
+                            help="dataset names (a to f) or paths of input files, following Google's format")
+        parser.add_argument("--iterations", type=int,
+                            help="iterations, or generations of each genetic phase, or iterations of each simulated "
+                                 "annealing operator")
+        parser.add_argument("--time", type=float, help="time budget of each city, in seconds")
+        parser.add_argument("--max-evaluations", type=int, help="number of evaluated schedules after which to stop")
+        parser.add_argument("--target-score", type=int, help="score from which to stop")
+        parser.add_argument("--stagnation", type=int, help="iterations without improvement after which to stop")
+        parser.add_argument("--seed", type=int, help="seed of the random generators, each city gets its own stream")
+        parser.add_argument("--initial", choices=["random", "weighted"], default="random",
+                            help="initial solution of the single solution algorithms: taboo, annealing and ils")
+        parser.add_argument("--mutations", type=int, default=10, help="neighbourhood size of taboo search and ils")
+        parser.add_argument("--perturbation-factor", type=float, default=0.5, help="ils perturbation factor")
+        parser.add_argument("--max-worse-jump", type=float, default=0.1, help="taboo search reset distance")
+        parser.add_argument("--population", type=int, default=100, help="genetic algorithm population size")
+        parser.add_argument("--subpopulation", type=int, default=20, help="genetic algorithm subpopulation size")
+        parser.add_argument("--mutation-chance", type=float, default=0.3, help="genetic algorithm mutation chance")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="processes scoring the neighbourhood of each city, for taboo search and ils, and "
+                                 "rendering its frames")
+        parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="cities optimized at the same time")
+        parser.add_argument("--output", default=EXPORT_PATH, help="directory of the solutions, logs and summary")
+        parser.add_argument("--checkpoint-interval", type=float,
+                            help="seconds between checkpoints of each run, written to the output directory")
+        parser.add_argument("--resume", action="store_true",
+                            help="resume each city from its checkpoint in the output directory, if there is one")
+        parser.add_argument("--trace", action="store_true",
+                            help="write the simulation trace of each solution to the output directory, for replay "
+                                 "and offline analysis")
+        parser.add_argument("--render", nargs="?", const="frames", choices=["frames", "gif", "apng"],
+                            help="render the simulation of each solution to PNG frames in the output directory, "
+                                 "without a display, and optionally assemble them into an animation")
+        parser.add_argument("--render-step", type=int, default=1, help="simulation seconds between rendered frames")
+        parser.add_argument("--visualize", action="store_true",
+                            help="plot the run and show the simulation. Single city only")
+        options = parser.parse_args(arguments)
+
+        if options.iterations is None and options.time is None and options.max_evaluations is None \
+                and options.target_score is None and options.stagnation is None:
+            parser.error("give a number of iterations or a stopping criterion, like --time")
+        if options.initial == "weighted" and options.algorithm == "genetic":
+            parser.error("--initial weighted needs a single solution algorithm, not genetic")
+        if options.render_step < 1:
+            parser.error("--render-step must be at least 1")
+        if options.visualize and len(options.cities) > 1:
+            parser.error("--visualize runs a single city")
+        return options
+
+    def run(self) -> list:
+        """
+        Optimize every city, at most options.jobs at a time, and report the results.
+
+        Return:
+            list of the results of each city, in the order of the cities
+        """
+        options = self.options
+        os.makedirs(options.output, exist_ok=True)
+        seeds = np.random.SeedSequence(options.seed).spawn(len(options.cities))
+        jobs = [(options, city, seed) for city, seed in zip(options.cities, seeds)]
+        start = perf_counter()
+        if len(jobs) == 1 or options.jobs <= 1:
+            results = [run_city(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(options.jobs, len(jobs))) as executor:
+                results = list(executor.map(run_city, *zip(*jobs)))
+        self.print_summary(results, perf_counter() - start)
+        return results
+
+    def print_summary(self, results: list, total_time: float) -> None:
+        '''Print the summary table of the results, and write it as a CSV file to the output directory'''
+        columns = ["city", "algorithm", "score", "seconds", "iterations", "evaluations", "solution"]
+        rows = [[str(result[column]) if column != "seconds" else f"{result[column]:.2f}" for column in columns]
+                for result in results]
+        widths = [max(len(column), *[len(row[i]) for row in rows]) for i, column in enumerate(columns)]
+        print()
+        print(" | ".join(column.ljust(width) for column, width in zip(columns, widths)))
+        print("-+-".join("-" * width for width in widths))
+        for row in rows:
+            print(" | ".join(value.ljust(width) for value, width in zip(row, widths)))
+        print(f"Total score {sum(result['score'] for result in results)} in {total_time:.2f}s")
+
+        with open(os.path.join(self.options.output, f"{self.options.algorithm}_summary.csv"), "w") as f:
+            f.write(",".join(column.upper() for column in columns) + "\n")
+            for row in rows:
+                f.write(",".join(row) + "\n")
+
+
+def city_path(city: str) -> str:
+    '''Input file of a city, given by its dataset name or its path'''
+    return f"{DATA_PATH}/{city}.txt" if os.path.sep not in city and "." not in city else city
+
+
+def run_city(options, city_name: str, seed: np.random.SeedSequence) -> dict:
+    """
+    Optimize a city with the algorithm and options of the command line.
+    Entry point of the batch processes: the algorithm output goes to a log file of the city, in the output directory.
+
+    Parameters:
+        options: parsed command line options
+        city_name: dataset name or input file path of the city
+        seed: seed sequence of the random generator of the city
+
+    Return:
+        dictionary with the city, algorithm, score, seconds, iterations, evaluations and solution file
+    """
+    name = f"{os.path.splitext(os.path.basename(city_name))[0]}_{options.algorithm}"
+    start = perf_counter()
+    city = load_city(city_path(city_name))
+    stopping_criteria = StoppingCriteria(max_time=options.time, max_evaluations=options.max_evaluations,
+                                         target_score=options.target_score, stagnation=options.stagnation)
+    checkpoint_file = os.path.join(options.output, f"{name}.ckpt")
+    checkpointer = None if options.checkpoint_interval is None else \
+        Checkpointer(checkpoint_file, options.checkpoint_interval)
+
+    with open(os.path.join(options.output, f"{name}.log"), "w") as log, redirect_stdout(log):
+        schedule = run_algorithm(options, city, np.random.default_rng(seed), stopping_criteria, checkpointer,
+                                 checkpoint_file if options.resume and os.path.exists(checkpoint_file) else None)
+    solution = f"{name}.txt"
+    schedule.write_to_file(city, options.output, solution)
+    score = schedule.evaluate(city, os.path.join(options.output, f"{name}.trace") if options.trace else None)
+
+    if options.render is not None:
+        from controller.render_controller import render
+        render(city_path(city_name), schedule, os.path.join(options.output, f"{name}_frames"), options.workers,
+               options.render_step, None if options.render == "frames" else options.render)
+    if options.visualize:
+        visualize(options.algorithm, city, schedule)
+    return {
+        "city": city_name,
+        "algorithm": options.algorithm,
+        "score": score,
+        "seconds": perf_counter() - start,
+        "iterations": stopping_criteria.iterations,
+        "evaluations": stopping_criteria.evaluations,
+        "solution": os.path.join(options.output, solution),
+    }
+
+
+def run_algorithm(options, city, rng, stopping_criteria, checkpointer, checkpoint_file):
+    '''Run, or resume from checkpoint_file if not None, the chosen algorithm on a city'''
+    file_output = options.visualize
+    if options.algorithm == "annealing":
+        iteration_mutation_pairs = default_iteration_mutation_pairs(
+            city, ANNEALING_ITERATIONS if options.iterations is None else options.iterations)
+        if options.iterations is not None:
+            stopping_criteria.max_iterations = 3 * options.iterations
+    if checkpoint_file is not None:
+        match options.algorithm:
+            case "annealing":
+                arguments = {"iteration_mutation_pairs": iteration_mutation_pairs}
+            case "genetic":
+                arguments = {} if options.iterations is None else {"number_of_generations": options.iterations}
+            case _:
+                arguments = {"workers": options.workers}
+                if options.iterations is not None:
+                    arguments["number_of_iterations"] = options.iterations
+        return resume(city, checkpoint_file, stopping_criteria, checkpointer, file_output, **arguments)
+
+    initial_schedule = generate_traffic_weighted_solution(city) if options.initial == "weighted" else None
+    match options.algorithm:
+        case "genetic":
+            return genetic_algorithm(
+                city, options.iterations, options.population, options.subpopulation, options.mutation_chance,
+                file_output, rng=rng, stopping_criteria=stopping_criteria, checkpointer=checkpointer)
+        case "taboo":
+            return taboo_search(
+                city, options.iterations, options.mutations, options.max_worse_jump, file_output, initial_schedule,
+                options.workers, rng, stopping_criteria, checkpointer)
+        case "annealing":
+            return simulated_annealing(
+                city, iteration_mutation_pairs, file_output, initial_schedule, rng, stopping_criteria, checkpointer)
+        case "ils":
+            return iterated_local_search(
+                city, options.iterations, options.mutations, options.perturbation_factor, file_output,
+                initial_schedule, options.workers, rng, stopping_criteria, checkpointer)
+
+
+def visualize(algorithm: str, city, schedule) -> None:
+    '''Plot the results of a run and show its simulation'''
+    match algorithm:
+        case "genetic":
+            from algorithm.genetics import print_genetic_results_graph_from_file as print_results_graph
+        case "taboo":
+            from algorithm.taboo import print_taboo_results_graph_from_file as print_results_graph
+        case "annealing":
+            from algorithm.annealing import print_sa_results_graph_from_file as print_results_graph
+        case "ils":
+            from algorithm.local_search import print_ils_results_graph_from_file as print_results_graph
+    print_results_graph()
+    from controller.pygame_controller import PygameController
+    PygameController(city).simulate(schedule)
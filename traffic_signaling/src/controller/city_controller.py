@@ -1,10 +1,9 @@
 import pygame
 import math
-from collections import deque
-from time import sleep
 from model.city import City
-from model.schedule import Schedule
+from model.trace import Trace
 from view.city_viewer import CityViewer
+from view.asset_cache import AssetCache
 
 BG_COLOR = (50, 220, 230)
 BG_IMAGE = 'traffic_signaling/asset/img/grass.jpg'
@@ -18,31 +17,35 @@ class CityController:
 
         Properties:
             city (City): city with all the intersections of the problem
+            assets (AssetCache): images and fonts loaded once, shared with the city viewer
             city_viewer (CityViewer): City viewer to draw the different elements of the city
-            schedule (Schedule): schedule of a possible solution 
+            trace (Trace): recorded simulation of a possible solution
             window (Surface): pygame window for display
             window_size (tuple): tuple with width and height of pygame window
         """
         self.city = city
-        self.city_viewer = CityViewer(city)
-        self.schedule = None
+        self.assets = AssetCache()
+        self.city_viewer = CityViewer(city, self.assets)
+        self.trace = None
         self.window = window
         self.window_size = window_size
         self.set_intersection_pos()
+        self.city_viewer.render_static_layers(
+            window_size, self.assets.image(BG_IMAGE, tuple(window_size), alpha=False))
 
-    def set_schedule(self, schedule: Schedule):
+    def set_trace(self, trace: Trace):
         """
-        Set the schedule of the CityController.
+        Set the recorded simulation replayed by the CityController.
 
         Parameters:
-            schedule (Schedule): Schedule of a possible solution
+            trace (Trace): recorded simulation of a possible solution
         """
-        self.schedule = schedule
+        self.trace = trace
 
     def set_intersection_pos(self) -> None:
         """
         Set intersection position to draw each one in the screen.
-        The position for each intersection is obtained by creating an imaginary circumference and dividing it 
+        The position for each intersection is obtained by creating an imaginary circumference and dividing it
         equally by each intersection.
         """
         intersections_no = len(self.city.intersections)
@@ -57,84 +60,27 @@ class CityController:
             angle += rotation_angle
         return
 
-    def simulate(self):
-        '''Run the simulation of a solution and draw each state during the process'''
-        street_queue = {street_id: deque()
-                        for street_id in range(self.city.no_streets)}
-        green_cycle_duration, last_crossed = {}, {}
-        for intersection_id in self.schedule.schedule:
-            green_cycle_duration[intersection_id] = len(
-                self.schedule.schedule[intersection_id])
-            last_crossed[intersection_id] = -1
+    def handle_event(self, event) -> None:
+        '''Events have no effect on the city, whose layout is fixed'''
 
-        car_path = {}
-        next_analysed_time = {}
-        for car in self.city.cars:
-            car_path[car.id] = deque(car.path)
-            street_queue[car_path[car.id][0].id].append(car.id)
-            next_analysed_time[car.id] = 0
-
-        score = 0
-        for current_time in range(self.city.duration + 1):
-            scheduled_removals = []
-            green_lights_streets = []
-
-            for id, intersection in self.schedule.schedule.items():
-                if green_cycle_duration[id] != 0:
-                    green_lights_streets.append(
-                        intersection[current_time % green_cycle_duration[id]])
-
-            cars_position = {car_id: [car_path[car_id][0].id, max(next_analysed_time[car_id] - current_time, 0)]
-                             for car_id in car_path}
-
-            for car_id in car_path:
-                if next_analysed_time[car_id] > current_time:
-                    continue
-                street = car_path[car_id][0]
-                if street_queue[car_path[car_id][0].id][0] != car_id:
-                    continue
-                intersection_id = self.city.street_intersection[street.name]
-                if not (intersection_id in self.schedule.schedule.keys()):
-                    continue
-                if green_cycle_duration[intersection_id] == 0:
-                    light_is_green = False
-                else:
-                    light_is_green = (
-                        self.schedule.schedule[intersection_id][
-                            current_time % green_cycle_duration[intersection_id]
-                        ]
-                        == street.name
-                    )
-                if not light_is_green or last_crossed[intersection_id] == current_time:
-                    continue
-                last_crossed[intersection_id] = current_time
-                street_queue[street.id].popleft()
-                car_path[car_id].popleft()
-                next_street = car_path[car_id][0]
-                next_time = current_time + next_street.length
-                if len(car_path[car_id]) == 1:
-                    scheduled_removals.append(car_id)
-                    if next_time <= self.city.duration:
-                        score += self.city.car_value + self.city.duration - next_time
-                else:
-                    street_queue[next_street.id].append(car_id)
-                    next_analysed_time[car_id] = next_time
-            for car_id in scheduled_removals:
-                del car_path[car_id]
-
-            self.draw(green_lights_streets, cars_position, current_time, score)
-            sleep(1)
+    def draw_state(self, current_time, speed, paused):
+        """
+        Draw the state of the replayed simulation in a second, read from its trace
 
-        return score
+        Parameters:
+            current_time (integer): second of the simulation to draw
+            speed (float): simulation seconds replayed per real second
+            paused (boolean): whether the replay is paused
+        """
+        cars, streets, seconds_left = self.trace.car_positions(current_time)
+        cars_position = dict(zip(cars.tolist(), zip(streets.tolist(), seconds_left.tolist())))
+        self.draw(set(self.trace.green_streets(current_time).tolist()), cars_position, current_time,
+                  self.trace.score_at(current_time))
+        self.city_viewer.draw_playback(self.window, speed, paused)
+        pygame.display.flip()
 
     def draw(self, green_lights, cars_position, current_time, score):
-        '''Draw the city with some informations about the current state and update screen'''
-        bg = pygame.transform.scale(
-            pygame.image.load(BG_IMAGE), self.window_size)
-        self.window.blit(bg, (0, 0))
-
+        '''Draw the city with some informations about the current state'''
         self.city_viewer.draw(self.window, green_lights, cars_position)
 
         self.city_viewer.draw_infos(self.window, current_time, score)
-
-        pygame.display.flip()
@@ -1,11 +1,10 @@
-from model.city import City
+from model.city_cache import load_city
 from model.schedule import Schedule
-from controller.pygame_controller import PygameController
 from algorithm.local_search import iterated_local_search, print_ils_results_graph_from_file
 from algorithm.taboo import taboo_search, print_taboo_results_graph_from_file
 from algorithm.genetics import genetic_algorithm, print_genetic_results_graph_from_file
-from algorithm.annealing import simulated_annealing, print_sa_results_graph_from_file
-from algorithm.common import mutate_schedule, mutate_intersection, mutate_single_street
+from algorithm.annealing import simulated_annealing, default_iteration_mutation_pairs, print_sa_results_graph_from_file
+from algorithm.common import generate_traffic_weighted_solution
 
 EXPORT_PATH = "traffic_signaling/asset/out"
 
@@ -23,6 +22,7 @@ class MainController:
             tabu_params (list): list of params (integers) for the tabu search
             annealing_params (list): list of params (integers) for the simulated annealing algorithm
             ils_params (list): list of params (integers) for the iterative local search
+            initial_solutions (list): options list for the initial solution of the single solution algorithms
             cities (list): list of available cities
         """
         self.title = "Traffic Signaling - Hash Code Problem"
@@ -43,6 +43,8 @@ class MainController:
         self.ils_params = ["Number of Iterations",
                            "Number of Mutations per Interation"]
 
+        self.initial_solutions = ["Random", "Traffic weighted"]
+
         self.cities = ["City A - 4 intersections",
                        "City B - 7073 intersections",
                        "City C - 10000 intersections",
@@ -77,47 +79,46 @@ class MainController:
                                                  params[2], params2[0])
                     print_genetic_results_graph_from_file()
                     schedule.write_to_file(
-                        EXPORT_PATH, 'genetic_last_solution.txt')
+                        city, EXPORT_PATH, 'genetic_last_solution.txt')
                 case 2:
                     params = self.get_params(self.tabu_params)
                     if params == []:
                         continue
                     city = self.get_city()
                     schedule: Schedule = taboo_search(
-                        city, params[0], params[1])
+                        city, params[0], params[1], initial_schedule=self.get_initial_schedule(city))
                     print_taboo_results_graph_from_file()
                     schedule.write_to_file(
-                        EXPORT_PATH, 'tabu_last_solution.txt')
+                        city, EXPORT_PATH, 'tabu_last_solution.txt')
                 case 3:
                     params = self.get_params(self.annealing_params)
                     if params == []:
                         continue
                     city = self.get_city()
-                    iteration_mutation_pairs = [(params[0], lambda x: mutate_schedule(city, x, 0.5)), (
-                        params[0], lambda x: mutate_intersection(city, x)[0]), (params[0], lambda x: mutate_single_street(city, x))]
+                    iteration_mutation_pairs = default_iteration_mutation_pairs(city, params[0])
                     schedule: Schedule = simulated_annealing(
-                        city, iteration_mutation_pairs)
+                        city, iteration_mutation_pairs, initial_schedule=self.get_initial_schedule(city))
                     print_sa_results_graph_from_file()
                     schedule.write_to_file(
-                        EXPORT_PATH, 'sim_annealing_last_solution.txt')
+                        city, EXPORT_PATH, 'sim_annealing_last_solution.txt')
                 case 4:
                     params = self.get_params(self.ils_params)
                     if params == []:
                         continue
                     city = self.get_city()
                     schedule: Schedule = iterated_local_search(
-                        city, params[0], params[1])
+                        city, params[0], params[1], initial_schedule=self.get_initial_schedule(city))
                     print_ils_results_graph_from_file()
                     schedule.write_to_file(
-                        EXPORT_PATH, 'ils_last_solution.txt')
+                        city, EXPORT_PATH, 'ils_last_solution.txt')
                 case _:
                     print("Input option not valid")
                     err = True
                     continue
 
-            if city.no_intersections < 15:
-                controller = PygameController(city)
-                controller.simulate(schedule)
+            from controller.pygame_controller import PygameController
+            controller = PygameController(city)
+            controller.simulate(schedule)
 
     def get_params(self, params_list):
         """
@@ -195,16 +196,37 @@ class MainController:
 
             match option:
                 case 0: return None
-                case 1: return City.from_input("traffic_signaling/asset/data/a.txt")
-                case 2: return City.from_input("traffic_signaling/asset/data/b.txt")
-                case 3: return City.from_input("traffic_signaling/asset/data/c.txt")
-                case 4: return City.from_input("traffic_signaling/asset/data/d.txt")
-                case 5: return City.from_input("traffic_signaling/asset/data/e.txt")
-                case 6: return City.from_input("traffic_signaling/asset/data/f.txt")
+                case 1: return load_city("traffic_signaling/asset/data/a.txt")
+                case 2: return load_city("traffic_signaling/asset/data/b.txt")
+                case 3: return load_city("traffic_signaling/asset/data/c.txt")
+                case 4: return load_city("traffic_signaling/asset/data/d.txt")
+                case 5: return load_city("traffic_signaling/asset/data/e.txt")
+                case 6: return load_city("traffic_signaling/asset/data/f.txt")
                 case _:
                     print("Input option not valid")
                     err = True
 
+    def get_initial_schedule(self, city):
+        """
+        Print the initial solution options and build the one chosen by the user.
+
+        Parameters:
+            city (City): city for which the schedule will be created
+
+        Return:
+            Initial schedule, None for a random one
+        """
+        print()
+        for i in range(len(self.initial_solutions)):
+            print(i+1, "-", self.initial_solutions[i])
+
+        while 1:
+            option = self.get_option("Initial solution: ")
+            match option:
+                case 1: return None
+                case 2: return generate_traffic_weighted_solution(city)
+                case _: print("Input option not valid")
+
     def get_option(self, msg):
         """
         Get a integer number from the user
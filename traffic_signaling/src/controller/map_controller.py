@@ -0,0 +1,77 @@
+import pygame
+from model.city import City
+from model.city_cache import CACHE_PATH
+from model.city_layout import load_layout
+from model.trace import Trace
+from view.map_viewer import MapViewer
+from view.asset_cache import AssetCache
+
+ZOOM_STEP = 1.25
+
+
+class MapController:
+    def __init__(self, city: City, window, window_size, cache_path: str = CACHE_PATH) -> None:
+        """
+        Constructor of MapController class.
+        Replays simulations of large cities on a laid out map, which the user pans by dragging the mouse and zooms
+        with the mouse wheel or the + and - keys. F fits the whole city in view.
+        The layout of the city is computed on its first view, and cached in cache_path for the next ones.
+
+        Properties:
+            city (City): city with all the intersections of the problem
+            assets (AssetCache): fonts loaded once
+            map_viewer (MapViewer): viewer drawing the map of the city
+            trace (Trace): recorded simulation of a possible solution
+            window (Surface): pygame window for display
+            window_size (tuple): tuple with width and height of pygame window
+        """
+        self.city = city
+        self.assets = AssetCache()
+        self.map_viewer = MapViewer(city, load_layout(city, cache_path), self.assets)
+        self.trace = None
+        self.window = window
+        self.window_size = window_size
+        self.map_viewer.fit(window_size)
+
+    def set_trace(self, trace: Trace):
+        """
+        Set the recorded simulation replayed by the MapController.
+
+        Parameters:
+            trace (Trace): recorded simulation of a possible solution
+        """
+        self.trace = trace
+
+    def handle_event(self, event) -> None:
+        '''Pan and zoom the map, following the mouse and keyboard events'''
+        if event.type == pygame.MOUSEMOTION and event.buttons[0]:
+            self.map_viewer.pan(*event.rel)
+        elif event.type == pygame.MOUSEWHEEL:
+            self.map_viewer.zoom(ZOOM_STEP ** event.y, pygame.mouse.get_pos())
+        elif event.type == pygame.KEYDOWN:
+            center = (self.window_size[0] / 2, self.window_size[1] / 2)
+            match event.key:
+                case pygame.K_PLUS | pygame.K_EQUALS | pygame.K_KP_PLUS:
+                    self.map_viewer.zoom(ZOOM_STEP, center)
+                case pygame.K_MINUS | pygame.K_KP_MINUS:
+                    self.map_viewer.zoom(1 / ZOOM_STEP, center)
+                case pygame.K_f:
+                    self.map_viewer.fit(self.window_size)
+
+    def draw_state(self, current_time, speed, paused):
+        """
+        Draw the state of the replayed simulation in a second, read from its trace: the streets in view with their
+        lights and cars when zoomed in, the heatmap of the waiting cars when zoomed out
+
+        Parameters:
+            current_time (integer): second of the simulation to draw
+            speed (float): simulation seconds replayed per real second
+            paused (boolean): whether the replay is paused
+        """
+        if self.map_viewer.is_detailed(self.window_size):
+            _, streets, seconds_left = self.trace.car_positions(current_time)
+            self.map_viewer.draw(self.window, self.trace.green_streets(current_time), streets, seconds_left)
+        else:
+            self.map_viewer.draw_heatmap(self.window, self.trace.queue_lengths(current_time))
+        self.map_viewer.draw_infos(self.window, current_time, self.trace.score_at(current_time), speed, paused)
+        pygame.display.flip()
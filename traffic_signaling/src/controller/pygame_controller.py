@@ -1,31 +1,49 @@
 import pygame
 from model.city import City
+from model.city_cache import CACHE_PATH
+from model.trace import Trace
 from controller.city_controller import CityController
+from controller.map_controller import MapController
 from model.schedule import Schedule
-from time import time, sleep
 
 WINDOW_SIZE = (1300, 800)
 FPS = 30
+MIN_SPEED = 0.25
+MAX_SPEED = 64
+SEEK_STEP = 1
+LONG_SEEK_STEP = 10
+MAP_INTERSECTIONS = 15
 
 
 class PygameController:
-    def __init__(self, city: City) -> None:
+    def __init__(self, city: City, cache_path: str = CACHE_PATH) -> None:
         """
-        Constructor of PygameController class
+        Constructor of PygameController class, reading the layout of large cities from cache_path
 
         Properties:
             window_size (tuple): tuple with width and height of pygame window
             window (Surface): pygame window for display
-            city_controller (CityController): city controller used to simulate a solution
+            city_controller (CityController | MapController): controller used to replay the simulation of a solution,
+                                                              on a map for cities with MAP_INTERSECTIONS or more
+            current_time (float): second of the replayed simulation
+            speed (float): simulation seconds replayed per real second
+            paused (boolean): whether the replay is paused
         """
         self.window_size = WINDOW_SIZE
         self.window = self.init_pygame()
-        self.city_controller = CityController(
-            city, self.window, WINDOW_SIZE)
+        if city.no_intersections < MAP_INTERSECTIONS:
+            self.city_controller = CityController(
+                city, self.window, WINDOW_SIZE)
+        else:
+            self.city_controller = MapController(
+                city, self.window, WINDOW_SIZE, cache_path)
+        self.current_time = 0
+        self.speed = 1
+        self.paused = False
 
     def init_pygame(self) -> None:
         """
-        Pygame and screen initialization 
+        Pygame and screen initialization
 
         Return:
             Pygame Surface to display
@@ -38,28 +56,57 @@ class PygameController:
         pygame.quit()
 
     def simulate(self, schedule: Schedule) -> None:
-        '''Simulation of a possible solution to view in pygame'''
-        self.city_controller.set_schedule(schedule)
-        if self.city_controller.simulate() == 1:
-            self.quit_pygame()
-        self.wait_for_exit()
+        '''Simulation of a possible solution to view in pygame, recorded once and then replayed'''
+        self.replay(Trace.record(self.city_controller.city, schedule))
 
-    def wait_for_exit(self) -> None:
-        '''Wait for an event (press ESQ or close the window) to quit pygame'''
-        start = time()
-        while self.is_running():
-            sleep(max(1.0/FPS - (time() - start), 0))
-            continue
+    def replay(self, trace: Trace) -> None:
+        """
+        Replay the recorded simulation of a solution, until the window is closed or ESQ is pressed.
+        SPACE pauses and resumes the replay, LEFT and RIGHT seek one second back and forth (ten with SHIFT),
+        UP and DOWN double and halve the speed and HOME restarts the replay.
+
+        Parameters:
+            trace (Trace): recorded simulation of a possible solution
+        """
+        self.city_controller.set_trace(trace)
+        self.current_time, self.speed, self.paused = 0, 1, False
+        clock = pygame.time.Clock()
+        while self.is_running(trace.duration):
+            if not self.paused:
+                self.current_time = min(self.current_time + self.speed * clock.get_time() / 1000, trace.duration)
+            self.city_controller.draw_state(int(self.current_time), self.speed, self.paused)
+            clock.tick(FPS)
         self.quit_pygame()
 
-    def is_running(self) -> bool:
+    def is_running(self, duration) -> bool:
         """
-        Check if does not exist at least one of the following events: press ESQ or close the window
+        Handle the replay controls, pass the other events to the city controller, and check if does not exist at
+        least one of the following events: press ESQ or close the window
+
+        Parameters:
+            duration (integer): duration of the replayed simulation
 
         Return:
-            False if the events exist, True otherwise 
+            False if the events exist, True otherwise
         """
         for event in pygame.event.get():
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                 return False
+            self.city_controller.handle_event(event)
+            if event.type != pygame.KEYDOWN:
+                continue
+            step = LONG_SEEK_STEP if event.mod & pygame.KMOD_SHIFT else SEEK_STEP
+            match event.key:
+                case pygame.K_SPACE:
+                    self.paused = not self.paused
+                case pygame.K_LEFT:
+                    self.current_time = max(int(self.current_time) - step, 0)
+                case pygame.K_RIGHT:
+                    self.current_time = min(int(self.current_time) + step, duration)
+                case pygame.K_UP:
+                    self.speed = min(self.speed * 2, MAX_SPEED)
+                case pygame.K_DOWN:
+                    self.speed = max(self.speed / 2, MIN_SPEED)
+                case pygame.K_HOME:
+                    self.current_time = 0
         return True
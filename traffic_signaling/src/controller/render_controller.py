@@ -0,0 +1,147 @@
+import os
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import pygame
+from model.city_cache import load_city, CACHE_PATH
+from model.schedule import Schedule
+from model.trace import Trace
+from controller.batch_controller import city_path
+from controller.pygame_controller import PygameController, MAP_INTERSECTIONS, FPS
+
+TRACE_FILE = "simulation.trace"
+FRAME_FILE = "frame_{:06d}.png"
+ANIMATION_FILE = "simulation.{}"
+ANIMATIONS = ["gif", "apng"]
+
+
+class RenderController:
+    def __init__(self, arguments: list) -> None:
+        """
+        Constructor of RenderController class.
+        Headless renderer of the simulation of a solution, configured from the command line, for review artifacts
+        on hosts without a display. Frames are drawn off-screen, by the same viewers as the pygame window.
+
+        Properties:
+            options (Namespace): parsed command line options
+        """
+        self.options = self.parse_arguments(arguments)
+
+    def parse_arguments(self, arguments: list):
+        '''Parse and validate the command line options'''
+        parser = ArgumentParser(
+            prog="python traffic_signaling/src/main.py render",
+            description="Render the simulation of a solution to numbered PNG frames, without a display.")
+        parser.add_argument("city", help="dataset name (a to f) or path of the input file, following Google's format")
+        parser.add_argument("solution", help="solution file of the city, following Google's format")
+        parser.add_argument("--output",
+                            help="directory of the frames, by default next to the solution, named after it")
+        parser.add_argument("--step", type=int, default=1, help="simulation seconds between frames")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes rendering the frames")
+        parser.add_argument("--animation", choices=ANIMATIONS, help="also assemble the frames into an animation")
+        options = parser.parse_args(arguments)
+        if options.step < 1:
+            parser.error("--step must be at least 1")
+        if options.output is None:
+            options.output = f"{os.path.splitext(options.solution)[0]}_frames"
+        return options
+
+    def run(self) -> list:
+        """
+        Render the frames of the solution, and print where they were written.
+
+        Return:
+            list of the frame files, in order
+        """
+        options = self.options
+        city_file = city_path(options.city)
+        start = perf_counter()
+        schedule = Schedule.from_input(options.solution, load_city(city_file))
+        frames = render(city_file, schedule, options.output, options.workers, options.step, options.animation)
+        print(f"{len(frames)} frames written to {options.output} in {perf_counter() - start:.2f}s")
+        return frames
+
+
+def render(city_file: str, schedule: Schedule, output: str, workers: int = 1, step: int = 1,
+           animation: str = None, cache_path: str = CACHE_PATH) -> list:
+    """
+    Render the simulation of a schedule to numbered PNG frames, one every step seconds, which video encoders read
+    as an image sequence (for instance `ffmpeg -framerate 30 -i frame_%06d.png simulation.mp4`).
+    The simulation is recorded once, to a trace written along the frames, and each worker process renders a
+    contiguous part of the frames from it, on an off-screen surface of the SDL dummy video driver. Frames are
+    always rendered in worker processes, so the video driver and the display of the calling process, which may
+    show a pygame window afterwards, are left untouched.
+
+    Parameters:
+        city_file: input file of the city
+        schedule: schedule of the city to simulate
+        output: directory of the frames, created if needed
+        workers: number of processes rendering the frames
+        step: simulation seconds between frames
+        animation: None, or "gif" or "apng" to also assemble the frames into an animation, with Pillow
+        cache_path: directory holding the cached cities and layouts
+
+    Return:
+        list of the frame files, in order
+    """
+    city = load_city(city_file, cache_path)
+    os.makedirs(output, exist_ok=True)
+    trace_file = os.path.join(output, TRACE_FILE)
+    schedule.evaluate(city, trace_file)
+    if city.no_intersections >= MAP_INTERSECTIONS:
+        from model.city_layout import load_layout
+        load_layout(city, cache_path)
+
+    times = list(range(0, city.duration + 1, step))
+    frames = [os.path.join(output, FRAME_FILE.format(frame)) for frame in range(len(times))]
+    workers = max(1, min(workers, len(times)))
+    chunk_size = -(-len(times) // workers)
+    chunks = [(city_file, trace_file, times[start:start + chunk_size], frames[start:start + chunk_size], step,
+               cache_path) for start in range(0, len(times), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(render_frames, *zip(*chunks)))
+
+    if animation is not None:
+        write_animation(frames, os.path.join(output, ANIMATION_FILE.format("png" if animation == "apng" else "gif")))
+    return frames
+
+
+def render_frames(city_file: str, trace_file: str, times: list, frames: list, step: int,
+                  cache_path: str = CACHE_PATH) -> None:
+    """
+    Render some seconds of a recorded simulation to PNG files, off-screen.
+    Entry point of the render processes, which it switches to the SDL dummy video driver: the city and its viewer
+    are set up once for all the frames.
+
+    Parameters:
+        city_file: input file of the city
+        trace_file: recorded simulation of the schedule
+        times: seconds of the simulation to render
+        frames: file of each frame
+        step: simulation seconds between frames, shown as the replay speed at FPS frames per second
+        cache_path: directory holding the cached cities and layouts
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    controller = PygameController(load_city(city_file, cache_path), cache_path)
+    controller.city_controller.set_trace(Trace.read(trace_file))
+    for time, frame in zip(times, frames):
+        controller.city_controller.draw_state(time, step * FPS, False)
+        pygame.image.save(controller.window, frame)
+    controller.quit_pygame()
+
+
+def write_animation(frames: list, animation_file: str) -> None:
+    """
+    Assemble PNG frames into an animated GIF or PNG, shown at FPS frames per second. The frames are all held in
+    memory, so long simulations are better rendered with a larger step, or encoded from the image sequence.
+
+    Parameters:
+        frames: frame files, in order
+        animation_file: file of the animation, a GIF or an animated PNG following its extension
+    """
+    from PIL import Image
+    images = []
+    for frame in frames:
+        with Image.open(frame) as image:
+            images.append(image.convert("RGB"))
+    images[0].save(animation_file, save_all=True, append_images=images[1:], duration=1000 // FPS, loop=0)
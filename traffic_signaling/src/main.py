@@ -1,5 +1,13 @@
-from controller.main_controller import MainController
+import sys
 
 if __name__ == "__main__":
-    main_controller = MainController()
-    main_controller.main_loop()
+    if len(sys.argv) > 1 and sys.argv[1] == "render":
+        from controller.render_controller import RenderController
+        RenderController(sys.argv[2:]).run()
+    elif len(sys.argv) > 1:
+        from controller.batch_controller import BatchController
+        BatchController(sys.argv[1:]).run()
+    else:
+        from controller.main_controller import MainController
+        main_controller = MainController()
+        main_controller.main_loop()
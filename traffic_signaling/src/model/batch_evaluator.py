@@ -0,0 +1,210 @@
+from array import array
+import numpy as np
+from .city import City
+from .simulator import simulate
+
+NEVER = np.iinfo(np.int64).max
+BATCH_SIZE = 64
+MIN_BATCH_SIZE = 16
+
+
+class BatchEvaluator:
+    def __init__(self, city: City) -> None:
+        """
+        Constructor of BatchEvaluator class.
+        Scores many schedules of the same city at once, simulating them in lock-step: the state of every car on
+        every schedule is stored in NumPy arrays with a schedule axis, so each simulated second advances all the
+        schedules together. Scores are the same as the ones of the event-driven simulator.
+
+        Properties:
+            city (CompiledCity): the simulated city
+            fitness_cache (FitnessCache): cache of the scores of evaluated schedules
+            window_index (ndarray): for each street, its column in the green window arrays, -1 if no car ever
+                                    waits on it
+            no_windows (int): number of streets on which cars wait
+            route_window (ndarray): aligned with the city routes, the green window column of each street
+            route_length (ndarray): aligned with the city routes, the length of each street
+        """
+        self.city = city.compiled
+        self.fitness_cache = city.fitness_cache
+        route_streets = self.city.route_streets.astype(np.int64)
+
+        waiting_streets = np.flatnonzero(self.city.street_demand > 0)
+        self.window_index = np.full(self.city.no_streets, -1, dtype=np.int64)
+        self.window_index[waiting_streets] = np.arange(len(waiting_streets))
+        self.no_windows = len(waiting_streets)
+        self.route_window = self.window_index[route_streets]
+        self.route_length = self.city.street_length.astype(np.int64)[route_streets]
+
+    def evaluate(self, schedules: list) -> list:
+        """
+        Score schedules of the city, looking them up in the fitness cache first.
+        Missing schedules are simulated together, BATCH_SIZE at a time. Lock-step simulation has a cost for each
+        simulated second, whatever the number of schedules, so less than MIN_BATCH_SIZE schedules are simulated
+        one by one instead.
+
+        Parameters:
+            schedules: schedules to evaluate
+
+        Return:
+            list of scores, in the order of the schedules
+        """
+        scores = [self.fitness_cache.get(schedule.fingerprint)
+                  for schedule in schedules]
+        missing = [index for index, score in enumerate(scores) if score is None]
+        for batch_start in range(0, len(missing), BATCH_SIZE):
+            batch = missing[batch_start:batch_start + BATCH_SIZE]
+            batch_schedules = [schedules[index] for index in batch]
+            if len(batch) < MIN_BATCH_SIZE:
+                simulated = [simulate(self.city, schedule.green_windows()) for schedule in batch_schedules]
+            else:
+                simulated = self.simulate(batch_schedules)
+            for index, score in zip(batch, simulated):
+                scores[index] = score
+                self.fitness_cache.put(schedules[index].fingerprint, score)
+        for schedule, score in zip(schedules, scores):
+            schedule.last_score = score
+        return scores
+
+    def green_window_arrays(self, schedules: list) -> tuple:
+        """
+        Pack the green windows of several schedules into arrays, one row per schedule.
+        The green cycle arrays are concatenated as they are, without building per street windows in Python.
+
+        Parameters:
+            schedules: schedules to pack
+
+        Return:
+            tuple of (offsets, durations, cycle durations) arrays. Streets always red have a null duration
+        """
+        streets, durations, offsets = array("i"), array("i"), array("i")
+        no_streets, no_schedule_streets = array("q"), []
+        for schedule in schedules:
+            for green_cycle in schedule.schedule.values():
+                streets.extend(green_cycle.streets)
+                durations.extend(green_cycle.durations)
+                offsets.extend(green_cycle.offsets)
+                no_streets.append(len(green_cycle.streets))
+            no_schedule_streets.append(len(streets) - sum(no_schedule_streets))
+
+        no_streets = np.frombuffer(no_streets, dtype=np.int64)
+        offsets = np.frombuffer(offsets, dtype=np.int32)
+        ends = np.cumsum(no_streets + 1) - 1
+        starts = np.ones(len(offsets), dtype=bool)
+        starts[ends] = False
+        streets = np.frombuffer(streets, dtype=np.int32)
+        columns = self.window_index[streets]
+        rows = np.repeat(np.arange(len(schedules)), no_schedule_streets)
+        used = columns >= 0
+        cells = rows[used] * self.no_windows + columns[used]
+
+        shape = len(schedules) * self.no_windows
+        window_offsets, window_durations = np.zeros(shape, dtype=np.int64), np.zeros(shape, dtype=np.int64)
+        window_cycles = np.ones(shape, dtype=np.int64)
+        window_offsets[cells] = offsets[starts][used]
+        window_durations[cells] = np.frombuffer(durations, dtype=np.int32)[used]
+        window_cycles[cells] = np.repeat(offsets[ends], no_streets)[used]
+        return window_offsets, window_durations, window_cycles
+
+    def simulate(self, schedules: list) -> list:
+        """
+        Lock-step, event-driven, simulation of the city traffic on several schedules, using Google's scoring system.
+        As in the scalar simulator, only the first car of each street queue has a crossing second, computed from
+        the street green window. On every step, the earliest crossing second over all schedules is found and every
+        car crossing on that second, on any schedule, moves to its next street queue.
+        Street queues are linked lists: each car points to the car behind it.
+
+        Parameters:
+            schedules: schedules to simulate
+
+        Return:
+            list of scores, in the order of the schedules
+        """
+        city = self.city
+        no_schedules, no_cars, no_windows = len(schedules), city.no_cars, self.no_windows
+        if no_schedules == 0 or no_cars == 0:
+            return [0 for _ in schedules]
+        offsets, durations, cycles = self.green_window_arrays(schedules)
+        no_queues = len(offsets)
+
+        # Car arrays have one entry per (schedule, car) pair, queue arrays one per (schedule, street) pair
+        schedule_ids = np.repeat(np.arange(no_schedules), no_cars)
+        position = np.tile(city.route_offsets[:-1], no_schedules)
+        last_position = np.tile(city.route_offsets[1:] - 1, no_schedules)
+        arrival_time = np.zeros(no_schedules * no_cars, dtype=np.int64)
+        crossing_time = np.full(no_schedules * no_cars, NEVER, dtype=np.int64)
+        next_car = np.full(no_schedules * no_cars, -1, dtype=np.int64)
+        queue_tail = np.full(no_queues, -1, dtype=np.int64)
+        queue_free_time = np.zeros(no_queues, dtype=np.int64)
+        scores = np.zeros(no_schedules, dtype=np.int64)
+
+        def queue_of(cars):
+            return schedule_ids[cars] * no_windows + self.route_window[position[cars]]
+
+        def wake(cars, queues):
+            crossing_time[cars] = next_green_times(
+                np.maximum(arrival_time[cars], queue_free_time[queues]),
+                offsets[queues], durations[queues], cycles[queues], city.duration)
+
+        def enqueue(cars):
+            queues = queue_of(cars)
+            order = np.argsort(queues, kind="stable")
+            cars, queues = cars[order], queues[order]
+            first = np.ones(len(cars), dtype=bool)
+            first[1:] = queues[1:] != queues[:-1]
+            next_car[cars[:-1][~first[1:]]] = cars[1:][~first[1:]]
+            last = np.ones(len(cars), dtype=bool)
+            last[:-1] = first[1:]
+            cars, queues, heads = cars[first], queues[first], cars[last]
+            tails = queue_tail[queues]
+            next_car[tails[tails >= 0]] = cars[tails >= 0]
+            wake(cars[tails < 0], queues[tails < 0])
+            queue_tail[queues] = heads
+
+        enqueue(np.flatnonzero(position < last_position))
+        while True:
+            current_time = crossing_time.min()
+            if current_time == NEVER:
+                break
+            crossing = np.flatnonzero(crossing_time == current_time)
+            crossing_time[crossing] = NEVER
+
+            queues = queue_of(crossing)
+            queue_free_time[queues] = current_time + 1
+            following = next_car[crossing]
+            next_car[crossing] = -1
+            queue_tail[queues[following < 0]] = -1
+            wake(following[following >= 0], queues[following >= 0])
+
+            position[crossing] += 1
+            arrival_time[crossing] = current_time + self.route_length[position[crossing]]
+            finished = position[crossing] == last_position[crossing]
+            scored = crossing[finished][arrival_time[crossing[finished]] <= city.duration]
+            np.add.at(scores, schedule_ids[scored],
+                      city.car_value + city.duration - arrival_time[scored])
+            if not finished.all():
+                enqueue(crossing[~finished])
+
+        return scores.tolist()
+
+
+def next_green_times(current_times, starts, durations, cycle_durations, duration: int):
+    """
+    Vectorized next_green_time: earliest second, not before each given second, in which each street has a green light.
+
+    Parameters:
+        current_times: seconds from which the green lights are looked for
+        starts, durations, cycle_durations: green window of each street, see next_green_time
+        duration: simulation duration, later seconds are replaced by NEVER
+
+    Return:
+        array of next green seconds, NEVER for streets always red
+    """
+    offsets = current_times % cycle_durations
+    green_times = np.where(
+        offsets < starts,
+        current_times + starts - offsets,
+        np.where(offsets < starts + durations, current_times,
+                 current_times + cycle_durations - offsets + starts))
+    green_times[(durations <= 0) | (green_times > duration)] = NEVER
+    return green_times
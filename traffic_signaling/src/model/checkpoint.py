@@ -0,0 +1,134 @@
+import json
+import os
+from time import perf_counter
+import numpy as np
+from .schedule import Schedule
+
+MAGIC = b"TSCKPT01"
+
+
+class Checkpoint:
+    def __init__(self, algorithm: str, state: dict, schedules: dict = None, arrays: dict = None) -> None:
+        """
+        Constructor of Checkpoint class.
+        Full state of an optimizer run, from which the run can be resumed.
+
+        Properties:
+            algorithm (str): name of the optimizer
+            state (dict): scalar state of the run, as JSON serializable values: parameters, counters, random
+                          generator states
+            schedules (dict): lists of schedules of the run, by name, with their scores. Schedules already encoded
+                              as (Schedule.to_bytes(), score) tuples are written as they are, and read as schedules
+            arrays (dict): NumPy arrays of the run, by name
+        """
+        self.algorithm = algorithm
+        self.state = state
+        self.schedules = {} if schedules is None else schedules
+        self.arrays = {} if arrays is None else arrays
+
+    def to_bytes(self) -> bytes:
+        """
+        Binary encoding of the checkpoint: a JSON header with the scalar state and the layout of the sections,
+        followed by the sections. A list of schedules is a single section, the schedules encoded by
+        Schedule.to_bytes back to back, and an array is a section with its raw data.
+
+        Return:
+            encoded checkpoint
+        """
+        sections, layout, offset = [], {"schedules": {}, "arrays": {}}, 0
+        for name, schedules in self.schedules.items():
+            encoded = [schedule if isinstance(schedule, tuple) else (schedule.to_bytes(), schedule.last_score)
+                       for schedule in schedules]
+            layout["schedules"][name] = [offset, [len(data) for data, _ in encoded], [score for _, score in encoded]]
+            encoded = [data for data, _ in encoded]
+            sections.extend(encoded)
+            offset += sum(len(data) for data in encoded)
+        for name, array in self.arrays.items():
+            array = np.ascontiguousarray(array)
+            layout["arrays"][name] = [offset, array.dtype.str, len(array)]
+            sections.append(array.tobytes())
+            offset += array.nbytes
+        header = json.dumps({"algorithm": self.algorithm, "state": self.state, "layout": layout}).encode()
+        return b"".join([MAGIC, len(header).to_bytes(8, "little"), header, *sections])
+
+    def from_bytes(data: bytes):
+        """
+        Decode a checkpoint encoded by to_bytes.
+
+        Parameters:
+            data: the encoded checkpoint
+
+        Return:
+            decoded checkpoint
+        """
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Data does not hold an optimizer checkpoint")
+        header_length = int.from_bytes(data[len(MAGIC):len(MAGIC) + 8], "little")
+        data_start = len(MAGIC) + 8 + header_length
+        header = json.loads(data[len(MAGIC) + 8:data_start])
+
+        schedules = {}
+        for name, (offset, lengths, scores) in header["layout"]["schedules"].items():
+            schedules[name] = []
+            start = data_start + offset
+            for length, score in zip(lengths, scores):
+                schedules[name].append(Schedule.from_bytes(data[start:start + length], score))
+                start += length
+        arrays = {}
+        for name, (offset, dtype, length) in header["layout"]["arrays"].items():
+            arrays[name] = np.frombuffer(data, dtype=dtype, count=length, offset=data_start + offset).copy()
+        return Checkpoint(header["algorithm"], header["state"], schedules, arrays)
+
+    def write(self, checkpoint_file: str) -> None:
+        '''Write the checkpoint to a file, through a temporary file, so that an interrupted write never corrupts it'''
+        temporary_file = f"{checkpoint_file}.{os.getpid()}.tmp"
+        with open(temporary_file, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(temporary_file, checkpoint_file)
+
+    def read(checkpoint_file: str):
+        '''Read a checkpoint written by write'''
+        with open(checkpoint_file, "rb") as f:
+            return Checkpoint.from_bytes(f.read())
+
+
+class Checkpointer:
+    def __init__(self, checkpoint_file: str, interval: float = 5) -> None:
+        """
+        Constructor of Checkpointer class.
+        Periodically writes the checkpoints of an optimizer run to a file. Optimizers ask whether a checkpoint is
+        due between iterations, and only build it when it is, so the cost of checkpointing does not depend on the
+        number of iterations.
+
+        Properties:
+            checkpoint_file (str): path of the checkpoint file, overwritten by each checkpoint
+            interval (float): minimum number of seconds between checkpoints
+            last_write (float): instant of the last checkpoint
+            no_writes (int): number of checkpoints written
+        """
+        self.checkpoint_file = checkpoint_file
+        self.interval = interval
+        self.last_write = perf_counter()
+        self.no_writes = 0
+
+    def due(self) -> bool:
+        '''Whether a checkpoint should be written'''
+        return perf_counter() - self.last_write >= self.interval
+
+    def write(self, checkpoint: Checkpoint) -> None:
+        '''Write a checkpoint to the checkpoint file'''
+        checkpoint.write(self.checkpoint_file)
+        self.last_write = perf_counter()
+        self.no_writes += 1
+
+
+def rng_state(rng: np.random.Generator) -> dict:
+    '''JSON serializable state of a NumPy random generator'''
+    return rng.bit_generator.state
+
+
+def restore_rng(state: dict) -> np.random.Generator:
+    '''NumPy random generator in the state given by rng_state'''
+    bit_generator = getattr(np.random, state["bit_generator"])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
@@ -1,74 +1,135 @@
+from array import array
+from functools import cached_property
+from mmap import mmap, ACCESS_READ
+import numpy as np
 from .car import Car
 from .street import Street
 from .intersection import Intersection
+from .compiled_city import CompiledCity
+from .fitness_cache import FitnessCache
 
 
 class City:
     def __init__(self):
-        self.cars = []
-        self.streets = []
-        self.intersections = {}
-        self.street_intersection = {}
+        """
+        Constructor of City class.
+        The city is stored in its compiled form. Street, Car and Intersection objects are only
+        built when first accessed, e.g. by the viewer.
+
+        Properties:
+            street_names (list): name of each street, by street id
+            compiled (CompiledCity): array backed view of the city
+            fitness_cache (FitnessCache): scores of the schedules last evaluated in the city
+        """
+        self.street_names = []
         self.no_streets = 0
         self.duration = 0
         self.car_value = 0
         self.no_intersections = 0
+        self.compiled = None
+        self.fitness_cache = FitnessCache()
 
-    def from_input(input_file: str):
+    def from_input(input_file: str, memory_map: bool = False):
         """
         Read city from file, following Google's described format.
 
         Parameters:
             input_file: the input file path
+            memory_map: whether to memory map the file instead of reading it through a buffer
+
+        Return:
+            read city
+        """
+        with open(input_file, "rb") as f:
+            if not memory_map:
+                return City.from_lines(f)
+            with mmap(f.fileno(), 0, access=ACCESS_READ) as data:
+                return City.from_lines(iter(data.readline, b""))
+
+    def from_lines(lines):
+        """
+        Read city from the lines of an input file in a single pass, interning street names to ids
+        and filling the compiled city arrays on the fly.
+
+        Parameters:
+            lines: iterable of the file lines, as bytes
 
         Return:
             read city
         """
-        with open(input_file) as f:
-            lines = f.readlines()
-        lines = [line.strip('\n').split(' ') for line in lines]
+        lines = iter(lines)
+        duration, no_intersections, no_streets, no_cars, bonus = map(
+            int, next(lines).split())
 
         city = City()
-        duration, no_intersections, no_streets, no_cars, bonus = lines[0]
-        city.no_streets = int(no_streets)
-        city.car_value = int(bonus)
-        city.duration = int(duration)
-        city.no_intersections = int(no_intersections)
-
-        # add blank intersections
-        city.intersections = {intersection_id: Intersection(
-            intersection_id) for intersection_id in range(int(no_intersections))}
-
-        # connect intersections through streets
-        street_by_name = {}  # helper for later exploring cars
-        city_id = 0
-        for line in lines[1:1+int(no_streets)]:
-            start_intersection_id = int(line[0])
-            end_intersection_id = int(line[1])
-            street = Street(city_id, line[2], int(line[3]))
-            street_by_name[street.name] = street
-            city.streets.append(street)
-            city.intersections[start_intersection_id].outgoing_streets.add(
-                street)
-            city.intersections[end_intersection_id].incoming_streets.add(
-                street)
-            city_id += 1
-
-        # add cars
-        current_car = 0
-        for line in lines[1+int(no_streets):1+int(no_streets)+int(no_cars)]:
-            path = [street_by_name[name] for name in line[1:]]
-            car = Car(current_car, path)
-            city.cars.append(car)
-            current_car += 1
-
-        # calculate helper street intersection
-        for intersection_id in city.intersections:
-            for incoming_street in city.intersections[intersection_id].incoming_streets:
-                city.street_intersection[incoming_street.name] = intersection_id
+        city.no_streets = no_streets
+        city.car_value = bonus
+        city.duration = duration
+        city.no_intersections = no_intersections
+
+        street_start = np.empty(no_streets, dtype=np.int32)
+        street_end = np.empty(no_streets, dtype=np.int32)
+        street_length = np.empty(no_streets, dtype=np.int32)
+        street_ids = {}
+        for street_id in range(no_streets):
+            start, end, name, length = next(lines).split()
+            street_start[street_id] = int(start)
+            street_end[street_id] = int(end)
+            street_length[street_id] = int(length)
+            street_ids[name] = street_id
 
+        route_offsets = np.zeros(no_cars + 1, dtype=np.int64)
+        route_streets = array("i")
+        for car_id in range(no_cars):
+            route_streets.extend(
+                map(street_ids.__getitem__, next(lines).split()[1:]))
+            route_offsets[car_id + 1] = len(route_streets)
+
+        city.street_names = [name.decode() for name in street_ids]
+        city.compiled = CompiledCity(
+            duration,
+            bonus,
+            no_intersections,
+            street_start,
+            street_end,
+            street_length,
+            route_offsets,
+            np.frombuffer(route_streets, dtype=np.int32),
+        )
         return city
 
+    @cached_property
+    def street_ids(self) -> dict:
+        '''Street id of each street name'''
+        return dict(zip(self.street_names, range(self.no_streets)))
+
+    @cached_property
+    def streets(self) -> list:
+        '''Street objects, by street id'''
+        return [Street(street_id, name, length)
+                for street_id, (name, length) in enumerate(zip(self.street_names, self.compiled.street_length.tolist()))]
+
+    @cached_property
+    def cars(self) -> list:
+        '''Car objects, by car id'''
+        return [Car(car_id, [self.streets[street_id] for street_id in self.compiled.route(car_id).tolist()])
+                for car_id in range(self.compiled.no_cars)]
+
+    @cached_property
+    def intersections(self) -> dict:
+        '''Intersection objects, by intersection id'''
+        intersections = {intersection_id: Intersection(intersection_id)
+                         for intersection_id in range(self.no_intersections)}
+        for street, start, end in zip(self.streets, self.compiled.street_start.tolist(), self.compiled.street_end.tolist()):
+            intersections[start].outgoing_streets.add(street)
+            intersections[end].incoming_streets.add(street)
+        return intersections
+
+    @cached_property
+    def street_intersection(self) -> dict:
+        '''Intersection each street ends at, by street name'''
+        return dict(zip(self.street_names, self.compiled.street_end.tolist()))
+
     def __str__(self):
         s = ""
         s += "Duration: " + str(self.duration) + "\n"
@@ -0,0 +1,164 @@
+import json
+import os
+from hashlib import blake2b
+import numpy as np
+from .city import City
+from .compiled_city import CompiledCity
+
+CACHE_PATH = "traffic_signaling/asset/cache"
+MAGIC = b"TSCITY01"
+ALIGNMENT = 64
+ARRAYS = ["street_start", "street_end", "street_length",
+          "route_offsets", "route_streets"]
+
+
+def load_city(input_file: str, cache_path: str = CACHE_PATH) -> City:
+    """
+    Load a city, using the compiled city cache.
+    On the first load of an input the city is parsed and written to the cache, keyed by the input content hash.
+    Later loads memory map the cached file instead of parsing the input. Changing the input changes its key,
+    so stale entries are never read.
+
+    Parameters:
+        input_file: the input file path, following Google's described format
+        cache_path: directory holding the cached cities
+
+    Return:
+        loaded city
+    """
+    cache_file = f"{cache_path}/{input_hash(input_file)}.city"
+    if os.path.exists(cache_file):
+        return read_city(cache_file)
+    city = City.from_input(input_file)
+    os.makedirs(cache_path, exist_ok=True)
+    write_city(city, cache_file)
+    return city
+
+
+def input_hash(input_file: str) -> str:
+    """
+    Hash of the content of a file.
+
+    Parameters:
+        input_file: the file path
+
+    Return:
+        hexadecimal digest
+    """
+    digest = blake2b(MAGIC, digest_size=16)
+    with open(input_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_city(city: City, cache_file: str) -> None:
+    """
+    Write a city to a binary file: a header describing the arrays, followed by the raw arrays, aligned.
+    The file is written to a temporary path and then moved, so that readers never see a partial file.
+
+    Parameters:
+        city: city to write
+        cache_file: path of the file to create
+    """
+    temporary_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(temporary_file, "wb") as f:
+        f.write(city_to_bytes(city))
+    os.replace(temporary_file, cache_file)
+
+
+def city_to_bytes(city: City) -> bytes:
+    """
+    Encode a city in the binary format of the cache: a header describing the arrays, followed by the raw arrays,
+    aligned.
+
+    Parameters:
+        city: city to encode
+
+    Return:
+        encoded city
+    """
+    arrays = {name: np.ascontiguousarray(getattr(city.compiled, name))
+              for name in ARRAYS}
+    arrays["street_names"] = np.frombuffer(
+        "\n".join(city.street_names).encode(), dtype=np.uint8)
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = [array.dtype.str, len(array), offset]
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({
+        "duration": city.duration,
+        "car_value": city.car_value,
+        "no_intersections": city.no_intersections,
+        "arrays": layout,
+    }).encode()
+
+    data_start = aligned_data_start(len(header))
+    data = bytearray(data_start + offset)
+    prefix = MAGIC + len(header).to_bytes(8, "little") + header
+    data[:len(prefix)] = prefix
+    for name, array in arrays.items():
+        start = data_start + layout[name][2]
+        data[start:start + array.nbytes] = array.tobytes()
+    return bytes(data)
+
+
+def read_city(cache_file: str) -> City:
+    """
+    Read a city written by write_city, memory mapping its arrays.
+
+    Parameters:
+        cache_file: the cached city path
+
+    Return:
+        read city
+    """
+    with open(cache_file, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{cache_file} is not a cached city")
+    return city_from_buffer(np.memmap(cache_file, dtype=np.uint8, mode="r"))
+
+
+def city_from_buffer(data: np.ndarray) -> City:
+    """
+    Decode a city encoded by city_to_bytes. The city arrays are views of the buffer, not copies.
+
+    Parameters:
+        data: uint8 array holding the encoded city
+
+    Return:
+        decoded city
+    """
+    if data[:len(MAGIC)].tobytes() != MAGIC:
+        raise ValueError("Buffer does not hold an encoded city")
+    header_length = int.from_bytes(
+        data[len(MAGIC):len(MAGIC) + 8].tobytes(), "little")
+    header = json.loads(
+        data[len(MAGIC) + 8:len(MAGIC) + 8 + header_length].tobytes())
+
+    data_start = aligned_data_start(header_length)
+    arrays = {}
+    for name, (dtype, length, offset) in header["arrays"].items():
+        start = data_start + offset
+        arrays[name] = data[start:start + length *
+                            np.dtype(dtype).itemsize].view(dtype)
+
+    city = City()
+    city.duration = header["duration"]
+    city.car_value = header["car_value"]
+    city.no_intersections = header["no_intersections"]
+    city.no_streets = len(arrays["street_length"])
+    city.street_names = arrays["street_names"].tobytes().decode().split("\n")
+    city.compiled = CompiledCity(
+        city.duration,
+        city.car_value,
+        city.no_intersections,
+        *(arrays[name] for name in ARRAYS),
+    )
+    return city
+
+
+def aligned_data_start(header_length: int) -> int:
+    '''Offset of the first array in a cached city file, given the header length'''
+    return -(-(len(MAGIC) + 8 + header_length) // ALIGNMENT) * ALIGNMENT
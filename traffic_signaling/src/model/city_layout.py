@@ -0,0 +1,238 @@
+import os
+from hashlib import blake2b
+import numpy as np
+from .city import City
+from .city_cache import CACHE_PATH
+
+MAGIC = b"TSLAYOUT01"
+LAYOUT_ITERATIONS = 100
+LAYOUT_SEED = 0
+FAR_GRID_SIZE = 16
+FAR_CHUNK_SIZE = 2048
+INDEX_CELL_SIZE = 2
+
+
+def load_layout(city: City, cache_path: str = CACHE_PATH, iterations: int = LAYOUT_ITERATIONS) -> np.ndarray:
+    """
+    Position of each intersection of a city, using the layout cache.
+    The layout is computed on the first request for a street network, and written to the cache, keyed by the
+    hash of the network, so later requests, for the same city or for any city with the same streets, read it.
+
+    Parameters:
+        city: the city to lay out
+        cache_path: directory holding the cached layouts
+        iterations: number of iterations of the layout
+
+    Return:
+        (no_intersections, 2) array of positions, about one intersection per unit of area
+    """
+    cache_file = f"{cache_path}/{layout_hash(city, iterations)}.layout"
+    if os.path.exists(cache_file):
+        with open(cache_file, "rb") as f:
+            return np.load(f)
+    positions = force_directed_layout(city.no_intersections, city.compiled.street_start,
+                                      city.compiled.street_end, iterations)
+    os.makedirs(cache_path, exist_ok=True)
+    temporary_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(temporary_file, "wb") as f:
+        np.save(f, positions)
+    os.replace(temporary_file, cache_file)
+    return positions
+
+
+def layout_hash(city: City, iterations: int) -> str:
+    '''Hash of the street network of a city and of the layout parameters'''
+    digest = blake2b(MAGIC, digest_size=16)
+    digest.update(np.array([city.no_intersections, iterations, LAYOUT_SEED], dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(city.compiled.street_start).tobytes())
+    digest.update(np.ascontiguousarray(city.compiled.street_end).tobytes())
+    return digest.hexdigest()
+
+
+def force_directed_layout(no_nodes: int, edge_start, edge_end, iterations: int = LAYOUT_ITERATIONS,
+                          rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Fruchterman-Reingold layout of a graph, ignoring edge directions. Edges pull their nodes together and nodes
+    push each other away. The repulsion of close nodes, in neighbouring cells of a fine grid, is computed pair by
+    pair, and the repulsion of distant ones is approximated by the mass of the cells of a coarse grid, so each
+    iteration takes linear time, instead of quadratic, and the whole layout is vectorized.
+
+    Parameters:
+        no_nodes: number of nodes of the graph
+        edge_start: start node of each edge
+        edge_end: end node of each edge
+        iterations: number of iterations, along which the moves get shorter
+        rng: random generator of the initial positions, seeded with LAYOUT_SEED if None
+
+    Return:
+        (no_nodes, 2) array of positions, from the origin, scaled so that each node gets about one unit of area
+    """
+    rng = np.random.default_rng(LAYOUT_SEED) if rng is None else rng
+    edges = np.unique(np.sort(np.column_stack([edge_start, edge_end]).astype(np.int64), axis=1), axis=0)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    edge_start, edge_end = edges[:, 0], edges[:, 1]
+    side = max(np.sqrt(no_nodes), 1)
+    positions = rng.random((no_nodes, 2)) * side
+    temperature = side / 10
+    cooling = (0.01 / side) ** (1 / max(iterations, 1))
+
+    for _ in range(iterations):
+        displacement = far_repulsion(positions)
+
+        cutoff = 2 * node_spacing(positions)
+        nodes, neighbours = neighbour_pairs(positions, cutoff)
+        delta = positions[nodes] - positions[neighbours]
+        squared_distance = np.maximum(np.einsum("ij,ij->i", delta, delta), 1e-4)
+        close = squared_distance < cutoff * cutoff
+        force = delta[close] / squared_distance[close, None]
+        for axis in range(2):
+            displacement[:, axis] += np.bincount(nodes[close], force[:, axis], minlength=no_nodes)
+
+        delta = positions[edge_end] - positions[edge_start]
+        force = delta * np.sqrt(np.einsum("ij,ij->i", delta, delta))[:, None]
+        for axis in range(2):
+            displacement[:, axis] += np.bincount(edge_start, force[:, axis], minlength=no_nodes)
+            displacement[:, axis] -= np.bincount(edge_end, force[:, axis], minlength=no_nodes)
+
+        length = np.maximum(np.sqrt(np.einsum("ij,ij->i", displacement, displacement)), 1e-9)
+        positions += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature *= cooling
+
+    if no_nodes == 0:
+        return positions
+    return (positions - positions.min(axis=0)) / node_spacing(positions)
+
+
+def node_spacing(positions: np.ndarray) -> float:
+    '''Side of the square each node would get if the nodes were evenly spread over their bounding box'''
+    extent = np.maximum(positions.max(axis=0) - positions.min(axis=0), 1e-9)
+    return max(np.sqrt(extent[0] * extent[1] / len(positions)), 1e-9)
+
+
+def far_repulsion(positions: np.ndarray, grid_size: int = FAR_GRID_SIZE) -> np.ndarray:
+    """
+    Repulsion of every node by all the others, approximated by placing the nodes of each cell of a coarse grid at
+    their centroid. The distance is softened by the cell size, so a node is not pushed away by its own cell.
+
+    Parameters:
+        positions: (n, 2) array of node positions
+        grid_size: number of cells of the grid along each axis
+
+    Return:
+        (n, 2) array of forces
+    """
+    if len(positions) == 0:
+        return np.zeros((0, 2))
+    low = positions.min(axis=0)
+    cell_size = max((positions.max(axis=0) - low).max() / grid_size, 1e-9)
+    cells = np.minimum(((positions - low) / cell_size).astype(np.int64), grid_size - 1)
+    cells = cells[:, 0] * grid_size + cells[:, 1]
+    mass = np.bincount(cells, minlength=grid_size * grid_size)
+    used = np.flatnonzero(mass)
+    centroids = np.column_stack([np.bincount(cells, positions[:, axis], minlength=grid_size * grid_size)[used]
+                                 for axis in range(2)]) / mass[used, None]
+
+    forces = np.empty_like(positions)
+    for start in range(0, len(positions), FAR_CHUNK_SIZE):
+        delta = positions[start:start + FAR_CHUNK_SIZE, None, :] - centroids[None, :, :]
+        weight = mass[used] / (np.einsum("ijk,ijk->ij", delta, delta) + cell_size * cell_size)
+        forces[start:start + FAR_CHUNK_SIZE] = np.einsum("ij,ijk->ik", weight, delta)
+    return forces
+
+
+def neighbour_pairs(positions: np.ndarray, cell_size: float):
+    """
+    Pairs of distinct points lying in the same or in adjacent cells of a grid, which include every pair of points
+    closer than the cell size.
+
+    Parameters:
+        positions: (n, 2) array of points
+        cell_size: side of the grid cells
+
+    Return:
+        tuple of arrays with the first and second point of each pair. Both orders of a pair are included
+    """
+    cells = np.floor((positions - positions.min(axis=0)) / cell_size).astype(np.int64) + 1
+    height = cells[:, 1].max() + 2 if len(cells) else 1
+    keys = cells[:, 0] * height + cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    first, second = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            neighbour_keys = keys + dx * height + dy
+            starts = np.searchsorted(sorted_keys, neighbour_keys, "left")
+            counts = np.searchsorted(sorted_keys, neighbour_keys, "right") - starts
+            points = np.repeat(np.arange(len(keys)), counts)
+            ranks = np.arange(len(points)) - np.repeat(np.cumsum(counts) - counts, counts)
+            neighbours = order[np.repeat(starts, counts) + ranks]
+            distinct = points != neighbours
+            first.append(points[distinct])
+            second.append(neighbours[distinct])
+    return np.concatenate(first), np.concatenate(second)
+
+
+class SpatialIndex:
+    def __init__(self, segment_start, segment_end, cell_size: float = INDEX_CELL_SIZE) -> None:
+        """
+        Constructor of SpatialIndex class.
+        Uniform grid over a set of segments, like the streets of a laid out city, to find the ones inside a
+        rectangle, like the visible part of the city, without going through all of them. Each cell lists the
+        segments whose bounding box overlaps it.
+
+        Properties:
+            cell_size (float): side of the grid cells
+            origin (ndarray): lowest corner of the grid
+            shape (tuple): number of cells along each axis
+            cell_offsets (ndarray): segments of cell c are cell_segments[cell_offsets[c]:cell_offsets[c + 1]]
+            cell_segments (ndarray): segment ids, grouped by cell
+        """
+        segment_start = np.asarray(segment_start, dtype=np.float64).reshape(-1, 2)
+        segment_end = np.asarray(segment_end, dtype=np.float64).reshape(-1, 2)
+        low = np.minimum(segment_start, segment_end)
+        high = np.maximum(segment_start, segment_end)
+        self.cell_size = cell_size
+        self.origin = low.min(axis=0) if len(low) else np.zeros(2)
+        low_cells = self.cell(low)
+        high_cells = self.cell(high)
+        self.shape = tuple(high_cells.max(axis=0) + 1) if len(high) else (1, 1)
+
+        spans = high_cells - low_cells + 1
+        counts = spans[:, 0] * spans[:, 1]
+        segments = np.repeat(np.arange(len(counts)), counts)
+        ranks = np.arange(len(segments)) - np.repeat(np.cumsum(counts) - counts, counts)
+        xs = low_cells[segments, 0] + ranks // spans[segments, 1]
+        ys = low_cells[segments, 1] + ranks % spans[segments, 1]
+        cells = xs * self.shape[1] + ys
+        order = np.argsort(cells, kind="stable")
+        self.cell_segments = segments[order].astype(np.int32)
+        self.cell_offsets = np.zeros(self.shape[0] * self.shape[1] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self.shape[0] * self.shape[1]), out=self.cell_offsets[1:])
+
+    def cell(self, points: np.ndarray) -> np.ndarray:
+        '''Grid cell of each point, along each axis'''
+        return np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+
+    def query(self, low, high) -> np.ndarray:
+        """
+        Segments whose bounding box overlaps a rectangle.
+
+        Parameters:
+            low: lowest corner of the rectangle
+            high: highest corner of the rectangle
+
+        Return:
+            array of segment ids, by ascending id
+        """
+        low_cell = np.maximum(self.cell(np.asarray(low, dtype=np.float64)), 0)
+        high_cell = np.minimum(self.cell(np.asarray(high, dtype=np.float64)), np.array(self.shape) - 1)
+        if (high_cell < low_cell).any():
+            return np.empty(0, dtype=np.int32)
+        xs, ys = np.meshgrid(np.arange(low_cell[0], high_cell[0] + 1),
+                             np.arange(low_cell[1], high_cell[1] + 1), indexing="ij")
+        cells = (xs * self.shape[1] + ys).ravel()
+        starts = self.cell_offsets[cells]
+        counts = self.cell_offsets[cells + 1] - starts
+        ranks = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.unique(self.cell_segments[np.repeat(starts, counts) + ranks])
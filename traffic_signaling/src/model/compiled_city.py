@@ -0,0 +1,99 @@
+import numpy as np
+
+
+class CompiledCity:
+    def __init__(self, duration: int, car_value: int, no_intersections: int, street_start, street_end,
+                 street_length, route_offsets, route_streets) -> None:
+        """
+        Constructor of CompiledCity class.
+        Immutable, array backed, view of a city. Streets are identified by their id, cars by their index.
+
+        Properties:
+            duration (int): simulation duration, in seconds
+            car_value (int): bonus given for each car that finishes its path
+            no_intersections, no_streets, no_cars (int): sizes of the city
+            street_start (ndarray): intersection each street starts from
+            street_end (ndarray): intersection each street ends at
+            street_length (ndarray): seconds needed to drive through each street
+            route_offsets (ndarray): route of car c is route_streets[route_offsets[c]:route_offsets[c + 1]]
+            route_streets (ndarray): street ids of all car routes, back to back
+            incoming_offsets (ndarray): incoming streets of intersection i are
+                                        incoming_streets[incoming_offsets[i]:incoming_offsets[i + 1]]
+            incoming_streets (ndarray): street ids, grouped by the intersection they end at
+            street_demand (ndarray): number of cars that cross the end of each street. Cars leave the city when
+                                     they enter their last street, so it does not count
+            used_offsets (ndarray): used incoming streets of intersection i are
+                                    used_streets[used_offsets[i]:used_offsets[i + 1]]
+            used_streets (ndarray): incoming street ids with some demand, grouped by the intersection they end at
+            used_intersections (ndarray): ids of the intersections with some used incoming street. Green cycles of
+                                          other intersections do not change the score
+        """
+        self.duration = duration
+        self.car_value = car_value
+        self.no_intersections = no_intersections
+        self.street_start = np.asarray(street_start, dtype=np.int32)
+        self.street_end = np.asarray(street_end, dtype=np.int32)
+        self.street_length = np.asarray(street_length, dtype=np.int32)
+        self.route_offsets = np.asarray(route_offsets, dtype=np.int64)
+        self.route_streets = np.asarray(route_streets, dtype=np.int32)
+        self.no_streets = len(self.street_length)
+        self.no_cars = len(self.route_offsets) - 1
+
+        self.incoming_streets = np.argsort(
+            self.street_end, kind="stable").astype(np.int32)
+        self.incoming_offsets = np.zeros(
+            self.no_intersections + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.street_end, minlength=self.no_intersections),
+                  out=self.incoming_offsets[1:])
+
+        crossed = np.ones(len(self.route_streets), dtype=bool)
+        crossed[self.route_offsets[1:] - 1] = False
+        self.street_demand = np.bincount(
+            self.route_streets[crossed], minlength=self.no_streets).astype(np.int32)
+        self.used_streets = self.incoming_streets[self.street_demand[self.incoming_streets] > 0]
+        self.used_offsets = np.zeros(self.no_intersections + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.street_end[self.used_streets], minlength=self.no_intersections),
+                  out=self.used_offsets[1:])
+        self.used_intersections = np.flatnonzero(
+            np.diff(self.used_offsets) > 0).astype(np.int32)
+
+        for array in (self.street_start, self.street_end, self.street_length, self.route_offsets,
+                      self.route_streets, self.incoming_streets, self.incoming_offsets, self.street_demand,
+                      self.used_streets, self.used_offsets, self.used_intersections):
+            array.flags.writeable = False
+
+    def route(self, car_id: int):
+        """
+        Route of a car.
+
+        Parameters:
+            car_id: index of the car
+
+        Return:
+            array of street ids
+        """
+        return self.route_streets[self.route_offsets[car_id]:self.route_offsets[car_id + 1]]
+
+    def incoming(self, intersection_id: int):
+        """
+        Incoming streets of an intersection.
+
+        Parameters:
+            intersection_id: id of the intersection
+
+        Return:
+            array of street ids, by ascending id
+        """
+        return self.incoming_streets[self.incoming_offsets[intersection_id]:self.incoming_offsets[intersection_id + 1]]
+
+    def used_incoming(self, intersection_id: int):
+        """
+        Incoming streets of an intersection that some car crosses the end of.
+
+        Parameters:
+            intersection_id: id of the intersection
+
+        Return:
+            array of street ids, by ascending id
+        """
+        return self.used_streets[self.used_offsets[intersection_id]:self.used_offsets[intersection_id + 1]]
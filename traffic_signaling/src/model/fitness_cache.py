@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+
+class FitnessCache:
+    def __init__(self, max_size: int = 4096) -> None:
+        """
+        Constructor of FitnessCache class.
+        Bounded least recently used cache of schedule scores, keyed by schedule fingerprint.
+
+        Properties:
+            max_size (int): max number of cached scores, 0 to disable the cache
+            scores (OrderedDict): cached scores by fingerprint, least recently used first
+            hits (int): number of lookups that found a score
+            misses (int): number of lookups that did not find a score
+        """
+        self.max_size = max_size
+        self.scores = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint: int):
+        """
+        Look up the score of a schedule.
+
+        Parameters:
+            fingerprint: the schedule fingerprint
+
+        Return:
+            cached score, None if the schedule is not cached
+        """
+        score = self.scores.get(fingerprint)
+        if score is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.scores.move_to_end(fingerprint)
+        return score
+
+    def put(self, fingerprint: int, score: int) -> None:
+        """
+        Cache the score of a schedule, evicting the least recently used score if the cache is full.
+
+        Parameters:
+            fingerprint: the schedule fingerprint
+            score: the schedule score
+        """
+        if self.max_size <= 0:
+            return
+        self.scores[fingerprint] = score
+        self.scores.move_to_end(fingerprint)
+        if len(self.scores) > self.max_size:
+            self.scores.popitem(last=False)
+
+    def clear(self) -> None:
+        '''Remove every cached score and reset the counters'''
+        self.scores.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __str__(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0
+        return f"{len(self.scores)} cached scores, {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate)"
@@ -0,0 +1,118 @@
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+
+class GreenCycle:
+    __slots__ = ("streets", "durations", "offsets", "hash")
+
+    def __init__(self, streets=(), durations=()):
+        """
+        Constructor of GreenCycle class.
+        A compact, integer indexed, green light cycle of an intersection.
+        Streets with no green time are left out of the cycle.
+        Green cycles are immutable, so that schedules can share them.
+
+        Properties:
+            streets (array): ids of the streets, in the order their lights turn green
+            durations (array): green time of each street, in seconds
+            offsets (array): second of the cycle in which each street turns green, followed by the cycle duration
+            hash (int): hash of the cycle, computed when first needed
+        """
+        pairs = [(street_id, duration)
+                 for street_id, duration in zip(streets, durations) if duration > 0]
+        self.streets = array("i", [street_id for street_id, _ in pairs])
+        self.durations = array("i", [duration for _, duration in pairs])
+        self.offsets = array("i", accumulate(self.durations, initial=0))
+        self.hash = None
+
+    def from_street_names(green_cycle: list, city):
+        """
+        Build a green cycle from a list holding the green street name of every second of the cycle.
+
+        Parameters:
+            green_cycle: list of street names, one per second of the cycle
+            city: the city the streets belong to
+
+        Return:
+            equivalent green cycle
+        """
+        streets, durations = [], []
+        for name in green_cycle:
+            street_id = city.street_ids[name]
+            if streets and streets[-1] == street_id:
+                durations[-1] += 1
+                continue
+            if street_id in streets:
+                raise ValueError(
+                    f"Street {name} has more than one green block in the cycle")
+            streets.append(street_id)
+            durations.append(1)
+        return GreenCycle(streets, durations)
+
+    def to_street_names(self, city) -> list:
+        """
+        Expand the green cycle into a list holding the green street name of every second of the cycle.
+
+        Parameters:
+            city: the city the streets belong to
+
+        Return:
+            list of street names, one per second of the cycle
+        """
+        return [city.street_names[street_id]
+                for street_id, duration in self.pairs()
+                for _ in range(duration)]
+
+    def pairs(self):
+        """
+        Iterate the cycle.
+
+        Return:
+            iterator of (street id, green duration) pairs, in cycle order
+        """
+        return zip(self.streets, self.durations)
+
+    def green_street(self, current_time: int):
+        """
+        Street with green light on a given second.
+
+        Parameters:
+            current_time: simulation second
+
+        Return:
+            id of the street with green light, None if the cycle is empty
+        """
+        if not self.streets:
+            return None
+        offset = current_time % self.offsets[-1]
+        return self.streets[bisect_right(self.offsets, offset) - 1]
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __getstate__(self):
+        return self.streets.tobytes() + self.durations.tobytes()
+
+    def __setstate__(self, state):
+        half = len(state) // 2
+        self.streets, self.durations = array("i"), array("i")
+        self.streets.frombytes(state[:half])
+        self.durations.frombytes(state[half:])
+        self.offsets = array("i", accumulate(self.durations, initial=0))
+        self.hash = None
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def __eq__(self, other):
+        return isinstance(other, GreenCycle) and other.streets == self.streets \
+            and other.durations == self.durations
+
+    def __hash__(self):
+        if self.hash is None:
+            self.hash = hash(self.streets.tobytes() + self.durations.tobytes())
+        return self.hash
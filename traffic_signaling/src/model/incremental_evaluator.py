@@ -0,0 +1,284 @@
+from bisect import bisect_left, insort
+from heapq import heappush, heappop
+from sys import maxsize
+from .city import City
+from .schedule import Schedule
+from .simulator import simulate, next_green_time
+
+NEVER = maxsize
+FULL_PASS = (-2,)
+UPDATE_WORK_FRACTION = 0.25
+
+
+class IncrementalEvaluator:
+    def __init__(self, city: City, schedule: Schedule) -> None:
+        """
+        Constructor of IncrementalEvaluator class.
+        Keeps the simulation trace of a base schedule, so that schedules differing from it in a few
+        intersections are scored by re-simulating only the streets and cars affected by the change.
+
+        Properties:
+            city (CompiledCity): the simulated city
+            fitness_cache (FitnessCache): cache of the scores of evaluated schedules
+            schedule (Schedule): the base schedule
+            score (int): score of the base schedule
+            green_windows (dict): green window of each street id on the base schedule
+            crossing_times (list): aligned with the city routes, the second each car leaves each street of its
+                                   route (NEVER if it does not)
+            street_entries (list): for each street, sorted (entering second, car id, route index) of its cars.
+                                   Cars start on their first street at second -1
+        """
+        self.city = city.compiled
+        self.fitness_cache = city.fitness_cache
+        self.route_streets = self.city.route_streets.tolist()
+        self.route_offsets = self.city.route_offsets.tolist()
+        self.street_length = self.city.street_length.tolist()
+        self.rebuild(schedule)
+
+    def rebuild(self, schedule: Schedule) -> int:
+        """
+        Fully simulate a new base schedule, recording its trace.
+
+        Parameters:
+            schedule: the new base schedule
+
+        Return:
+            schedule score
+        """
+        self.schedule = schedule
+        self.green_windows = schedule.green_windows()
+        self.crossing_times = [NEVER for _ in self.route_streets]
+        self.score = simulate(
+            self.city, self.green_windows, self.crossing_times)
+        schedule.last_score = self.score
+
+        self.street_entries = [[] for _ in range(self.city.no_streets)]
+        for car_id in range(self.city.no_cars):
+            start, end = self.route_offsets[car_id], self.route_offsets[car_id + 1]
+            self.street_entries[self.route_streets[start]].append(
+                (-1, car_id, start))
+            for index in range(start + 1, end - 1):
+                entering_time = self.crossing_times[index - 1]
+                if entering_time == NEVER:
+                    break
+                self.street_entries[self.route_streets[index]].append(
+                    (entering_time, car_id, index))
+        for entries in self.street_entries:
+            entries.sort()
+        return self.score
+
+    def evaluate(self, schedule: Schedule) -> int:
+        """
+        Score a schedule derived from the base one, leaving the base untouched.
+        Scores are looked up in the fitness cache first, by schedule fingerprint.
+
+        Parameters:
+            schedule: schedule to evaluate
+
+        Return:
+            schedule score
+        """
+        score = self.fitness_cache.get(schedule.fingerprint)
+        if score is None:
+            changed = self.changed_intersections(schedule)
+            score_diff, undo = None, []
+            if len(changed) <= len(self.schedule.schedule) // 2:
+                score_diff = self.update(schedule, changed, undo)
+                self.rollback(undo)
+            if score_diff is None:
+                score = simulate(self.city, schedule.green_windows())
+            else:
+                score = self.score + score_diff
+            self.fitness_cache.put(schedule.fingerprint, score)
+        schedule.last_score = score
+        return score
+
+    def rebase(self, schedule: Schedule) -> int:
+        """
+        Make a schedule derived from the base one the new base, updating the trace incrementally.
+
+        Parameters:
+            schedule: the new base schedule
+
+        Return:
+            schedule score
+        """
+        changed = self.changed_intersections(schedule)
+        if len(changed) > len(self.schedule.schedule) // 2:
+            return self.rebuild(schedule)
+        undo = []
+        score_diff = self.update(schedule, changed, undo)
+        if score_diff is None:
+            self.rollback(undo)
+            return self.rebuild(schedule)
+        self.score += score_diff
+        self.schedule = schedule
+        schedule.last_score = self.score
+        return self.score
+
+    def changed_intersections(self, schedule: Schedule) -> list:
+        """
+        Intersections whose green cycle differs from the base schedule.
+
+        Parameters:
+            schedule: schedule to compare with the base one
+
+        Return:
+            list of intersection ids
+        """
+        base = self.schedule.schedule
+        changed = [intersection_id for intersection_id, green_cycle in schedule.schedule.items()
+                   if base.get(intersection_id) is not green_cycle and base.get(intersection_id) != green_cycle]
+        changed += [intersection_id for intersection_id in base
+                    if intersection_id not in schedule.schedule]
+        return changed
+
+    def update(self, schedule: Schedule, changed: list, undo: list) -> int:
+        """
+        Apply the green cycles of the changed intersections to the trace, propagating the new crossing
+        times downstream in chronological order until they match the recorded ones.
+        On congested cities a change may ripple through most of the trace, and updating it costs more than a full
+        simulation. The update gives up once it has applied UPDATE_WORK_FRACTION operations per route entry;
+        the applied operations must then be rolled back, and the schedule fully simulated instead.
+
+        Parameters:
+            schedule: schedule with the new green cycles
+            changed: ids of the intersections to update
+            undo: list where the applied operations are recorded, see rollback
+
+        Return:
+            score difference to the base schedule, None if the update gave up
+        """
+        changed_streets = set()
+        for intersection_id in changed:
+            for green_cycle in (self.schedule.schedule.get(intersection_id), schedule.schedule.get(intersection_id)):
+                if green_cycle is not None:
+                    changed_streets.update(green_cycle.streets)
+        for street_id in changed_streets:
+            undo.append(("window", street_id,
+                        self.green_windows.pop(street_id, None)))
+        for intersection_id in changed:
+            green_cycle = schedule.schedule.get(intersection_id)
+            if green_cycle is None:
+                continue
+            for street_id, offset, duration in zip(green_cycle.streets, green_cycle.offsets, green_cycle.durations):
+                self.green_windows[street_id] = (
+                    offset, duration, len(green_cycle))
+
+        score_diff = 0
+        work_limit = len(undo) + int(len(self.route_streets) * UPDATE_WORK_FRACTION)
+        pending = [(FULL_PASS, street_id) for street_id in changed_streets]
+        while pending:
+            if len(undo) > work_limit:
+                return None
+            key, street_id = heappop(pending)
+            changes = self.resimulate_street(street_id, key, undo)
+            while changes:
+                car_id, index, old_time, new_time = changes.pop()
+                if index == self.route_offsets[car_id + 1] - 2:
+                    score_diff += self.car_score(car_id, new_time) - \
+                        self.car_score(car_id, old_time)
+                    continue
+                next_street_id = self.route_streets[index + 1]
+                entries = self.street_entries[next_street_id]
+                if old_time != NEVER:
+                    entry = (old_time, car_id, index + 1)
+                    del entries[bisect_left(entries, entry)]
+                    undo.append(("remove", next_street_id, entry))
+                    heappush(pending, ((old_time, car_id), next_street_id))
+                if new_time != NEVER:
+                    entry = (new_time, car_id, index + 1)
+                    insort(entries, entry)
+                    undo.append(("insert", next_street_id, entry))
+                    heappush(pending, ((new_time, car_id), next_street_id))
+                elif self.crossing_times[index + 1] != NEVER:
+                    # the car no longer reaches the next street, neither the rest of its route
+                    changes.append(
+                        (car_id, index + 1, self.crossing_times[index + 1], NEVER))
+                    undo.append(
+                        ("crossing", index + 1, self.crossing_times[index + 1]))
+                    self.crossing_times[index + 1] = NEVER
+        return score_diff
+
+    def resimulate_street(self, street_id: int, key: tuple, undo: list) -> list:
+        """
+        Recompute the crossing times of the cars of a street, from the car with given entry key onward.
+        Stops at the first unchanged car after the keyed one, unless a full pass is requested. The keyed car itself
+        may have just moved in the street order, so the cars now behind it must be recomputed even if its own
+        crossing time is unchanged.
+
+        Parameters:
+            street_id: street to re-simulate
+            key: (entering second, car id) of the first car to recompute, FULL_PASS for the whole street
+            undo: list where the applied operations are recorded, see rollback
+
+        Return:
+            list of (car id, route index, old crossing time, new crossing time) of the changed cars
+        """
+        entries = self.street_entries[street_id]
+        index = bisect_left(entries, key)
+        free_time = 0
+        if index > 0:
+            free_time = self.crossing_times[entries[index - 1][2]] + 1
+
+        green_window = self.green_windows.get(street_id)
+        length = self.street_length[street_id]
+        duration = self.city.duration
+        changes = []
+        for entering_time, car_id, route_index in entries[index:]:
+            if green_window is None or free_time > NEVER:
+                new_time = NEVER
+            else:
+                arrival_time = 0 if entering_time < 0 else entering_time + length
+                new_time = next_green_time(
+                    max(arrival_time, free_time), green_window)
+                if new_time > duration:
+                    new_time = NEVER
+            old_time = self.crossing_times[route_index]
+            if new_time == old_time and key is not FULL_PASS and (entering_time, car_id) != key:
+                break
+            if new_time != old_time:
+                self.crossing_times[route_index] = new_time
+                undo.append(("crossing", route_index, old_time))
+                changes.append((car_id, route_index, old_time, new_time))
+            free_time = new_time + 1
+        return changes
+
+    def car_score(self, car_id: int, crossing_time: int) -> int:
+        """
+        Score of a car given the second it enters the last street of its route.
+
+        Parameters:
+            car_id: id of the car
+            crossing_time: second the car enters its last street
+
+        Return:
+            car score
+        """
+        if crossing_time == NEVER:
+            return 0
+        arrival_time = crossing_time + \
+            self.street_length[self.route_streets[self.route_offsets[car_id + 1] - 1]]
+        if arrival_time > self.city.duration:
+            return 0
+        return self.city.car_value + self.city.duration - arrival_time
+
+    def rollback(self, undo: list) -> None:
+        """
+        Revert the operations recorded during an update.
+
+        Parameters:
+            undo: list of recorded operations
+        """
+        for operation in reversed(undo):
+            if operation[0] == "crossing":
+                self.crossing_times[operation[1]] = operation[2]
+            elif operation[0] == "insert":
+                entries = self.street_entries[operation[1]]
+                del entries[bisect_left(entries, operation[2])]
+            elif operation[0] == "remove":
+                insort(self.street_entries[operation[1]], operation[2])
+            elif operation[2] is None:
+                self.green_windows.pop(operation[1], None)
+            else:
+                self.green_windows[operation[1]] = operation[2]
@@ -1,16 +1,121 @@
-from collections import deque
+from array import array
 from .city import City
+from .green_cycle import GreenCycle
+from .simulator import simulate
+from .trace import Trace
+
+FINGERPRINT_MASK = (1 << 64) - 1
+
+
+class GreenCycles(dict):
+    __slots__ = ("fingerprint",)
+
+    def __init__(self, *args, **kwargs):
+        """
+        Constructor of GreenCycles class.
+        Dict of intersection id to green cycle, keeping a fingerprint of its content up to date.
+        The fingerprint is the sum of a hash of each (intersection id, green cycle) entry, so changing an entry
+        updates it in constant time. Entry hashes are mixed with the splitmix64 finalizer, as sums of plain tuple
+        hashes collide when two intersections swap similar changes.
+
+        Properties:
+            fingerprint (int): 64 bit hash of the green cycles
+        """
+        super().__init__()
+        self.fingerprint = 0
+        self.update(*args, **kwargs)
+
+    def entry_hash(intersection_id: int, green_cycle) -> int:
+        '''Hash of a single entry, as added to the fingerprint'''
+        x = (hash(green_cycle) + (intersection_id + 1) * 0x9E3779B97F4A7C15) & FINGERPRINT_MASK
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & FINGERPRINT_MASK
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & FINGERPRINT_MASK
+        return x ^ (x >> 31)
+
+    def __setitem__(self, intersection_id, green_cycle):
+        if intersection_id in self:
+            self.fingerprint -= GreenCycles.entry_hash(
+                intersection_id, self[intersection_id])
+        self.fingerprint = (self.fingerprint + GreenCycles.entry_hash(
+            intersection_id, green_cycle)) & FINGERPRINT_MASK
+        super().__setitem__(intersection_id, green_cycle)
+
+    def __delitem__(self, intersection_id):
+        self.fingerprint = (self.fingerprint - GreenCycles.entry_hash(
+            intersection_id, self[intersection_id])) & FINGERPRINT_MASK
+        super().__delitem__(intersection_id)
+
+    def pop(self, intersection_id, *default):
+        if intersection_id not in self:
+            return super().pop(intersection_id, *default)
+        green_cycle = self[intersection_id]
+        del self[intersection_id]
+        return green_cycle
+
+    def popitem(self):
+        intersection_id, green_cycle = super().popitem()
+        self.fingerprint = (self.fingerprint - GreenCycles.entry_hash(
+            intersection_id, green_cycle)) & FINGERPRINT_MASK
+        return intersection_id, green_cycle
+
+    def setdefault(self, intersection_id, green_cycle=None):
+        if intersection_id not in self:
+            self[intersection_id] = green_cycle
+        return self[intersection_id]
+
+    def update(self, *args, **kwargs):
+        for intersection_id, green_cycle in dict(*args, **kwargs).items():
+            self[intersection_id] = green_cycle
+
+    def clear(self):
+        super().clear()
+        self.fingerprint = 0
+
+    def copy(self):
+        green_cycles = GreenCycles()
+        dict.update(green_cycles, self)
+        green_cycles.fingerprint = self.fingerprint
+        return green_cycles
+
+    def __reduce__(self):
+        return (GreenCycles, (dict(self),))
 
 
 class Schedule:
     def __init__(self):
-        self.schedule = dict()
+        self.schedule = GreenCycles()
         self.last_score = -1
 
-    def from_input(input_file: str):
+    @property
+    def fingerprint(self) -> int:
+        '''Hash of the schedule green cycles, kept up to date as they change'''
+        return self.schedule.fingerprint
+
+    def copy(self):
+        """
+        Copy of the schedule, sharing its green cycles with the original.
+        Green cycles are never changed in place, mutations replace them, so the copy can be
+        mutated without affecting the original.
+
+        Return:
+            copied schedule
+        """
+        schedule = Schedule()
+        schedule.schedule = self.schedule.copy()
+        schedule.last_score = self.last_score
+        return schedule
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def from_input(input_file: str, city: City):
         """
         Read schedule from file, following Google's described format.
 
+        Parameters:
+            input_file: the schedule file path
+            city: the city the schedule refers to
+
         Return:
             read schedule
         """
@@ -25,117 +130,158 @@ class Schedule:
         while i < l_size:
             intersection_id = int(lines[i][0])
             no_streets = int(lines[i + 1][0])
-            schedule.schedule[intersection_id] = [
-                name
-                for name, duration in lines[i + 2: i + 2 + no_streets]
-                for _ in range(int(duration))
-            ]
+            street_lines = lines[i + 2: i + 2 + no_streets]
+            schedule.schedule[intersection_id] = GreenCycle(
+                [city.street_ids[name] for name, _ in street_lines],
+                [int(duration) for _, duration in street_lines],
+            )
             i += no_streets + 2
 
         return schedule
 
-    def write_to_file(self, path, file_name):
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary encoding of the schedule, to send it to other processes.
+        Every green cycle is written as its intersection id, its number of streets, its streets and its durations.
+
+        Return:
+            encoded schedule
+        """
+        data = array("i")
+        for intersection_id, green_cycle in self.schedule.items():
+            data.extend((intersection_id, len(green_cycle.streets)))
+            data.extend(green_cycle.streets)
+            data.extend(green_cycle.durations)
+        return data.tobytes()
+
+    def from_bytes(data: bytes, last_score: int = -1):
+        """
+        Decode a schedule encoded by to_bytes.
+
+        Parameters:
+            data: the encoded schedule
+            last_score: score of the encoded schedule, if known
+
+        Return:
+            decoded schedule
+        """
+        values = array("i")
+        values.frombytes(data)
+        schedule = Schedule()
+        i = 0
+        while i < len(values):
+            intersection_id, no_streets = values[i], values[i + 1]
+            schedule.schedule[intersection_id] = GreenCycle(
+                values[i + 2:i + 2 + no_streets],
+                values[i + 2 + no_streets:i + 2 + 2 * no_streets],
+            )
+            i += 2 + 2 * no_streets
+        schedule.last_score = last_score
+        return schedule
+
+    def from_street_names(schedule: dict, city: City):
+        """
+        Build a schedule from green cycles holding the green street name of every second.
+
+        Parameters:
+            schedule: dict of intersection id to list of street names, one per second of the cycle
+            city: the city the schedule refers to
+
+        Return:
+            equivalent schedule
+        """
+        compact_schedule = Schedule()
+        for intersection_id, green_cycle in schedule.items():
+            compact_schedule.schedule[intersection_id] = GreenCycle.from_street_names(
+                green_cycle, city)
+        return compact_schedule
+
+    def to_street_names(self, city: City):
+        """
+        Expand the schedule into green cycles holding the green street name of every second.
+
+        Parameters:
+            city: the city the schedule refers to
+
+        Return:
+            dict of intersection id to list of street names, one per second of the cycle
+        """
+        return {
+            intersection_id: green_cycle.to_street_names(city)
+            for intersection_id, green_cycle in self.schedule.items()
+        }
+
+    def write_to_file(self, city: City, path, file_name):
         """
         Write schedule to file, following Google's described format.
 
         Parameters:
+            city: the city the schedule refers to
             path: directory path to write to
             file_name: name of the file to create
         """
         f = open(path + "/" + file_name, "w")
         f.write(str(len(self.schedule)) + "\n")
-        for intersection_id in self.schedule:
-            green_cycle = self.schedule[intersection_id]
-            green_cycle_set = set(green_cycle)
-            unique_streets = len(green_cycle_set)
-            f.write(str(intersection_id) + "\n" + str(unique_streets) + "\n")
-            for street in green_cycle_set:
-                f.write(street + " " + str(green_cycle.count(street)) + "\n")
+        for intersection_id, green_cycle in self.schedule.items():
+            f.write(str(intersection_id) + "\n" +
+                    str(len(green_cycle.streets)) + "\n")
+            for street_id, duration in green_cycle.pairs():
+                f.write(city.street_names[street_id] +
+                        " " + str(duration) + "\n")
         f.close()
 
-    def evaluate(self, city: City):
+    def evaluate(self, city: City, trace_file: str = None):
         """
         Evaulation of the schedule in given city, using Google's scoring system.
         The objective function to maximize.
+        Scores are looked up in the city fitness cache first, by schedule fingerprint.
 
         Parameters:
             city: the city to evaluate
+            trace_file: optional path to write the trace of the simulation to, see Trace. The schedule is then
+                        always simulated
 
         Return:
             schedule score
         """
-        # setup simulation helpers
-        street_queue = {street_id: deque()
-                        for street_id in range(city.no_streets)}
-        green_cycle_duration, last_crossed = {}, {}
-        for intersection_id in self.schedule:
-            green_cycle_duration[intersection_id] = len(
-                self.schedule[intersection_id])
-            last_crossed[intersection_id] = -1
-
-        car_path = {}
-        next_analysed_time = {}
-        for car in city.cars:
-            car_path[car.id] = deque(car.path)
-            street_queue[car_path[car.id][0].id].append(car.id)
-            next_analysed_time[car.id] = 0
-
-        # run simulation
-        score = 0
-        for current_time in range(city.duration + 1):
-            scheduled_removals = []
-            for car_id in car_path:
-                if next_analysed_time[car_id] > current_time:
-                    continue
-                street = car_path[car_id][0]
-                if street_queue[car_path[car_id][0].id][0] != car_id:
-                    continue
-                intersection_id = city.street_intersection[street.name]
-                if not (intersection_id in self.schedule.keys()):
-                    continue
-                if green_cycle_duration[intersection_id] == 0:
-                    light_is_green = False
-                else:
-                    light_is_green = (
-                        self.schedule[intersection_id][
-                            current_time % green_cycle_duration[intersection_id]
-                        ]
-                        == street.name
-                    )
-                if not light_is_green or last_crossed[intersection_id] == current_time:
-                    continue
-                last_crossed[intersection_id] = current_time
-                street_queue[street.id].popleft()
-                car_path[car_id].popleft()
-                next_street = car_path[car_id][0]
-                next_time = current_time + next_street.length
-                if len(car_path[car_id]) == 1:
-                    scheduled_removals.append(car_id)
-                    if next_time <= city.duration:
-                        score += city.car_value + city.duration - next_time
-                else:
-                    street_queue[next_street.id].append(car_id)
-                    next_analysed_time[car_id] = next_time
-            for car_id in scheduled_removals:
-                del car_path[car_id]
+        if trace_file is not None:
+            trace = Trace.record(city, self)
+            trace.write(trace_file)
+            city.fitness_cache.put(self.fingerprint, trace.score)
+            return trace.score
 
+        score = city.fitness_cache.get(self.fingerprint)
+        if score is None:
+            score = simulate(city.compiled, self.green_windows())
+            city.fitness_cache.put(self.fingerprint, score)
         self.last_score = score
         return score
 
+    def green_windows(self):
+        """
+        Green window of each scheduled street, as used by the simulator.
+
+        Return:
+            dict of street id to (offset in the cycle, green duration, cycle duration)
+        """
+        green_windows = {}
+        for green_cycle in self.schedule.values():
+            cycle_duration = len(green_cycle)
+            for street_id, offset, duration in zip(green_cycle.streets, green_cycle.offsets, green_cycle.durations):
+                green_windows[street_id] = (offset, duration, cycle_duration)
+        return green_windows
+
     def __str__(self):
         s = ""
-        for intersection_id in self.schedule:
-            unique_streets = set(self.schedule[intersection_id])
+        for intersection_id, green_cycle in self.schedule.items():
             s += (
                 "On intersection "
                 + str(intersection_id)
                 + " the lights are green for "
-                + str(len(unique_streets))
+                + str(len(green_cycle.streets))
                 + " incoming streets:\n"
             )
-            for name in unique_streets:
-                duration = len(
-                    [1 for street in self.schedule[intersection_id] if street == name]
-                )
-                s += "- " + name + " for " + str(duration) + " seconds\n"
+            for street_id, duration in green_cycle.pairs():
+                s += "- street " + str(street_id) + \
+                    " for " + str(duration) + " seconds\n"
         return s
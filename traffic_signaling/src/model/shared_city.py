@@ -0,0 +1,38 @@
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from .city import City
+from .city_cache import city_to_bytes, city_from_buffer
+
+
+def share_city(city: City) -> SharedMemory:
+    """
+    Copy a compiled city into a shared memory block, in the binary format of the city cache.
+    The caller owns the block, and must close and unlink it once no process needs the city.
+
+    Parameters:
+        city: city to share
+
+    Return:
+        shared memory block holding the city
+    """
+    data = city_to_bytes(city)
+    shared_memory = SharedMemory(create=True, size=len(data))
+    shared_memory.buf[:len(data)] = data
+    return shared_memory
+
+
+def attach_city(name: str) -> tuple:
+    """
+    Attach to a city shared by share_city. The city arrays are views of the shared block, which must be kept
+    referenced while the city is used.
+
+    Parameters:
+        name: name of the shared memory block
+
+    Return:
+        tuple of the city and the attached shared memory block
+    """
+    shared_memory = SharedMemory(name=name)
+    city = city_from_buffer(np.ndarray(
+        (shared_memory.size,), dtype=np.uint8, buffer=shared_memory.buf))
+    return city, shared_memory
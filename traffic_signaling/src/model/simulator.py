@@ -0,0 +1,93 @@
+from collections import deque
+from heapq import heappush, heappop
+
+
+def next_green_time(current_time: int, green_window: tuple) -> int:
+    """
+    Earliest second, not before current_time, in which a street has a green light.
+
+    Parameters:
+        current_time: second from which the green light is looked for
+        green_window: (offset in the cycle, green duration, cycle duration) of the street
+
+    Return:
+        next green second of the street
+    """
+    start, duration, cycle_duration = green_window
+    offset = current_time % cycle_duration
+    if offset < start:
+        return current_time + start - offset
+    if offset < start + duration:
+        return current_time
+    return current_time + cycle_duration - offset + start
+
+
+def simulate(city, green_windows: dict, crossing_times: list = None) -> int:
+    """
+    Event-driven simulation of the city traffic, using Google's scoring system.
+    Instead of inspecting every car on every second, a car is only woken up when it reaches
+    the head of its street queue, and its crossing second is computed directly from the
+    street green window.
+
+    Parameters:
+        city: the compiled city to simulate
+        green_windows: green window of each street id, see next_green_time. Missing streets are always red
+        crossing_times: optional list aligned with the city routes, filled with the second each car leaves each
+                        street of its route
+
+    Return:
+        simulation score
+    """
+    duration = city.duration
+    route_streets = city.route_streets.tolist()
+    route_offsets = city.route_offsets.tolist()
+    street_length = city.street_length.tolist()
+    position = route_offsets[:-1]
+    arrival_time = [0 for _ in position]
+    street_queue = [deque() for _ in range(city.no_streets)]
+    street_free_time = [0 for _ in range(city.no_streets)]
+    events = []
+
+    def wake(car_id, street_id):
+        green_window = green_windows.get(street_id)
+        if green_window is None:
+            return
+        crossing_time = next_green_time(
+            max(arrival_time[car_id], street_free_time[street_id]), green_window)
+        if crossing_time <= duration:
+            heappush(events, (crossing_time, car_id))
+
+    for car_id, index in enumerate(position):
+        queue = street_queue[route_streets[index]]
+        queue.append(car_id)
+        if len(queue) == 1:
+            wake(car_id, route_streets[index])
+
+    score = 0
+    while events:
+        current_time, car_id = heappop(events)
+        index = position[car_id]
+        if crossing_times is not None:
+            crossing_times[index] = current_time
+        street_id = route_streets[index]
+        queue = street_queue[street_id]
+        queue.popleft()
+        street_free_time[street_id] = current_time + 1
+        if queue:
+            wake(queue[0], street_id)
+
+        index += 1
+        position[car_id] = index
+        next_street_id = route_streets[index]
+        next_time = current_time + street_length[next_street_id]
+        if index == route_offsets[car_id + 1] - 1:
+            if next_time <= duration:
+                score += city.car_value + duration - next_time
+            continue
+        arrival_time[car_id] = next_time
+        queue = street_queue[next_street_id]
+        queue.append(car_id)
+        if len(queue) == 1:
+            wake(car_id, next_street_id)
+
+    return score
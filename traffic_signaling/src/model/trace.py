@@ -0,0 +1,178 @@
+import json
+import os
+import numpy as np
+from .simulator import simulate
+
+MAGIC = b"TSTRACE1"
+NOT_CROSSED = -1
+ARRAYS = ["route_offsets", "route_streets", "street_length", "crossing_times", "green_windows"]
+
+
+class Trace:
+    def __init__(self, duration: int, car_value: int, score: int, route_offsets, route_streets, street_length,
+                 crossing_times, green_windows) -> None:
+        """
+        Constructor of Trace class.
+        Recorded simulation of a schedule: the second each car crossed the end of each street of its route, and the
+        green window of each street. Every state of the simulation, like the car positions, queue lengths, light
+        phases and score at any second, is derived from them without simulating again, so a trace can be replayed,
+        sought, or analysed offline. The trace holds the routes and street lengths, so it does not need the city.
+
+        Properties:
+            duration (int): simulation duration, in seconds
+            car_value (int): bonus given for each car that finishes its path
+            score (int): score of the simulated schedule
+            route_offsets (ndarray): route of car c is route_streets[route_offsets[c]:route_offsets[c + 1]]
+            route_streets (ndarray): street ids of all car routes, back to back
+            street_length (ndarray): seconds needed to drive through each street
+            crossing_times (ndarray): aligned with the routes, the second each car leaves each street of its route,
+                                      NOT_CROSSED if it does not
+            green_windows (ndarray): (street id, offset in the cycle, green duration, cycle duration) rows, one for
+                                     each street with a green light
+            route_cars (ndarray): aligned with the routes, the car of each route street
+            entering_times (ndarray): aligned with the routes, the second each car enters each street of its route,
+                                      -1 for the first street and after the simulation end if it does not
+            arrival_times (ndarray): aligned with the routes, the second each car reaches the end of each street
+            leaving_times (ndarray): crossing_times, with streets not crossed left after the simulation end
+            waiting (ndarray): aligned with the routes, whether each car waits at the end of each street. Cars leave
+                               the city when they enter their last street
+        """
+        self.duration = duration
+        self.car_value = car_value
+        self.score = score
+        self.route_offsets = np.asarray(route_offsets, dtype=np.int64)
+        self.route_streets = np.asarray(route_streets, dtype=np.int32)
+        self.street_length = np.asarray(street_length, dtype=np.int32)
+        self.crossing_times = np.asarray(crossing_times, dtype=np.int32)
+        self.green_windows = np.asarray(green_windows, dtype=np.int32).reshape(-1, 4)
+
+        route_lengths = np.diff(self.route_offsets)
+        self.route_cars = np.repeat(np.arange(len(route_lengths), dtype=np.int32), route_lengths)
+        first = np.zeros(len(self.route_streets), dtype=bool)
+        first[self.route_offsets[:-1][route_lengths > 0]] = True
+        self.waiting = np.ones(len(self.route_streets), dtype=bool)
+        self.waiting[self.route_offsets[1:][route_lengths > 0] - 1] = False
+
+        self.leaving_times = np.where(self.crossing_times == NOT_CROSSED, duration + 1, self.crossing_times)
+        self.entering_times = np.full(len(self.route_streets), -1, dtype=np.int32)
+        self.entering_times[1:] = self.leaving_times[:-1]
+        self.entering_times[first] = -1
+        self.arrival_times = np.where(
+            first, 0, self.entering_times + self.street_length[self.route_streets])
+
+        finished = ~self.waiting & ~first & (self.arrival_times <= duration)
+        order = np.argsort(self.entering_times[finished], kind="stable")
+        self.finishing_times = self.entering_times[finished][order]
+        self.finishing_scores = np.cumsum(car_value + duration - self.arrival_times[finished][order])
+
+    def record(city, schedule):
+        """
+        Simulate a schedule in a city, recording its trace.
+
+        Parameters:
+            city: the city to simulate
+            schedule: the simulated schedule
+
+        Return:
+            trace of the simulation
+        """
+        compiled = city.compiled
+        green_windows = schedule.green_windows()
+        crossing_times = [NOT_CROSSED for _ in range(len(compiled.route_streets))]
+        score = simulate(compiled, green_windows, crossing_times)
+        schedule.last_score = score
+        return Trace(compiled.duration, compiled.car_value, score, compiled.route_offsets, compiled.route_streets,
+                     compiled.street_length, crossing_times,
+                     [(street_id, *green_window) for street_id, green_window in green_windows.items()])
+
+    def to_bytes(self) -> bytes:
+        """
+        Binary encoding of the trace: a JSON header with the scalar values and the layout of the arrays, followed by
+        the raw data of the arrays.
+
+        Return:
+            encoded trace
+        """
+        sections, layout, offset = [], {}, 0
+        for name in ARRAYS:
+            array = np.ascontiguousarray(getattr(self, name))
+            layout[name] = [offset, array.dtype.str, array.size]
+            sections.append(array.tobytes())
+            offset += array.nbytes
+        header = json.dumps({"duration": self.duration, "car_value": self.car_value, "score": self.score,
+                             "layout": layout}).encode()
+        return b"".join([MAGIC, len(header).to_bytes(8, "little"), header, *sections])
+
+    def from_bytes(data: bytes):
+        """
+        Decode a trace encoded by to_bytes.
+
+        Parameters:
+            data: the encoded trace
+
+        Return:
+            decoded trace
+        """
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Data does not hold a simulation trace")
+        header_length = int.from_bytes(data[len(MAGIC):len(MAGIC) + 8], "little")
+        data_start = len(MAGIC) + 8 + header_length
+        header = json.loads(data[len(MAGIC) + 8:data_start])
+        arrays = {name: np.frombuffer(data, dtype=dtype, count=size, offset=data_start + offset)
+                  for name, (offset, dtype, size) in header["layout"].items()}
+        return Trace(header["duration"], header["car_value"], header["score"], *[arrays[name] for name in ARRAYS])
+
+    def write(self, trace_file: str) -> None:
+        '''Write the trace to a file, through a temporary file, so that readers never see a partial trace'''
+        temporary_file = f"{trace_file}.{os.getpid()}.tmp"
+        with open(temporary_file, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(temporary_file, trace_file)
+
+    def read(trace_file: str):
+        '''Read a trace written by write'''
+        with open(trace_file, "rb") as f:
+            return Trace.from_bytes(f.read())
+
+    def events(self):
+        """
+        Car crossings of the simulation, in the order they happened.
+
+        Return:
+            tuple of arrays with the second, car id and street id of each crossing
+        """
+        crossed = np.flatnonzero(self.crossing_times != NOT_CROSSED)
+        crossed = crossed[np.lexsort((self.route_cars[crossed], self.crossing_times[crossed]))]
+        return self.crossing_times[crossed], self.route_cars[crossed], self.route_streets[crossed]
+
+    def green_streets(self, time: int):
+        '''Ids of the streets with a green light on a second'''
+        streets, offsets, durations, cycle_durations = self.green_windows.T
+        offset = time % np.maximum(cycle_durations, 1)
+        return streets[(offsets <= offset) & (offset < offsets + durations)]
+
+    def car_positions(self, time: int):
+        """
+        Cars in the city on a second, before the crossings of that second.
+
+        Parameters:
+            time: second of the simulation
+
+        Return:
+            tuple of arrays with the id of each car, its street id and the seconds it still needs to reach the end
+            of the street, 0 if it is waiting there
+        """
+        on_street = np.flatnonzero(self.waiting & (self.entering_times < time) & (time <= self.leaving_times))
+        return (self.route_cars[on_street], self.route_streets[on_street],
+                np.maximum(self.arrival_times[on_street] - time, 0))
+
+    def queue_lengths(self, time: int):
+        '''Number of cars waiting at the end of each street on a second, before the crossings of that second'''
+        queued = self.waiting & (self.entering_times < time) & (self.arrival_times <= time) \
+            & (time <= self.leaving_times)
+        return np.bincount(self.route_streets[queued], minlength=len(self.street_length))
+
+    def score_at(self, time: int) -> int:
+        '''Score of the cars that finished their route up to a second, including the crossings of that second'''
+        finished = np.searchsorted(self.finishing_times, time, side="right")
+        return int(self.finishing_scores[finished - 1]) if finished > 0 else 0
@@ -0,0 +1,78 @@
+import pygame
+from collections import OrderedDict
+
+MAX_ROTATIONS = 512
+
+
+class AssetCache:
+    def __init__(self, max_rotations: int = MAX_ROTATIONS) -> None:
+        """
+        Constructor of AssetCache class.
+        Render assets of the viewer: each image is loaded from disk and scaled once, and its rotations are memoized
+        per angle, rounded to whole degrees, so drawing a frame never touches the disk nor rotates the same sprite
+        twice. The rotations are bounded, the least recently used ones being evicted first.
+
+        Properties:
+            max_rotations (int): maximum number of memoized rotations
+            images (dict): loaded and scaled images, by path and size
+            rotations (OrderedDict): rotated images, by path, size and angle, from the least to the most recently used
+            fonts (dict): pygame fonts, by size
+        """
+        self.max_rotations = max_rotations
+        self.images = {}
+        self.rotations = OrderedDict()
+        self.fonts = {}
+
+    def image(self, path: str, size: tuple, alpha: bool = True):
+        """
+        Image of a file, scaled to a size, loaded on the first request only.
+
+        Parameters:
+            path: path of the image file
+            size: width and height of the scaled image
+            alpha: whether the image has transparency
+
+        Return:
+            pygame Surface of the image
+        """
+        key = (path, size)
+        if key not in self.images:
+            image = pygame.image.load(path)
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha() if alpha else image.convert()
+            self.images[key] = pygame.transform.scale(image, size)
+        return self.images[key]
+
+    def rotated(self, path: str, size: tuple, angle: float):
+        """
+        Image of a file, scaled to a size and rotated counterclockwise by an angle, rounded to whole degrees.
+
+        Parameters:
+            path: path of the image file
+            size: width and height of the scaled image, before the rotation
+            angle: rotation angle, in degrees
+
+        Return:
+            pygame Surface of the rotated image
+        """
+        key = (path, size, round(angle) % 360)
+        if key in self.rotations:
+            self.rotations.move_to_end(key)
+            return self.rotations[key]
+        rotated = pygame.transform.rotate(self.image(path, size), key[2])
+        self.rotations[key] = rotated
+        if len(self.rotations) > self.max_rotations:
+            self.rotations.popitem(last=False)
+        return rotated
+
+    def font(self, size: int):
+        '''Default pygame font of a size, created once'''
+        if size not in self.fonts:
+            self.fonts[size] = pygame.font.SysFont(None, size)
+        return self.fonts[size]
+
+    def clear(self) -> None:
+        '''Drop every cached asset'''
+        self.images.clear()
+        self.rotations.clear()
+        self.fonts.clear()
@@ -1,6 +1,8 @@
 import pygame
+import numpy as np
 from math import atan2, degrees, radians, cos, sin, dist
 from model.city import City
+from view.asset_cache import AssetCache
 
 INTERSECTION_COLOR = (255, 196, 77)
 INTERSECTION_SIZE = 45
@@ -23,71 +25,110 @@ RED_LIGHT_IMAGE = 'traffic_signaling/asset/img/red.png'
 
 
 class CityViewer:
-    def __init__(self, city: City) -> None:
+    def __init__(self, city: City, assets: AssetCache = None) -> None:
         """
         Constructor of CityViewer class
 
         Properties:
             city (City): city with all the intersections of the problem
             streets (list): list of all streets that belong to the city
+            assets (AssetCache): cache of the images and fonts used to draw the city
+            static_layer (Surface): pre-rendered background, roads and street informations, None until rendered
+            intersections_layer (Surface): pre-rendered intersections, drawn over the cars, None until rendered
+            street_lights (dict): angle and positions of the light blocks of each street, by street id
         """
         self.city = city
         self.streets = self.get_streets()
+        self.assets = AssetCache() if assets is None else assets
+        self.static_layer = None
+        self.intersections_layer = None
+        self.street_lights = {}
 
     def get_streets(self):
         """
-        Obtains all the streets (name, lenght, start/end intersection, etc) from the city
+        Obtains all the streets (name, lenght, start/end intersection, etc) from the city, read from the start and
+        end intersections of the streets recorded when the city is parsed, in linear time
 
         Returns:
-            list with all streets that belong to the city
+            list with all streets that belong to the city, by start intersection
         """
-        streets = []
-        for id1, intersection1 in self.city.intersections.items():
-            for outcoming in intersection1.outgoing_streets:
-                st = False
-                for id2, intersection2 in self.city.intersections.items():
-                    for incoming in intersection2.incoming_streets:
-                        if (outcoming.id == incoming.id):
-                            streets.append(
-                                (outcoming.id, id1, id2, outcoming.name, outcoming.length))
-                            st = True
-                            break
-                    if st:
-                        break
-        return streets
+        compiled = self.city.compiled
+        order = np.argsort(compiled.street_start, kind="stable").tolist()
+        starts = compiled.street_start.tolist()
+        ends = compiled.street_end.tolist()
+        lengths = compiled.street_length.tolist()
+        return [(id, starts[id], ends[id], self.city.street_names[id], lengths[id]) for id in order]
+
+    def render_static_layers(self, window_size, background=None) -> None:
+        """
+        Pre-render the parts of the city that do not change during a simulation, so each frame only draws the
+        lights and the cars over them: the background, the roads and the street informations below the cars,
+        and the intersections above them. Must be called again whenever the intersections move.
+
+        Parameters:
+            window_size (tuple): width and height of the pygame window
+            background (Surface): image drawn behind the city, already scaled to the window size
+        """
+        self.static_layer = pygame.Surface(window_size)
+        if background is not None:
+            self.static_layer.blit(background, (0, 0))
+
+        self.street_lights = {}
+        for street in self.streets:
+            angle, road_positions, light_positions = self.street_blocks(street)
+            road_block = self.assets.rotated(ROAD_IMAGE, (BLOCKSIZE, BLOCKSIZE), -angle)
+            for pos in road_positions:
+                self.static_layer.blit(road_block, road_block.get_rect(center=pos))
+            self.street_lights[street[0]] = (angle, light_positions)
+
+        font = self.assets.font(FONT_SIZE)
+        self.draw_time_limit(font, self.static_layer, window_size[0])
+        self.draw_streets_info(font, self.static_layer)
+
+        self.intersections_layer = pygame.Surface(window_size, pygame.SRCALPHA)
+        font = self.assets.font(NODES_FONT_SIZE)
+        for id, intersection in self.city.intersections.items():
+            self.draw_intersection(self.intersections_layer, id, intersection, font)
 
     def draw(self, window, green_lights_streets, cars_position) -> None:
         """
-        Draw the city state starting by drawing each street as well the cars that are going through them.
-        Finally the intersections are drawn with the indication of the rescpective id
+        Draw the city state starting by the pre-rendered roads, then the lights of each street as well the cars
+        that are going through them. Finally the pre-rendered intersections are drawn with the indication of the
+        rescpective id
 
         Parameters:
             window (Surface): pygame window for display
             green_lights_streets (list): list of all the green lights of the city in the current state
             cars_position (list): list of the position of each car in the current state
         """
+        if self.static_layer is None:
+            self.render_static_layers(window.get_size())
+        window.blit(self.static_layer, (0, 0))
+
+        street_cars = {}
+        for id, info in cars_position.items():
+            street_cars.setdefault(info[0], []).append(info[1])
+
         for street in self.streets:
-            green = street[3] in green_lights_streets
+            green = street[0] in green_lights_streets
             self.draw_street(window, street, green)
 
-            for id, info in cars_position.items():
-                if info[0] == street[0]:
-                    self.draw_car(window, street, info[1])
+            for l in street_cars.get(street[0], []):
+                self.draw_car(window, street, l)
 
-        font = pygame.font.SysFont(None, NODES_FONT_SIZE)
+        window.blit(self.intersections_layer, (0, 0))
 
-        for id, intersection in self.city.intersections.items():
-            self.draw_intersection(window, id, intersection, font)
-
-    def draw_street(self, window, street, green):
+    def street_blocks(self, street):
         """
-        Draws a street starting by calculating the slope of the street and its distance to
-        connect the two intersections 
+        Lay out the blocks of a street, starting by calculating the slope of the street and its distance to
+        connect the two intersections
 
         Parameters:
-            window (Surface): pygame window for display
             street (tuple): tuple with the necessary information about the street
-            green (boolean): true if the light is green, false otherwise (light is red)
+
+        Return:
+            tuple with the angle of the street, in degrees, the centers of its road blocks and the centers of its
+            light blocks, the ones closest to its end intersection
         """
         start_intersect_pos = self.city.intersections[street[1]].get_pos()
         end_intersect_pos = self.city.intersections[street[2]].get_pos()
@@ -95,29 +136,34 @@ class CityViewer:
         angle = degrees(atan2(end_intersect_pos[1] - start_intersect_pos[1],
                               end_intersect_pos[0] - start_intersect_pos[0]))
 
-        road_block, green_block, red_block = self.load_blocks(angle)
-
+        road_positions, light_positions = [], []
         pos = start_intersect_pos
-
         distance = dist(pos, end_intersect_pos)
 
         while (dist(pos, end_intersect_pos) <= distance):
             distance = dist(pos, end_intersect_pos)
-            if green and distance < LIGHT_OFFSET:
-                rotated_center = (green_block.get_rect(
-                    center=(pos[0], pos[1])))
-                window.blit(green_block, rotated_center)
-            elif not green and distance < LIGHT_OFFSET:
-                rotated_center = (red_block.get_rect(
-                    center=(pos[0], pos[1])))
-                window.blit(red_block, rotated_center)
+            if distance < LIGHT_OFFSET:
+                light_positions.append(pos)
             else:
-                rotated_center = (road_block.get_rect(
-                    center=(pos[0], pos[1])))
-                window.blit(road_block, rotated_center)
+                road_positions.append(pos)
 
             pos = (pos[0] + round(BLOCKSIZE*cos(radians(angle))),
                    pos[1] + round(BLOCKSIZE*sin(radians(angle))))
+        return angle, road_positions, light_positions
+
+    def draw_street(self, window, street, green):
+        """
+        Draws the light of a street, over its pre-rendered road
+
+        Parameters:
+            window (Surface): pygame window for display
+            street (tuple): tuple with the necessary information about the street
+            green (boolean): true if the light is green, false otherwise (light is red)
+        """
+        angle, light_positions = self.street_lights[street[0]]
+        block = self.assets.rotated(GREEN_LIGHT_IMAGE if green else RED_LIGHT_IMAGE, (BLOCKSIZE, BLOCKSIZE), -angle)
+        for pos in light_positions:
+            window.blit(block, block.get_rect(center=pos))
 
     def draw_car(self, window, street, l):
         """
@@ -175,25 +221,33 @@ class CityViewer:
             score (integer): score of the current state
         """
         window_width, window_height = window.get_size()
-        font = pygame.font.SysFont(None, FONT_SIZE)
+        font = self.assets.font(FONT_SIZE)
         self.draw_time(font, window, window_width, current_time)
-        self.draw_streets_info(font, window)
         self.draw_score(font, window, window_width, window_height, score)
 
-    def draw_time(self, font, window, window_width, current_time):
+    def draw_time_limit(self, font, window, window_width):
         """
-        Draw time of the current state in the window
+        Draw time limit of the simulation in the window
 
         Parameters:
             font (Font): pygame Font object to write into a surface
             window (Surface): pygame window for display
             window_width (integer): width of the pygame window
-            current_time (integer): time of the current state
         """
         img = font.render("Time Limit = " +
                           str(self.city.duration), True, TEXT_COLOR)
         window.blit(img, (window_width - img.get_size()[0] - 50, 40))
 
+    def draw_time(self, font, window, window_width, current_time):
+        """
+        Draw time of the current state in the window
+
+        Parameters:
+            font (Font): pygame Font object to write into a surface
+            window (Surface): pygame window for display
+            window_width (integer): width of the pygame window
+            current_time (integer): time of the current state
+        """
         img = font.render("Current Time = " +
                           str(current_time), True, TEXT_COLOR)
         window.blit(img, (window_width - img.get_size()[0] - 50, 70))
@@ -233,35 +287,22 @@ class CityViewer:
         window.blit(img, (window_width - img.get_size()[0] - 50,
                           window_height - img.get_size()[1] - 40))
 
-    def load_blocks(self, angle):
+    def draw_playback(self, window, speed, paused):
         """
-        Load blocks for pygame (street, red and green image) and scale and rotate each image according to the angle of the street
+        Draw the replay speed, and whether the replay is paused, in the window
 
         Parameters:
-            angle (float): angle of the street
-
-        Return:
-            tuple with each block (street, red and green block)
+            window (Surface): pygame window for display
+            speed (float): simulation seconds replayed per real second
+            paused (boolean): whether the replay is paused
         """
-        green_block = pygame.image.load(GREEN_LIGHT_IMAGE).convert_alpha()
-        green_block = pygame.transform.scale(
-            green_block, (BLOCKSIZE, BLOCKSIZE))
-
-        red_block = pygame.image.load(RED_LIGHT_IMAGE).convert_alpha()
-        red_block = pygame.transform.scale(
-            red_block, (BLOCKSIZE, BLOCKSIZE))
-
-        road_block = pygame.image.load(ROAD_IMAGE).convert_alpha()
-        road_block = pygame.transform.scale(
-            road_block, (BLOCKSIZE, BLOCKSIZE))
-
-        return (pygame.transform.rotate(road_block, -angle),
-                pygame.transform.rotate(green_block, -angle),
-                pygame.transform.rotate(red_block, -angle))
+        font = self.assets.font(FONT_SIZE)
+        img = font.render("Speed = " + f"{speed:g}x" + (" (paused)" if paused else ""), True, TEXT_COLOR)
+        window.blit(img, (50, window.get_size()[1] - img.get_size()[1] - 40))
 
     def load_car(self, angle):
         """
-        Load car image, scale and rotate the image according to the angle of the street
+        Load car image scaled and rotated according to the angle of the street, from the asset cache
 
         Parameters:
             angle (float): angle of the street
@@ -269,7 +310,4 @@ class CityViewer:
         Return:
             car block to draw in the window
         """
-        car = pygame.image.load(CAR_IMAGE).convert_alpha()
-        car = pygame.transform.scale(
-            car, (CAR_LEN, CAR_WIDTH))
-        return pygame.transform.rotate(car, -degrees(angle))
+        return self.assets.rotated(CAR_IMAGE, (CAR_LEN, CAR_WIDTH), -degrees(angle))
@@ -0,0 +1,284 @@
+import pygame
+import numpy as np
+from model.city import City
+from model.city_layout import SpatialIndex
+from view.asset_cache import AssetCache
+
+BG_COLOR = (25, 30, 35)
+ROAD_COLOR = (120, 120, 120)
+INTERSECTION_COLOR = (255, 196, 77)
+CAR_COLOR = (0, 150, 255)
+TEXT_COLOR = (240, 240, 240)
+GREEN = (0, 220, 0)
+RED = (230, 0, 0)
+HEAT_COLOR = (255, 80, 0)
+FONT_SIZE = 30
+UNIT = 40
+MIN_SCALE = 0.5
+MAX_SCALE = 2000
+MAX_DETAILED_STREETS = 2000
+HEATMAP_CELL_SIZE = 2
+OVERVIEW_SCALE = 16
+MAX_OVERVIEW_SIZE = 4096
+LIGHT_FRACTION = 0.25
+LANE_OFFSET = 0.08
+CAR_GAP = 0.15
+INTERSECTION_SIZE = 0.15
+MAX_ROAD_WIDTH = 6
+MAX_INTERSECTION_RADIUS = 14
+MAX_CAR_RADIUS = 6
+
+
+class MapViewer:
+    def __init__(self, city: City, positions, assets: AssetCache = None) -> None:
+        """
+        Constructor of MapViewer class.
+        Viewer of cities of any size, laid out by a force directed layout, with pan and zoom. When zoomed in, the
+        streets with an end in view, found through a spatial index, are drawn with their lights and cars. Streets
+        only passing through the view are left out, as in dense cities they outnumber the others. When zoomed out, the
+        city is drawn as a pre-rendered overview of its streets under a heatmap of the waiting cars.
+        Positions are in world units, the ideal street length of the layout, and shown at scale pixels per unit.
+
+        Properties:
+            city (City): city with all the intersections of the problem
+            positions (ndarray): world position of each intersection
+            street_start, street_end (ndarray): world positions of the ends of each street, shifted to the right
+                                                of the street, so streets in opposite directions do not overlap
+            street_index (SpatialIndex): index of the ends of the streets, to find the visible ones. Index i is the
+                                         start of street i and index no_streets + i its end
+            heatmap_cells (ndarray): heatmap cell of the end of each street, as a flat index
+            heatmap_shape (tuple): number of heatmap cells along each axis
+            origin (ndarray): world position of the top left corner of the window
+            scale (float): pixels per world unit
+            assets (AssetCache): cache of the fonts
+            overview_scale (float): pixels per unit of the overview
+            overview (Surface): streets of the whole city, rendered once at overview_scale pixels per unit
+            visible (tuple): view, with the streets visible in it
+            overview_in_view (tuple): view, with the part of the overview in it, scaled
+            heat_surface (Surface): heatmap of the window, reused across frames
+        """
+        self.city = city
+        self.positions = np.asarray(positions, dtype=np.float64)
+        start = self.positions[city.compiled.street_start]
+        end = self.positions[city.compiled.street_end]
+        direction = end - start
+        normal = np.column_stack([-direction[:, 1], direction[:, 0]])
+        normal /= np.maximum(np.linalg.norm(normal, axis=1), 1e-9)[:, None]
+        self.street_start = start + normal * LANE_OFFSET
+        self.street_end = end + normal * LANE_OFFSET
+        street_ends = np.concatenate([self.street_start, self.street_end])
+        self.street_index = SpatialIndex(street_ends, street_ends)
+
+        extent = self.positions.max(axis=0) + HEATMAP_CELL_SIZE if len(self.positions) else np.ones(2)
+        self.heatmap_shape = tuple(np.ceil(extent / HEATMAP_CELL_SIZE).astype(int))
+        cells = np.floor(np.maximum(self.street_end, 0) / HEATMAP_CELL_SIZE).astype(int)
+        cells = np.minimum(cells, np.array(self.heatmap_shape) - 1)
+        self.heatmap_cells = cells[:, 0] * self.heatmap_shape[1] + cells[:, 1]
+
+        self.origin = np.zeros(2)
+        self.scale = float(UNIT)
+        self.assets = AssetCache() if assets is None else assets
+        self.overview = self.render_overview()
+        self.visible = None
+        self.overview_in_view = None
+        self.heat_surface = None
+
+    def render_overview(self):
+        """
+        Render the streets of the whole city once, to draw the city when zoomed out
+
+        Return:
+            pygame Surface with the streets, at OVERVIEW_SCALE pixels per unit, or less for very large cities
+        """
+        extent = self.positions.max(axis=0) + 1 if len(self.positions) else np.ones(2)
+        self.overview_scale = min(OVERVIEW_SCALE, MAX_OVERVIEW_SIZE / extent.max())
+        overview = pygame.Surface(tuple(np.ceil(extent * self.overview_scale).astype(int)))
+        overview.fill(BG_COLOR)
+        for start, end in zip((self.street_start * self.overview_scale).tolist(),
+                              (self.street_end * self.overview_scale).tolist()):
+            pygame.draw.line(overview, ROAD_COLOR, start, end)
+        return overview
+
+    def fit(self, window_size) -> None:
+        '''Zoom and pan so that the whole city is in view'''
+        extent = self.positions.max(axis=0) + 1 if len(self.positions) else np.ones(2)
+        self.scale = min(window_size[0] / extent[0], window_size[1] / extent[1])
+        self.origin = extent / 2 - np.array(window_size) / 2 / self.scale
+
+    def pan(self, dx, dy) -> None:
+        '''Move the view by a number of pixels'''
+        self.origin = self.origin - np.array([dx, dy]) / self.scale
+
+    def zoom(self, factor, center) -> None:
+        '''Zoom the view in (factor above 1) or out, keeping the world point under the center pixel in place'''
+        world = self.origin + np.array(center) / self.scale
+        self.scale = min(max(self.scale * factor, MIN_SCALE), MAX_SCALE)
+        self.origin = world - np.array(center) / self.scale
+
+    def to_screen(self, points):
+        '''Pixel of each world point'''
+        return (points - self.origin) * self.scale
+
+    def view(self, window_size) -> tuple:
+        '''Current view, as a key of the results memoized for it'''
+        return (*self.origin, self.scale, *window_size)
+
+    def visible_streets(self, window_size):
+        """
+        Streets with an end in view, memoized until the view changes
+
+        Parameters:
+            window_size (tuple): width and height of the pygame window
+
+        Return:
+            array of street ids
+        """
+        view = self.view(window_size)
+        if self.visible is None or self.visible[0] != view:
+            ends = self.street_index.query(self.origin, self.origin + np.array(window_size) / self.scale)
+            streets = np.unique(ends % self.city.no_streets)
+            self.visible = (view, streets)
+        return self.visible[1]
+
+    def is_detailed(self, window_size) -> bool:
+        '''Whether the streets in view are few enough to draw them one by one, instead of the heatmap'''
+        return len(self.visible_streets(window_size)) <= MAX_DETAILED_STREETS
+
+    def draw(self, window, green_streets, car_streets, seconds_left) -> None:
+        """
+        Draw the streets in view, their lights and their cars, and the intersections they join. Cars are bucketed
+        per street: moving cars are drawn along their street, and waiting ones queued back from its end.
+
+        Parameters:
+            window (Surface): pygame window for display
+            green_streets (ndarray): ids of the streets with a green light
+            car_streets (ndarray): street of each car in the city
+            seconds_left (ndarray): seconds each car still needs to reach the end of its street
+        """
+        window.fill(BG_COLOR)
+        streets = self.visible_streets(window.get_size())
+        start = self.to_screen(self.street_start[streets])
+        end = self.to_screen(self.street_end[streets])
+        light = end - (end - start) * LIGHT_FRACTION
+        green = np.zeros(self.city.no_streets, dtype=bool)
+        green[green_streets] = True
+        width = min(max(1, round(self.scale * LANE_OFFSET)), MAX_ROAD_WIDTH)
+        for street_start, street_light, street_end, street_green in zip(
+                start.tolist(), light.tolist(), end.tolist(), green[streets].tolist()):
+            pygame.draw.line(window, ROAD_COLOR, street_start, street_light, width)
+            pygame.draw.line(window, GREEN if street_green else RED, street_light, street_end, width)
+
+        intersections = np.unique(np.concatenate([self.city.compiled.street_start[streets],
+                                                  self.city.compiled.street_end[streets]]))
+        radius = min(max(2, round(self.scale * INTERSECTION_SIZE)), MAX_INTERSECTION_RADIUS)
+        for position in self.to_screen(self.positions[intersections]).tolist():
+            pygame.draw.circle(window, INTERSECTION_COLOR, position, radius)
+
+        visible = np.zeros(self.city.no_streets, dtype=bool)
+        visible[streets] = True
+        in_view = visible[car_streets]
+        car_streets, seconds_left = car_streets[in_view], seconds_left[in_view]
+        order = np.lexsort((-seconds_left, car_streets))
+        car_streets, seconds_left = car_streets[order], seconds_left[order]
+        bucket_end = np.searchsorted(car_streets, car_streets, "right")
+        queue_rank = np.where(seconds_left == 0, bucket_end - 1 - np.arange(len(car_streets)), 0)
+        start = self.to_screen(self.street_start[car_streets])
+        end = self.to_screen(self.street_end[car_streets])
+        length = self.city.compiled.street_length[car_streets]
+        fraction = np.maximum(1 - seconds_left / length - queue_rank * CAR_GAP, 0)
+        radius = min(max(2, round(self.scale * CAR_GAP / 3)), MAX_CAR_RADIUS)
+        for position in (start + (end - start) * fraction[:, None]).tolist():
+            pygame.draw.circle(window, CAR_COLOR, position, radius)
+
+    def draw_heatmap(self, window, queue_lengths) -> None:
+        """
+        Draw the overview of the city, with a heatmap of the cars waiting at the end of the streets of each area
+
+        Parameters:
+            window (Surface): pygame window for display
+            queue_lengths (ndarray): number of cars waiting at the end of each street
+        """
+        window.fill(BG_COLOR)
+        view = self.view(window.get_size())
+        if self.overview_in_view is None or self.overview_in_view[0] != view:
+            self.overview_in_view = (view, self.world_part(self.overview, self.overview_scale, window.get_size()))
+        if self.overview_in_view[1] is not None:
+            window.blit(*self.overview_in_view[1])
+
+        heat = np.bincount(self.heatmap_cells, weights=queue_lengths,
+                           minlength=self.heatmap_shape[0] * self.heatmap_shape[1]).reshape(self.heatmap_shape)
+        if heat.max() <= 0:
+            return
+        intensity = np.log1p(heat) / np.log1p(heat.max())
+        colors = np.zeros((self.heatmap_shape[0] + 2, self.heatmap_shape[1] + 2, 3), dtype=np.uint8)
+        colors[1:-1, 1:-1] = intensity[:, :, None] * np.array(HEAT_COLOR)
+        columns, rows = (self.heatmap_pixels(axis, size) for axis, size in enumerate(window.get_size()))
+        if self.heat_surface is None or self.heat_surface.get_size() != window.get_size():
+            self.heat_surface = pygame.Surface(window.get_size())
+        pygame.surfarray.blit_array(self.heat_surface, np.repeat(np.repeat(colors, columns, axis=0), rows, axis=1))
+        window.blit(self.heat_surface, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+
+    def heatmap_pixels(self, axis, size):
+        """
+        Number of pixels of the window covering each heatmap cell along an axis, the cells being padded with a blank
+        one on both sides for the pixels outside the city. Pixels are assigned to cells in order, so repeating each
+        cell by its count scales the part of the heatmap in view to the window, whatever the zoom.
+
+        Parameters:
+            axis (integer): 0 for the columns, 1 for the rows
+            size (integer): number of pixels of the window along the axis
+
+        Return:
+            array of pixel counts, one per padded cell
+        """
+        cells = np.floor((self.origin[axis] + (np.arange(size) + 0.5) / self.scale) / HEATMAP_CELL_SIZE).astype(int)
+        return np.bincount(np.clip(cells + 1, 0, self.heatmap_shape[axis] + 1), minlength=self.heatmap_shape[axis] + 2)
+
+    def world_part(self, surface, pixels_per_unit, window_size):
+        """
+        Part in view of a surface covering the world from its origin, like the overview, scaled to the current view.
+        Only that part is scaled, so the cost does not grow with the zoom
+
+        Parameters:
+            surface (Surface): surface covering the world
+            pixels_per_unit (float): pixels of the surface per world unit
+            window_size (tuple): width and height of the pygame window
+
+        Return:
+            tuple with the scaled part and its position in the window, None if no part is in view
+        """
+        surface_size = np.array(surface.get_size())
+        low = np.clip(np.floor(self.origin * pixels_per_unit), 0, surface_size)
+        high = np.clip(np.ceil((self.origin + np.array(window_size) / self.scale) * pixels_per_unit),
+                       0, surface_size)
+        if (high <= low).any():
+            return None
+        part = surface.subsurface(pygame.Rect(*low.astype(int), *(high - low).astype(int)))
+        size = np.ceil((high - low) * self.scale / pixels_per_unit).astype(int)
+        return (pygame.transform.scale(part, tuple(size)),
+                tuple(np.round((low / pixels_per_unit - self.origin) * self.scale).astype(int)))
+
+    def draw_infos(self, window, current_time, score, speed, paused) -> None:
+        """
+        Draw informations of the current state in the window
+
+        Parameters:
+            window (Surface): pygame window for display
+            current_time (integer): time of the current state
+            score (integer): score of the current state
+            speed (float): simulation seconds replayed per real second
+            paused (boolean): whether the replay is paused
+        """
+        font = self.assets.font(FONT_SIZE)
+        lines = [
+            f"Time = {current_time} / {self.city.duration}",
+            f"Score = {score}",
+            f"Speed = {speed:g}x" + (" (paused)" if paused else ""),
+            "Heatmap of waiting cars" if not self.is_detailed(window.get_size()) else "",
+        ]
+        height = 20
+        for line in lines:
+            if line:
+                img = font.render(line, True, TEXT_COLOR)
+                window.blit(img, (20, height))
+            height += 30
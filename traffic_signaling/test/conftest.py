@@ -0,0 +1,30 @@
+import importlib
+import importlib.abc
+import importlib.util
+import sys
+
+SOURCE_PACKAGES = ("model", "algorithm", "controller", "view")
+
+
+class SourcePackageAliases(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """
+    The algorithm, controller and view modules import the others as top level packages (`from model.city import
+    City`), as main.py runs them from traffic_signaling/src, while the tests import everything from
+    traffic_signaling.src. Both names are resolved to the same modules, so a test never mixes two copies of a class.
+    """
+
+    def find_spec(self, name, path=None, target=None):
+        '''Alias spec of the modules of the source packages, imported by their top level name'''
+        if name.split(".")[0] not in SOURCE_PACKAGES:
+            return None
+        return importlib.util.spec_from_loader(name, self)
+
+    def create_module(self, spec):
+        '''Module imported from traffic_signaling.src'''
+        return importlib.import_module(f"traffic_signaling.src.{spec.name}")
+
+    def exec_module(self, module):
+        '''The module was already executed when imported from traffic_signaling.src'''
+
+
+sys.meta_path.insert(0, SourcePackageAliases())
@@ -0,0 +1,39 @@
+import os
+import pytest
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.model.schedule import Schedule
+from traffic_signaling.src.controller.batch_controller import BatchController, city_path
+
+
+def test_batch_arguments():
+    options = BatchController(['taboo', 'a', 'e', '--time', '5', '--initial', 'weighted']).options
+    assert(options.algorithm == 'taboo')
+    assert(options.cities == ['a', 'e'])
+    assert(options.time == 5 and options.iterations is None)
+    assert(options.initial == 'weighted')
+    assert(city_path('e') == 'traffic_signaling/asset/data/e.txt')
+    assert(city_path('input/e.txt') == 'input/e.txt')
+
+
+@pytest.mark.parametrize('arguments', [
+    ['taboo', 'a'],
+    ['genetic', 'a', '--iterations', '1', '--initial', 'weighted'],
+    ['taboo', 'a', 'e', '--iterations', '1', '--visualize'],
+    ['taboo', 'a', '--iterations', '1', '--render-step', '0'],
+    ['search', 'a', '--iterations', '1'],
+])
+def test_batch_rejected_arguments(arguments):
+    with pytest.raises(SystemExit):
+        BatchController(arguments)
+
+
+def test_batch_run(tmp_path):
+    arguments = ['taboo', 'a', 'e', '--iterations', '2', '--seed', '1', '--jobs', '2', '--initial', 'weighted',
+                 '--output', str(tmp_path)]
+    results = BatchController(arguments).run()
+    assert([result['city'] for result in results] == ['a', 'e'])
+    for result in results:
+        city = load_city(city_path(result['city']))
+        assert(Schedule.from_input(result['solution'], city).evaluate(city) == result['score'])
+    assert(os.path.exists(tmp_path / 'taboo_summary.csv'))
+    assert([result['score'] for result in BatchController(arguments).run()] == [result['score'] for result in results])
@@ -0,0 +1,42 @@
+from functools import lru_cache
+from random import Random
+from traffic_signaling.src.model.batch_evaluator import BatchEvaluator
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.model.green_cycle import GreenCycle
+from traffic_signaling.src.model.schedule import Schedule
+from traffic_signaling.src.model.simulator import simulate
+
+
+@lru_cache(maxsize=None)
+def get_city(dataset):
+    '''Load a dataset once, on first use'''
+    return load_city(f'traffic_signaling/asset/data/{dataset}.txt')
+
+
+def random_schedule(city, rng):
+    schedule = Schedule()
+    for intersection_id in range(city.no_intersections):
+        if rng.random() < 0.1:
+            continue
+        streets = city.compiled.incoming(intersection_id).tolist()
+        rng.shuffle(streets)
+        schedule.schedule[intersection_id] = GreenCycle(
+            streets, [rng.randint(0, 3) for _ in streets])
+    return schedule
+
+
+def test_batch_matches_scalar_simulation():
+    rng = Random(3)
+    schedules = [random_schedule(get_city('e'), rng) for _ in range(20)] + [
+        Schedule.from_input(f'traffic_signaling/asset/out/e{i}.txt', get_city('e')) for i in (1, 2)]
+    scores = BatchEvaluator(get_city('e')).simulate(schedules)
+    assert(scores == [simulate(get_city('e').compiled, schedule.green_windows()) for schedule in schedules])
+    assert(scores[-2:] == [681875, 710095])
+
+
+def test_batch_evaluate():
+    schedule = Schedule.from_input('traffic_signaling/asset/out/e1.txt', get_city('e'))
+    evaluator = BatchEvaluator(get_city('e'))
+    assert(evaluator.evaluate([schedule, schedule.copy()]) == [681875, 681875])
+    assert(schedule.last_score == 681875)
+    assert(evaluator.simulate([]) == [])
@@ -0,0 +1,32 @@
+from functools import lru_cache
+import numpy as np
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.model.schedule import Schedule
+from traffic_signaling.src.model.checkpoint import Checkpoint, rng_state, restore_rng
+
+
+@lru_cache(maxsize=None)
+def get_city(dataset):
+    '''Load a dataset once, on first use'''
+    return load_city(f'traffic_signaling/asset/data/{dataset}.txt')
+
+
+def test_checkpoint_round_trip(tmp_path):
+    schedule = Schedule.from_input('traffic_signaling/asset/out/e1.txt', get_city('e'))
+    schedule.evaluate(get_city('e'))
+    other = Schedule.from_input('traffic_signaling/asset/out/e2.txt', get_city('e'))
+    other.evaluate(get_city('e'))
+    rng = np.random.default_rng(7)
+    rng.random(3)
+    checkpoint = Checkpoint("taboo_search", {"rng": rng_state(rng), "parameters": {"number_of_iterations": 5}},
+                            {"best": [schedule], "population": [(other.to_bytes(), other.last_score), schedule]},
+                            {"taboo_memory": np.arange(5, dtype=np.int32)})
+    checkpoint.write(str(tmp_path / 'run.ckpt'))
+    read = Checkpoint.read(str(tmp_path / 'run.ckpt'))
+    assert(read.algorithm == "taboo_search")
+    assert(read.state["parameters"] == {"number_of_iterations": 5})
+    assert([x.schedule for x in read.schedules["population"]] == [other.schedule, schedule.schedule])
+    assert([x.last_score for x in read.schedules["population"]] == [710095, 681875])
+    assert(read.schedules["best"][0].fingerprint == schedule.fingerprint)
+    assert(read.arrays["taboo_memory"].tolist() == [0, 1, 2, 3, 4])
+    assert(restore_rng(read.state["rng"]).random() == rng.random())
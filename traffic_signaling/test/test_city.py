@@ -0,0 +1,47 @@
+from traffic_signaling.src.model.city import City
+
+a_city = City.from_input('traffic_signaling/asset/data/a.txt')
+
+
+def test_compiled_streets():
+    compiled = a_city.compiled
+    assert(compiled.no_streets == 5 and compiled.no_intersections == 4)
+    assert(compiled.street_start.tolist() == [2, 0, 3, 2, 1])
+    assert(compiled.street_end.tolist() == [0, 1, 1, 3, 2])
+    assert(compiled.street_length.tolist() == [1, 1, 1, 2, 3])
+
+
+def test_compiled_routes():
+    compiled = a_city.compiled
+    assert(compiled.no_cars == 2)
+    assert(compiled.route(0).tolist() == [0, 1, 4, 3])
+    assert(compiled.route(1).tolist() == [2, 4, 0])
+
+
+def test_compiled_incoming_streets():
+    compiled = a_city.compiled
+    assert([compiled.incoming(intersection_id).tolist() for intersection_id in range(4)]
+           == [[0], [1, 2], [4], [3]])
+
+
+def test_street_demand():
+    compiled = a_city.compiled
+    assert(compiled.street_demand.tolist() == [1, 1, 1, 0, 2])
+    assert(compiled.used_intersections.tolist() == [0, 1, 2])
+    assert([compiled.used_incoming(intersection_id).tolist() for intersection_id in range(4)]
+           == [[0], [1, 2], [4], []])
+
+
+def test_memory_mapped_input():
+    mapped_city = City.from_input('traffic_signaling/asset/data/a.txt', memory_map=True)
+    assert(mapped_city.street_names == a_city.street_names)
+    assert(mapped_city.compiled.route_streets.tolist() == a_city.compiled.route_streets.tolist())
+
+
+def test_city_objects():
+    assert(a_city.street_ids['rue-de-rome'] == 3)
+    assert(a_city.streets[3].name == 'rue-de-rome' and a_city.streets[3].length == 2)
+    assert([street.name for street in a_city.cars[1].path]
+           == ['rue-d-athenes', 'rue-de-moscou', 'rue-de-londres'])
+    assert({street.id for street in a_city.intersections[1].incoming_streets} == {1, 2})
+    assert(a_city.street_intersection['rue-de-moscou'] == 2)
@@ -0,0 +1,56 @@
+from functools import lru_cache
+import os
+import shutil
+from traffic_signaling.src.model.city import City
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.model.schedule import Schedule
+from traffic_signaling.src.model.shared_city import share_city, attach_city
+
+
+@lru_cache(maxsize=None)
+def get_city(dataset):
+    '''Load a dataset once, on first use'''
+    return load_city(f'traffic_signaling/asset/data/{dataset}.txt')
+
+
+def test_cached_city(tmp_path):
+    city = City.from_input('traffic_signaling/asset/data/e.txt')
+    load_city('traffic_signaling/asset/data/e.txt', str(tmp_path))
+    cached_city = load_city('traffic_signaling/asset/data/e.txt', str(tmp_path))
+    assert(len(os.listdir(tmp_path)) == 1)
+    assert(cached_city.street_names == city.street_names)
+    assert(cached_city.compiled.route_streets.tolist() == city.compiled.route_streets.tolist())
+    assert(cached_city.compiled.incoming_streets.tolist() == city.compiled.incoming_streets.tolist())
+    schedule = Schedule.from_input('traffic_signaling/asset/out/e1.txt', cached_city)
+    assert(schedule.evaluate(cached_city) == 681875)
+
+
+def test_cache_invalidation(tmp_path):
+    input_file = str(tmp_path / 'a.txt')
+    shutil.copy('traffic_signaling/asset/data/a.txt', input_file)
+    assert(load_city(input_file, str(tmp_path / 'cache')).duration == 6)
+    with open(input_file) as f:
+        lines = f.readlines()
+    lines[0] = lines[0].replace('6', '7', 1)
+    with open(input_file, 'w') as f:
+        f.writelines(lines)
+    assert(load_city(input_file, str(tmp_path / 'cache')).duration == 7)
+    assert(len(os.listdir(tmp_path / 'cache')) == 2)
+
+
+def test_shared_city():
+    city = get_city('e')
+    shared_memory = share_city(city)
+    try:
+        shared_city, attached_memory = attach_city(shared_memory.name)
+        try:
+            assert(shared_city.street_names == city.street_names)
+            assert(shared_city.compiled.route_offsets.tolist() == city.compiled.route_offsets.tolist())
+            schedule = Schedule.from_input('traffic_signaling/asset/out/e1.txt', shared_city)
+            assert(schedule.evaluate(shared_city) == 681875)
+        finally:
+            del shared_city
+            attached_memory.close()
+    finally:
+        shared_memory.close()
+        shared_memory.unlink()
@@ -0,0 +1,40 @@
+from functools import lru_cache
+import os
+import numpy as np
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.model.city_layout import load_layout, force_directed_layout, SpatialIndex
+
+
+@lru_cache(maxsize=None)
+def get_city(dataset):
+    '''Load a dataset once, on first use'''
+    return load_city(f'traffic_signaling/asset/data/{dataset}.txt')
+
+
+def test_force_directed_layout():
+    positions = force_directed_layout(get_city('a').no_intersections, get_city('a').compiled.street_start,
+                                      get_city('a').compiled.street_end)
+    assert(positions.shape == (4, 2))
+    assert((positions >= 0).all())
+    assert(np.array_equal(positions, force_directed_layout(get_city('a').no_intersections, get_city('a').compiled.street_start,
+                                                           get_city('a').compiled.street_end)))
+    distances = np.linalg.norm(positions[:, None] - positions[None, :], axis=2)
+    assert(distances[np.triu_indices(4, 1)].min() > 0.1)
+
+
+def test_cached_layout(tmp_path):
+    positions = load_layout(get_city('e'), str(tmp_path))
+    assert(positions.shape == (get_city('e').no_intersections, 2))
+    assert(np.array_equal(load_layout(get_city('e'), str(tmp_path)), positions))
+    assert(len(os.listdir(tmp_path)) == 1)
+    load_layout(get_city('a'), str(tmp_path))
+    assert(len(os.listdir(tmp_path)) == 2)
+
+
+def test_spatial_index():
+    index = SpatialIndex([[0, 0], [5, 5], [0, 9]], [[1, 1], [9, 6], [9, 9]], 2)
+    assert(index.query([0, 0], [2, 2]).tolist() == [0])
+    assert(index.query([4, 4], [6, 6]).tolist() == [1])
+    assert(index.query([8, 5], [9, 9]).tolist() == [1, 2])
+    assert(index.query([20, 20], [30, 30]).tolist() == [])
+    assert(index.query([-1, -1], [10, 10]).tolist() == [0, 1, 2])
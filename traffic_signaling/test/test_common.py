@@ -0,0 +1,65 @@
+from functools import lru_cache
+import numpy as np
+import pytest
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.algorithm.common import distributed_random_sum_permutation, \
+    distributed_random_sum_permutations, distributed_sum_permutation, generate_random_solution, \
+    generate_traffic_weighted_solution
+
+
+@lru_cache(maxsize=None)
+def get_city(dataset):
+    '''Load a dataset once, on first use'''
+    return load_city(f'traffic_signaling/asset/data/{dataset}.txt')
+
+
+CASES = [(1, 1), (3, 3), (4, 10), (7, 100), (5, 4), (40, 3), (6, 0), (0, 5)]
+
+
+@pytest.mark.parametrize('length, perm_sum', CASES)
+def test_random_sum_permutation(length, perm_sum):
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        permutation = distributed_random_sum_permutation(length, perm_sum, rng)
+        assert(len(permutation) == length)
+        assert(sum(permutation) <= perm_sum)
+        assert(min(permutation, default=1) >= (1 if length <= perm_sum else 0))
+
+
+def test_sum_permutation_longer_than_sum():
+    rng = np.random.default_rng(1)
+    for length, perm_sum in [(5, 4), (40, 3), (1000, 1), (6, 0)]:
+        permutation = distributed_sum_permutation(length, perm_sum, rng)
+        assert(len(permutation) == length)
+        assert(0 <= min(permutation) and sum(permutation) <= perm_sum)
+    assert(distributed_sum_permutation(3, 3, rng) == [1, 1, 1])
+
+
+@pytest.mark.parametrize('perm_sum', [0, 3, 10, 100])
+def test_random_sum_permutations(perm_sum):
+    rng = np.random.default_rng(2)
+    lengths = [length for length, _ in CASES] + [0, 2, 0]
+    for _ in range(50):
+        permutations = distributed_random_sum_permutations(lengths, perm_sum, rng)
+        assert(permutations.shape == (sum(lengths),))
+        start = 0
+        for length in lengths:
+            permutation = permutations[start:start + length].tolist()
+            start += length
+            assert(sum(permutation) <= perm_sum)
+            assert(min(permutation, default=1) >= (1 if length <= perm_sum else 0))
+
+
+@pytest.mark.parametrize('dataset', ['e', 'f'])
+def test_traffic_weighted_solution(dataset):
+    city = get_city(dataset)
+    schedule = generate_traffic_weighted_solution(city)
+    assert(schedule.evaluate(city) == schedule.last_score)
+    for intersection_id, green_cycle in schedule.schedule.items():
+        incoming = set(city.compiled.incoming(intersection_id).tolist())
+        assert(set(green_cycle.streets) <= incoming)
+        assert(len(set(green_cycle.streets)) == len(green_cycle.streets))
+        assert(all(city.compiled.street_demand[green_cycle.streets] > 0))
+        assert(1 <= min(green_cycle.durations) and sum(green_cycle.durations) <= city.duration)
+    random_schedule = generate_random_solution(city, distributed_random_sum_permutation, np.random.default_rng(1))
+    assert(schedule.last_score >= random_schedule.evaluate(city))
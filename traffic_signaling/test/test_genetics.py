@@ -0,0 +1,21 @@
+from functools import lru_cache
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.algorithm.genetics import genetic_algorithm
+
+
+@lru_cache(maxsize=None)
+def get_city(dataset):
+    '''Load a dataset once, on first use'''
+    return load_city(f'traffic_signaling/asset/data/{dataset}.txt')
+
+
+def test_islands_reproducible():
+    city = get_city('e')
+    schedules = [genetic_algorithm(city, 2, 12, 4, 0.3, file_output=False, migration_interval=1, rng=5)
+                 for _ in range(2)]
+    assert(schedules[0].to_bytes() == schedules[1].to_bytes())
+    assert(schedules[0].last_score == schedules[1].last_score == schedules[0].evaluate(city))
+    for intersection_id, green_cycle in schedules[0].schedule.items():
+        incoming = set(city.compiled.incoming(intersection_id).tolist())
+        assert(set(green_cycle.streets) <= incoming)
+        assert(len(set(green_cycle.streets)) == len(green_cycle.streets))
@@ -0,0 +1,76 @@
+from functools import lru_cache
+from random import Random
+from traffic_signaling.src.model import incremental_evaluator
+from traffic_signaling.src.model.green_cycle import GreenCycle
+from traffic_signaling.src.model.incremental_evaluator import IncrementalEvaluator
+from traffic_signaling.src.model.schedule import Schedule
+from traffic_signaling.src.model.simulator import simulate
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.algorithm.common import generate_traffic_weighted_solution
+
+
+@lru_cache(maxsize=None)
+def get_city(dataset):
+    '''Load a dataset once, on first use'''
+    return load_city(f'traffic_signaling/asset/data/{dataset}.txt')
+
+
+def mutate(city, schedule, rng):
+    schedule = schedule.copy()
+    intersection_id = rng.randint(0, city.no_intersections - 1)
+    streets = city.compiled.incoming(intersection_id).tolist()
+    rng.shuffle(streets)
+    schedule.schedule[intersection_id] = GreenCycle(
+        streets, [rng.randint(0, 4) for _ in streets])
+    return schedule
+
+
+def test_incremental_matches_full_evaluation():
+    rng = Random(7)
+    evaluator = IncrementalEvaluator(
+        get_city('e'), Schedule.from_input('traffic_signaling/asset/out/e2.txt', get_city('e')))
+    assert(evaluator.score == 710095)
+    for _ in range(100):
+        candidate = mutate(get_city('e'), evaluator.schedule, rng)
+        assert(evaluator.evaluate(candidate) == simulate(get_city('e').compiled, candidate.green_windows()))
+        if rng.random() < 0.3:
+            evaluator.rebase(candidate)
+    rebuilt = IncrementalEvaluator(get_city('e'), evaluator.schedule)
+    assert(rebuilt.score == evaluator.score)
+    assert(rebuilt.crossing_times == evaluator.crossing_times)
+    assert(rebuilt.street_entries == evaluator.street_entries)
+
+
+def test_incremental_work_limit(monkeypatch):
+    monkeypatch.setattr(incremental_evaluator, 'UPDATE_WORK_FRACTION', 0)
+    rng = Random(11)
+    evaluator = IncrementalEvaluator(
+        get_city('e'), Schedule.from_input('traffic_signaling/asset/out/e2.txt', get_city('e')))
+    crossing_times = list(evaluator.crossing_times)
+    candidate = mutate(get_city('e'), evaluator.schedule, rng)
+    undo = []
+    assert(evaluator.update(candidate, evaluator.changed_intersections(candidate), undo) is None)
+    evaluator.rollback(undo)
+    assert(evaluator.crossing_times == crossing_times)
+    for _ in range(20):
+        candidate = mutate(get_city('e'), evaluator.schedule, rng)
+        assert(evaluator.evaluate(candidate) == simulate(get_city('e').compiled, candidate.green_windows()))
+        evaluator.rebase(candidate)
+    rebuilt = IncrementalEvaluator(get_city('e'), evaluator.schedule)
+    assert(rebuilt.score == evaluator.score)
+    assert(rebuilt.crossing_times == evaluator.crossing_times)
+    assert(rebuilt.street_entries == evaluator.street_entries)
+
+
+def test_incremental_congested_city():
+    city = get_city('f')
+    evaluator = IncrementalEvaluator(city, generate_traffic_weighted_solution(city))
+    city.fitness_cache.clear()
+    candidate = evaluator.schedule.copy()
+    candidate.schedule[519] = GreenCycle([9345, 3813, 8890, 3117, 5133, 3214], [1132, 2, 2, 1, 1, 1])
+    assert(evaluator.evaluate(candidate) == simulate(city.compiled, candidate.green_windows()) == 1333565)
+    rng = Random(5)
+    for _ in range(15):
+        candidate = mutate(city, evaluator.schedule, rng)
+        assert(evaluator.evaluate(candidate) == simulate(city.compiled, candidate.green_windows()))
+        evaluator.rebase(candidate)
@@ -0,0 +1,37 @@
+from functools import lru_cache
+import numpy as np
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.algorithm.common import generate_traffic_weighted_solution, mutate_intersection
+from traffic_signaling.src.algorithm.parallel import NeighbourhoodEvaluator
+
+
+@lru_cache(maxsize=None)
+def get_city(dataset):
+    '''Load a dataset once, on first use'''
+    return load_city(f'traffic_signaling/asset/data/{dataset}.txt')
+
+
+def test_workers_match_serial():
+    city = get_city('e')
+    rng = np.random.default_rng(3)
+    base = generate_traffic_weighted_solution(city)
+    neighbours = [mutate_intersection(city, base.copy(), rng)[0] for _ in range(10)]
+    next_base = neighbours[0]
+    next_neighbours = [mutate_intersection(city, next_base.copy(), rng)[0] for _ in range(7)]
+
+    city.fitness_cache.clear()
+    serial = NeighbourhoodEvaluator(city)
+    serial_scores = [serial.set_base(base), serial.evaluate(neighbours),
+                     serial.set_base(next_base), serial.evaluate(next_neighbours)]
+
+    city.fitness_cache.clear()
+    with NeighbourhoodEvaluator(city, 2) as parallel:
+        processes = list(parallel.processes)
+        assert(len(processes) == 2 and all(process.is_alive() for process in processes))
+        parallel_scores = [parallel.set_base(base), parallel.evaluate(neighbours),
+                           parallel.set_base(next_base), parallel.evaluate(next_neighbours)]
+    assert(parallel_scores == serial_scores)
+    assert(len(set(serial_scores[1] + serial_scores[3])) > 1)
+    assert([neighbour.last_score for neighbour in next_neighbours] == serial_scores[3])
+    assert(parallel.processes == [] and parallel.connections == [])
+    assert(all(not process.is_alive() and process.exitcode == 0 for process in processes))
@@ -0,0 +1,20 @@
+import os
+import pygame
+from traffic_signaling.src.controller.render_controller import render
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.model.schedule import Schedule
+
+
+def test_render_leaves_display(tmp_path):
+    cache_path = str(tmp_path / 'cache')
+    city = load_city('traffic_signaling/asset/data/e.txt', cache_path)
+    schedule = Schedule.from_input('traffic_signaling/asset/out/e1.txt', city)
+    video_driver = os.environ.get('SDL_VIDEODRIVER')
+    display = pygame.display.get_init()
+    frames = render('traffic_signaling/asset/data/e.txt', schedule, str(tmp_path / 'frames'), workers=1,
+                    step=city.duration // 2, cache_path=cache_path)
+    assert(len(frames) == 3)
+    assert(all(os.path.exists(frame) for frame in frames))
+    assert(os.environ.get('SDL_VIDEODRIVER') == video_driver)
+    assert(pygame.display.get_init() == display)
+    assert(sorted(os.path.splitext(file)[1] for file in os.listdir(cache_path)) == ['.city', '.layout'])
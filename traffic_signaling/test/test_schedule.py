@@ -0,0 +1,87 @@
+from functools import lru_cache
+from traffic_signaling.src.model.city import City
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.model.green_cycle import GreenCycle
+from traffic_signaling.src.model.schedule import Schedule
+
+
+@lru_cache(maxsize=None)
+def get_city(dataset):
+    '''Load a dataset once, on first use'''
+    return load_city(f'traffic_signaling/asset/data/{dataset}.txt')
+
+
+def test_green_cycle_offsets():
+    green_cycle = GreenCycle([3, 1, 4], [2, 0, 5])
+    assert(list(green_cycle.pairs()) == [(3, 2), (4, 5)])
+    assert(list(green_cycle.offsets) == [0, 2, 7])
+    assert(len(green_cycle) == 7)
+    assert([green_cycle.green_street(t) for t in range(8)]
+           == [3, 3, 4, 4, 4, 4, 4, 3])
+
+
+def test_street_names_round_trip():
+    schedule = Schedule.from_input('traffic_signaling/asset/out/e1.txt', get_city('e'))
+    expanded = schedule.to_street_names(get_city('e'))
+    assert(Schedule.from_street_names(expanded, get_city('e')).schedule == schedule.schedule)
+    assert(Schedule.from_street_names(expanded, get_city('e')).evaluate(get_city('e')) == 681875)
+
+
+def test_write_to_file_round_trip(tmp_path):
+    schedule = Schedule.from_input('traffic_signaling/asset/out/a3.txt', get_city('a'))
+    schedule.write_to_file(get_city('a'), str(tmp_path), 'a3.txt')
+    written = Schedule.from_input(str(tmp_path / 'a3.txt'), get_city('a'))
+    assert(written.schedule == schedule.schedule)
+    assert(written.evaluate(get_city('a')) == 2002)
+
+
+def test_copy_shares_green_cycles():
+    schedule = Schedule.from_input('traffic_signaling/asset/out/a2.txt', get_city('a'))
+    copy = schedule.copy()
+    assert(all(copy.schedule[i] is schedule.schedule[i] for i in schedule.schedule))
+    copy.schedule[1] = GreenCycle([1], [3])
+    assert(schedule.schedule[1] != copy.schedule[1])
+    assert(schedule.evaluate(get_city('a')) == 1001)
+
+
+def test_bytes_round_trip():
+    schedule = Schedule.from_input('traffic_signaling/asset/out/e1.txt', get_city('e'))
+    decoded = Schedule.from_bytes(schedule.to_bytes(), 681875)
+    assert(decoded.schedule == schedule.schedule)
+    assert(decoded.last_score == 681875)
+    assert(decoded.evaluate(get_city('e')) == 681875)
+
+
+def test_fingerprint():
+    schedule = Schedule.from_input('traffic_signaling/asset/out/e1.txt', get_city('e'))
+    copy = schedule.copy()
+    assert(copy.fingerprint == schedule.fingerprint)
+    green_cycle = copy.schedule[0]
+    copy.schedule[0] = GreenCycle([1], [3])
+    assert(copy.fingerprint != schedule.fingerprint)
+    copy.schedule[0] = GreenCycle(green_cycle.streets, green_cycle.durations)
+    assert(copy.fingerprint == schedule.fingerprint)
+    del copy.schedule[0]
+    copy.schedule.update({0: green_cycle})
+    assert(copy.fingerprint == schedule.fingerprint)
+    assert(Schedule.from_bytes(schedule.to_bytes()).fingerprint == schedule.fingerprint)
+
+
+def test_fitness_cache():
+    city = City.from_input('traffic_signaling/asset/data/a.txt')
+    schedule = Schedule.from_input('traffic_signaling/asset/out/a3.txt', city)
+    assert(schedule.evaluate(city) == 2002)
+    assert(schedule.copy().evaluate(city) == 2002)
+    assert((city.fitness_cache.hits, city.fitness_cache.misses) == (1, 1))
+    city.fitness_cache.max_size = 1
+    Schedule.from_input('traffic_signaling/asset/out/a2.txt', city).evaluate(city)
+    assert(len(city.fitness_cache) == 1)
+    assert(schedule.evaluate(city) == 2002)
+    assert(city.fitness_cache.misses == 3)
+
+
+def test_fingerprint_swapped_changes():
+    first, second = Schedule(), Schedule()
+    first.schedule.update({85: GreenCycle([168, 171], [1, 4]), 257: GreenCycle([512, 515], [3, 1])})
+    second.schedule.update({85: GreenCycle([168, 171], [3, 1]), 257: GreenCycle([512, 515], [1, 4])})
+    assert(first.fingerprint != second.fingerprint)
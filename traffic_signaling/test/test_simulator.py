@@ -1,54 +1,54 @@
-from traffic_signaling.src.model.city import City
+from functools import lru_cache
+from traffic_signaling.src.model.city_cache import load_city
 from traffic_signaling.src.model.schedule import Schedule
 
-a_city = City.from_input('traffic_signaling/asset/data/a.txt')
-b_city = City.from_input('traffic_signaling/asset/data/b.txt')
-c_city = City.from_input('traffic_signaling/asset/data/c.txt')
-d_city = City.from_input('traffic_signaling/asset/data/d.txt')
-e_city = City.from_input('traffic_signaling/asset/data/e.txt')
-f_city = City.from_input('traffic_signaling/asset/data/f.txt')
+
+@lru_cache(maxsize=None)
+def get_city(dataset):
+    '''Load a dataset once, on first use'''
+    return load_city(f'traffic_signaling/asset/data/{dataset}.txt')
 
 
 def test_a_solution1():
-    schedule = Schedule.from_input('traffic_signaling/asset/out/a1.txt')
-    assert(schedule.evaluate(a_city) == 1002)
+    schedule = Schedule.from_input('traffic_signaling/asset/out/a1.txt', get_city('a'))
+    assert(schedule.evaluate(get_city('a')) == 1002)
 
 
 def test_a_solution2():
-    schedule = Schedule.from_input('traffic_signaling/asset/out/a2.txt')
-    assert(schedule.evaluate(a_city) == 1001)
+    schedule = Schedule.from_input('traffic_signaling/asset/out/a2.txt', get_city('a'))
+    assert(schedule.evaluate(get_city('a')) == 1001)
 
 
 def test_a_solution3():
-    schedule = Schedule.from_input('traffic_signaling/asset/out/a3.txt')
-    assert(schedule.evaluate(a_city) == 2002)
+    schedule = Schedule.from_input('traffic_signaling/asset/out/a3.txt', get_city('a'))
+    assert(schedule.evaluate(get_city('a')) == 2002)
 
 
 def test_e_solution1():
-    schedule = Schedule.from_input('traffic_signaling/asset/out/e1.txt')
-    assert(schedule.evaluate(e_city) == 681875)
+    schedule = Schedule.from_input('traffic_signaling/asset/out/e1.txt', get_city('e'))
+    assert(schedule.evaluate(get_city('e')) == 681875)
 
 
 def test_e_solution2():
-    schedule = Schedule.from_input('traffic_signaling/asset/out/e2.txt')
-    assert(schedule.evaluate(e_city) == 710095)
+    schedule = Schedule.from_input('traffic_signaling/asset/out/e2.txt', get_city('e'))
+    assert(schedule.evaluate(get_city('e')) == 710095)
 
 
 def test_b_solution1():
-    schedule = Schedule.from_input('traffic_signaling/asset/out/b1.txt')
-    assert(schedule.evaluate(b_city) == 4566783)
+    schedule = Schedule.from_input('traffic_signaling/asset/out/b1.txt', get_city('b'))
+    assert(schedule.evaluate(get_city('b')) == 4566783)
 
 
 def test_f_solution1():
-    schedule = Schedule.from_input('traffic_signaling/asset/out/f1.txt')
-    assert(schedule.evaluate(f_city) == 1408553)
+    schedule = Schedule.from_input('traffic_signaling/asset/out/f1.txt', get_city('f'))
+    assert(schedule.evaluate(get_city('f')) == 1408553)
 
 
 def test_c_solution1():
-    schedule = Schedule.from_input('traffic_signaling/asset/out/c1.txt')
-    assert(schedule.evaluate(c_city) == 1299593)
+    schedule = Schedule.from_input('traffic_signaling/asset/out/c1.txt', get_city('c'))
+    assert(schedule.evaluate(get_city('c')) == 1299593)
 
 
 def test_d_solution1():
-    schedule = Schedule.from_input('traffic_signaling/asset/out/d1.txt')
-    assert(schedule.evaluate(d_city) == 1586428)
+    schedule = Schedule.from_input('traffic_signaling/asset/out/d1.txt', get_city('d'))
+    assert(schedule.evaluate(get_city('d')) == 1586428)
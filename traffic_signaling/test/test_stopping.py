@@ -0,0 +1,96 @@
+from traffic_signaling.src.model.schedule import Schedule
+from traffic_signaling.src.algorithm.stopping import StoppingCriteria
+
+
+class Clock:
+    '''Clock moved by hand, instead of following real time'''
+
+    def __init__(self):
+        self.time = 100.0
+
+    def __call__(self):
+        return self.time
+
+
+def test_no_criteria():
+    criteria = StoppingCriteria()
+    criteria.update(Schedule(), 10, 1000, 1000)
+    assert(not criteria.should_stop())
+    assert(criteria.progress() == 0 and criteria.remaining_iterations() is None)
+    criteria.stop()
+    assert(criteria.should_stop())
+
+
+def test_max_iterations():
+    criteria = StoppingCriteria(max_iterations=3)
+    for _ in range(2):
+        criteria.update(Schedule(), 1)
+        assert(not criteria.should_stop())
+    assert(criteria.remaining_iterations() == 1)
+    criteria.update(Schedule(), 1)
+    assert(criteria.should_stop() and criteria.progress() == 1)
+    criteria.start(5)
+    assert(criteria.max_iterations == 5 and criteria.iterations == 0 and not criteria.should_stop())
+
+
+def test_max_time():
+    clock = Clock()
+    criteria = StoppingCriteria(max_time=10, clock=clock)
+    clock.time += 4
+    criteria.update(Schedule(), 1, iterations=2)
+    assert(criteria.elapsed_time() == 4 and not criteria.should_stop())
+    assert(criteria.progress() == 0.4)
+    assert(criteria.remaining_iterations() == 3)
+    clock.time += 6
+    assert(criteria.should_stop() and criteria.progress() == 1)
+    criteria.start()
+    assert(criteria.elapsed_time() == 0 and not criteria.should_stop())
+
+
+def test_restore_time():
+    clock = Clock()
+    criteria = StoppingCriteria(max_time=10, clock=clock)
+    clock.time += 7
+    schedule = Schedule()
+    criteria.update(schedule, 5)
+    schedule.last_score = 5
+    state = criteria.state()
+    clock.time += 50
+    resumed = StoppingCriteria(max_time=10, clock=clock)
+    resumed.restore(state, schedule)
+    assert(resumed.elapsed_time() == 7 and not resumed.should_stop())
+    clock.time += 3
+    assert(resumed.should_stop())
+
+
+def test_stagnation():
+    criteria = StoppingCriteria(stagnation=2)
+    best = Schedule()
+    criteria.update(best, 5)
+    criteria.update(Schedule(), 5)
+    assert(not criteria.should_stop())
+    criteria.update(Schedule(), 4)
+    assert(criteria.should_stop() and criteria.best_schedule is best)
+    better = Schedule()
+    assert(criteria.improve(better, 6))
+    assert(not criteria.should_stop() and criteria.best_schedule is better and criteria.last_improvement == 3)
+
+
+def test_target_score():
+    criteria = StoppingCriteria(target_score=10)
+    assert(not criteria.should_stop())
+    criteria.update(Schedule(), 9)
+    assert(not criteria.should_stop() and criteria.best_score == 9)
+    criteria.update(None, 20)
+    assert(not criteria.should_stop() and criteria.best_score == 9)
+    criteria.update(Schedule(), 10)
+    assert(criteria.should_stop())
+
+
+def test_max_evaluations():
+    criteria = StoppingCriteria(max_evaluations=10)
+    criteria.update(Schedule(), 1, evaluations=4)
+    assert(not criteria.should_stop() and criteria.progress() == 0.4)
+    assert(criteria.remaining_iterations() == 1)
+    criteria.update(Schedule(), 1, evaluations=6)
+    assert(criteria.should_stop())
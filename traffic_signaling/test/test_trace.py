@@ -0,0 +1,31 @@
+from functools import lru_cache
+from traffic_signaling.src.model.city_cache import load_city
+from traffic_signaling.src.model.schedule import Schedule
+from traffic_signaling.src.model.trace import Trace
+
+
+@lru_cache(maxsize=None)
+def get_city(dataset):
+    '''Load a dataset once, on first use'''
+    return load_city(f'traffic_signaling/asset/data/{dataset}.txt')
+
+
+def test_trace_states(tmp_path):
+    schedule = Schedule.from_input('traffic_signaling/asset/out/a3.txt', get_city('a'))
+    assert(schedule.evaluate(get_city('a'), str(tmp_path / 'a3.trace')) == 2002)
+    trace = Trace.read(str(tmp_path / 'a3.trace'))
+    assert(trace.score == 2002)
+    assert([events.tolist() for events in trace.events()] == [[0, 0, 1, 3, 4], [0, 1, 0, 1, 0], [0, 2, 1, 4, 4]])
+    assert(trace.green_streets(1).tolist() == [0, 1, 3, 4])
+    assert([positions.tolist() for positions in trace.car_positions(1)] == [[0, 1], [1, 4], [0, 2]])
+    assert(trace.queue_lengths(0).tolist() == [1, 0, 1, 0, 0])
+    assert([trace.score_at(time) for time in range(2, 6)] == [0, 1002, 2002, 2002])
+    assert([positions.tolist() for positions in trace.car_positions(5)] == [[], [], []])
+
+
+def test_trace_score():
+    schedule = Schedule.from_input('traffic_signaling/asset/out/e2.txt', get_city('e'))
+    trace = Trace.from_bytes(Trace.record(get_city('e'), schedule).to_bytes())
+    assert(trace.score == schedule.last_score == 710095)
+    assert(trace.score_at(get_city('e').duration) == 710095)
+    assert(len(trace.events()[0]) == 4652)